@@ -19,6 +19,7 @@ from respy.method_of_simulated_moments import get_diag_weighting_matrix  # noqa:
 from respy.method_of_simulated_moments import get_flat_moments  # noqa: F401
 from respy.method_of_simulated_moments import get_moment_errors_func  # noqa: F401
 from respy.simulate import get_simulate_func  # noqa: F401
+from respy.solve import AccuracySchedule  # noqa: F401
 from respy.solve import get_solve_func  # noqa: F401
 from respy.tests.random_model import add_noise_to_params  # noqa: F401
 
@@ -33,6 +34,7 @@ __all__ = [
     "get_diag_weighting_matrix",
     "get_flat_moments",
     "add_noise_to_params",
+    "AccuracySchedule",
 ]
 
 __version__ = "2.0.0"
@@ -1,4 +1,6 @@
 """Special functions for using numba."""
+import functools
+import threading
 import warnings
 
 import numba as nb
@@ -7,6 +9,8 @@ from numba import NumbaDeprecationWarning
 from numba import types
 from numba.extending import intrinsic
 
+from respy import config
+
 # Fix for transition to Numba 0.50. cgutils was moved from numba.cgutils to
 # numba.core.cgutils.
 try:
@@ -92,3 +96,71 @@ def sum_over_numba_boolean_unituple(tuple_):
 
     """
     return np.sum(np.array([1 for i in tuple_ if i]))
+
+
+def guvectorize_serial_and_parallel(signatures, layout, work_size):
+    """Compile a generalized ufunc for the serial and the parallel target.
+
+    The ``target="parallel"`` variant of a :func:`numba.guvectorize` function pays for
+    starting and scheduling threads on every call which dominates the runtime for small
+    inputs like dense keys with only a few states. This decorator compiles the function
+    for both targets and selects one on every call by comparing the work size of the
+    inputs with :data:`respy.config.PARALLEL_KERNEL_THRESHOLD`.
+
+    Outside of the main thread, the parallel variant is only used if Numba runs on a
+    thread-safe threading layer like TBB or OpenMP. The default workqueue layer
+    terminates the process if it is entered concurrently from multiple threads.
+
+    The compiled variants are available as the attributes ``serial`` and ``parallel``
+    of the returned function which is useful for benchmarking.
+
+    Parameters
+    ----------
+    signatures : list of str
+        Signatures passed to :func:`numba.guvectorize`.
+    layout : str
+        Layout of the generalized ufunc passed to :func:`numba.guvectorize`.
+    work_size : callable
+        Function which receives the positional arguments of the generalized ufunc and
+        returns the amount of work, e.g., ``n_states * n_draws * n_choices``.
+
+    """
+
+    def decorator_guvectorize_serial_and_parallel(func):
+        serial = nb.guvectorize(signatures, layout, nopython=True, target="cpu")(func)
+        parallel = nb.guvectorize(signatures, layout, nopython=True, target="parallel")(
+            func
+        )
+
+        @functools.wraps(func)
+        def wrapper_guvectorize_serial_and_parallel(*args, **kwargs):
+            if (
+                work_size(*args) >= config.PARALLEL_KERNEL_THRESHOLD
+                and _is_parallel_target_safe()
+            ):
+                out = parallel(*args, **kwargs)
+            else:
+                out = serial(*args, **kwargs)
+
+            return out
+
+        wrapper_guvectorize_serial_and_parallel.serial = serial
+        wrapper_guvectorize_serial_and_parallel.parallel = parallel
+
+        return wrapper_guvectorize_serial_and_parallel
+
+    return decorator_guvectorize_serial_and_parallel
+
+
+def _is_parallel_target_safe():
+    """Check whether a parallel Numba function can be called from the current thread."""
+    if threading.current_thread() is threading.main_thread():
+        is_safe = True
+    else:
+        try:
+            is_safe = nb.threading_layer() in ["tbb", "omp"]
+        # The threading layer is only known after a parallel function was executed.
+        except ValueError:
+            is_safe = False
+
+    return is_safe
@@ -42,6 +42,26 @@ dimension.
 
 """
 
+PARALLEL_KERNEL_THRESHOLD = 100_000
+"""int : Minimum work size for which the parallel variant of a kernel is used.
+
+Numerical kernels like :func:`respy.shared.calculate_expected_value_functions` are
+compiled for the serial and the parallel target of :func:`numba.guvectorize`. The work
+size of a call is roughly the number of states times the number of draws times the
+number of choices. Below the threshold, the serial kernel is used because starting and
+scheduling threads costs more than it saves. Change the value to benchmark the kernels.
+
+"""
+
+INTERPOLATION_MAX_CONDITION_NUMBER = 1e10
+"""float : Condition number above which the interpolation regression is ill-conditioned.
+
+The condition number of the exogenous variables of the interpolation model is estimated
+in :func:`respy.interpolate.ols`. If it exceeds the threshold, a warning is raised as
+the coefficients and the interpolated expected value functions are unreliable.
+
+"""
+
 # Some assert functions take rtol instead of decimals
 TOL_REGRESSION_TESTS = 1e-10
 
@@ -52,13 +72,30 @@ DEFAULT_OPTIONS = {
     "estimation_seed": 1,
     "estimation_tau": 500,
     "interpolation_points": -1,
+    "interpolation_model": "ols",
+    "interpolation_pooling": False,
+    "interpolation_point_selection": "random",
+    "interpolation_tolerance": None,
+    "interpolation_diagnostics": False,
+    "interpolation_observed_states_weight": 1,
     "simulation_agents": 1000,
     "simulation_seed": 2,
     "solution_draws": 200,
     "solution_seed": 3,
     "core_state_space_filters": [],
+    "core_state_space_pruning": False,
+    "dense_state_space_pruning": False,
     "negative_choice_set": {},
     "monte_carlo_sequence": "sobol",
+    "monte_carlo_antithetic": False,
+    "monte_carlo_control_variate": False,
+    "solution_integration": "monte_carlo",
+    "solution_quadrature_level": 8,
+    "solution_closed_form_emax": False,
+    "solution_emax_tolerance": None,
+    "solution_emax_block_size": 20,
+    "solution_deduplicate_states": False,
+    "solution_dtype": "float64",
     "cache_compression": "snappy",
 }
 
@@ -1,17 +1,34 @@
 """This module contains the code for approximate solutions to the DCDP."""
+import functools
+import itertools
+import threading
+import time
 import warnings
 
 import numba as nb
 import numpy as np
+import pandas as pd
+from scipy import linalg
 
+from respy.config import INTERPOLATION_MAX_CONDITION_NUMBER
 from respy.config import MAX_LOG_FLOAT
 from respy.parallelization import parallelize_across_dense_dimensions
 from respy.shared import calculate_expected_value_functions
+from respy.shared import calculate_weighted_expected_value_functions
 from respy.shared import calculate_value_functions_and_flow_utilities
 
 
+# Guards the cache of interpolation subsets on state spaces shared by threads.
+_INTERPOLATION_SUBSET_LOCK = threading.Lock()
+
+
 def kw_94_interpolation(
-    state_space, period_draws_emax_risk, period, optim_paras, options,
+    solution,
+    period_draws_emax_risk,
+    period_weights_emax_risk,
+    period,
+    optim_paras,
+    options,
 ):
     r"""Calculate the approximate solution proposed by [1]_.
 
@@ -43,18 +60,47 @@ def kw_94_interpolation(
 
     The function consists of the following steps.
 
-    1. Create an indicator for whether the expected value function of the state is
-       calculated with Monte-Carlo simulation or interpolation.
+    1. Compute the expected value of the shocks.
 
-    2. Compute the expected value of the shocks.
+    2. Compute the right-hand side variables of the linear model.
 
-    3. Compute the right-hand side variables of the linear model.
+    3. Create an indicator for whether the expected value function of the state is
+       calculated with Monte-Carlo simulation or interpolation. The states are drawn
+       randomly or, if ``options["interpolation_point_selection"] == "maximin"``,
+       selected with a space-filling design on the right-hand side variables, see
+       :func:`_get_not_interpolated_indicator_by_maximin`. Random draws favor states
+       in the data by ``options["interpolation_observed_states_weight"]``.
 
     4. Compute the left-hand side variables of the linear model by Monte-Carlo
        simulation on subset of states.
 
-    5. Fit the linear model with ordinary least squares on the subset without
-       interpolation and predict the expected value functions for all other states.
+    5. Fit the interpolation model on the subset without interpolation and predict the
+       expected value functions for all other states. At default, the linear model is
+       fitted with ordinary least squares, but other models can be selected with
+       ``options["interpolation_model"]``, see :func:`_get_interpolation_model`. The
+       model is fitted per dense key or, if ``options["interpolation_pooling"]`` is
+       true, per group of dense keys with the same choice set, see
+       :func:`_predict_with_pooled_interpolation_model`.
+
+    If ``options["interpolation_tolerance"]`` is given, the number of interpolation
+    points is only the initial number of simulated states. The number is doubled until
+    the cross-validated prediction error of the interpolation model, see
+    :func:`_cross_validate_interpolation`, is below the tolerance or all states are
+    simulated. The subsets are nested and only the added states are simulated.
+
+    Returns
+    -------
+    period_expected_value_functions : dict
+        Maps dense keys to the expected value functions of the period.
+    n_points : int
+        Number of states whose expected value functions are simulated.
+    error : float or None
+        The cross-validated prediction error if ``options["interpolation_tolerance"]``
+        is given. Otherwise, None.
+    diagnostics : pandas.DataFrame or None
+        Diagnostics of the interpolation per dense key if
+        ``options["interpolation_diagnostics"]`` is true, see
+        :func:`_create_interpolation_diagnostics`. Otherwise, None.
 
     References
     ----------
@@ -65,34 +111,22 @@ def kw_94_interpolation(
 
     """
     # Get reward components.
-    wages = state_space.get_attribute_from_period("wages", period)
-    nonpecs = state_space.get_attribute_from_period("nonpecs", period)
-    continuation_values = state_space.get_continuation_values(period)
+    wages = solution.get_attribute_from_period("wages", period)
+    nonpecs = solution.get_attribute_from_period("nonpecs", period)
+    continuation_values = solution.get_continuation_values(period)
 
     # Create some dense key conversion objects.
     dense_keys_in_period = list(wages)
     dense_key_to_n_states = {
-        dense_key: len(state_space.dense_key_to_core_indices[dense_key])
+        dense_key: len(solution.dense_key_to_core_indices[dense_key])
         for dense_key in dense_keys_in_period
     }
     dense_key_to_choice_set_in_period = {
-        dense_key: state_space.dense_key_to_choice_set[dense_key]
+        dense_key: solution.dense_key_to_choice_set[dense_key]
         for dense_key in dense_keys_in_period
     }
 
     # Start interpolation.
-    seeds = _get_seeds_to_create_not_interpolate_indicator(
-        dense_keys_in_period, options
-    )
-
-    interpolation_points = _split_interpolation_points_evenly(
-        dense_key_to_n_states, period, options
-    )
-
-    not_interpolated = _get_not_interpolated_indicator(
-        interpolation_points, dense_key_to_n_states, seeds
-    )
-
     expected_shocks = _compute_expected_shocks(
         dense_key_to_choice_set_in_period, optim_paras
     )
@@ -101,42 +135,319 @@ def kw_94_interpolation(
         wages, nonpecs, continuation_values, expected_shocks, optim_paras["delta"]
     )
 
-    endogenous = _compute_lhs_variable(
-        wages,
-        nonpecs,
-        continuation_values,
-        max_emax,
-        not_interpolated,
-        period_draws_emax_risk,
-        optim_paras["delta"],
+    if options["interpolation_pooling"]:
+        predict = functools.partial(
+            _predict_with_pooled_interpolation_model,
+            dense_key_to_choice_set=dense_key_to_choice_set_in_period,
+            interpolation_model=options["interpolation_model"],
+        )
+    else:
+        predict = functools.partial(
+            _predict_with_interpolation_model,
+            interpolation_model=options["interpolation_model"],
+        )
+
+    n_states_in_period = sum(dense_key_to_n_states.values())
+    seconds_simulation = dict.fromkeys(dense_keys_in_period, 0.0)
+    seconds_regression = dict.fromkeys(dense_keys_in_period, 0.0)
+
+    subset = _get_interpolation_subset(
+        solution,
+        period,
+        dense_key_to_n_states,
+        dense_key_to_choice_set_in_period,
+        options,
     )
+    not_interpolated = {
+        dense_key: np.zeros(n_states, dtype="bool")
+        for dense_key, n_states in dense_key_to_n_states.items()
+    }
+    simulated = {
+        dense_key: np.full(n_states, np.nan)
+        for dense_key, n_states in dense_key_to_n_states.items()
+    }
+
+    for step in itertools.count():
+        interpolation_points = _get_interpolation_points_of_step(
+            subset, step, dense_key_to_n_states
+        )
+        n_points = sum(interpolation_points.values())
+
+        if options["interpolation_point_selection"] == "maximin":
+            not_interpolated_ = _get_not_interpolated_indicator_by_maximin(
+                interpolation_points, exogenous, not_interpolated
+            )
+        else:
+            not_interpolated_ = {
+                dense_key: subset["ranks"][dense_key] < n_points_
+                for dense_key, n_points_ in interpolation_points.items()
+            }
+
+        # Only simulate the states which are added to the subset.
+        added = {
+            dense_key: not_interpolated_[dense_key] & ~not_interpolated[dense_key]
+            for dense_key in dense_keys_in_period
+        }
+        not_interpolated = not_interpolated_
+
+        endogenous_added, seconds = _compute_lhs_variable(
+            wages,
+            nonpecs,
+            continuation_values,
+            max_emax,
+            added,
+            period_draws_emax_risk,
+            period_weights_emax_risk,
+            dense_key_to_choice_set_in_period,
+            optim_paras,
+        )
+        for dense_key in dense_keys_in_period:
+            simulated[dense_key][added[dense_key]] = endogenous_added[dense_key]
+        endogenous = {
+            dense_key: simulated[dense_key][not_interpolated[dense_key]]
+            for dense_key in dense_keys_in_period
+        }
+
+        # Create prediction model based on the subset of points where the EMAX is
+        # actually simulated and thus dependent and independent variables are
+        # available. For the interpolation points, the actual values are used.
+        period_expected_value_functions, fitted, seconds_ = predict(
+            endogenous, exogenous, max_emax, not_interpolated
+        )
+
+        for dense_key in dense_keys_in_period:
+            seconds_simulation[dense_key] += seconds[dense_key]
+            seconds_regression[dense_key] += seconds_[dense_key]
+
+        if options["interpolation_tolerance"] is None:
+            error = None
+            break
+
+        error = _cross_validate_interpolation(
+            endogenous, exogenous, max_emax, not_interpolated, predict
+        )
+        if error <= options["interpolation_tolerance"] or (
+            n_points == n_states_in_period
+        ):
+            break
+
+    diagnostics = (
+        _create_interpolation_diagnostics(
+            period,
+            endogenous,
+            fitted,
+            not_interpolated,
+            seconds_simulation,
+            seconds_regression,
+        )
+        if options["interpolation_diagnostics"]
+        else None
+    )
+
+    return period_expected_value_functions, n_points, error, diagnostics
+
+
+def _create_interpolation_diagnostics(
+    period, endogenous, fitted, not_interpolated, seconds_simulation, seconds_regression
+):
+    """Create diagnostics of the interpolation in one period.
+
+    The diagnostics allow to choose the number of interpolation points without solving
+    the model fully. The goodness of fit is measured on the endogenous variable of the
+    states which are not interpolated. The timings are summed over all iterations if the
+    number of interpolation points is increased automatically, but exclude the
+    cross-validation.
+
+    Returns
+    -------
+    diagnostics : pandas.DataFrame
+        DataFrame with a row for each period and dense key and the columns
+
+        - ``"n_simulated"``: number of states whose expected value functions are
+          simulated.
+        - ``"n_interpolated"``: number of states whose expected value functions are
+          interpolated.
+        - ``"r_squared"``: the coefficient of determination of the interpolation model.
+        - ``"residual_std"``: the standard deviation of the residuals.
+        - ``"seconds_simulation"``: time spent on the simulation.
+        - ``"seconds_regression"``: time spent on fitting the interpolation model and
+          the prediction.
 
-    # Create prediction model based on the random subset of points where the EMAX is
-    # actually simulated and thus dependent and independent variables are available. For
-    # the interpolation points, the actual values are used.
-    period_expected_value_functions = _predict_with_linear_model(
-        endogenous, exogenous, max_emax, not_interpolated
+    """
+    diagnostics = {}
+    for dense_key, indicator in not_interpolated.items():
+        residuals = endogenous[dense_key] - fitted[dense_key]
+        if indicator.any():
+            deviations = endogenous[dense_key] - endogenous[dense_key].mean()
+            r_squared = 1 - np.sum(residuals ** 2) / np.sum(deviations ** 2)
+            residual_std = residuals.std()
+        else:
+            r_squared = residual_std = np.nan
+
+        diagnostics[(period, dense_key)] = {
+            "n_simulated": indicator.sum(),
+            "n_interpolated": (~indicator).sum(),
+            "r_squared": r_squared,
+            "residual_std": residual_std,
+            "seconds_simulation": seconds_simulation[dense_key],
+            "seconds_regression": seconds_regression[dense_key],
+        }
+
+    diagnostics = pd.DataFrame.from_dict(diagnostics, orient="index")
+    diagnostics.index.names = ["period", "dense_key"]
+
+    return diagnostics
+
+
+def _get_interpolation_subset(
+    solution, period, dense_key_to_n_states, dense_key_to_choice_set, options
+):
+    """Get the subset of states which are simulated instead of interpolated.
+
+    The split of interpolation points across dense keys and the randomly selected
+    states do not depend on the parameters. Thus, they are computed once per state space
+    and stored in ``solution.not_interpolated_indicators`` which saves the sampling in
+    every solution and keeps the subset fixed during an estimation. Indicators of the
+    maximin design depend on the parameters and are computed after the exogenous
+    variables are known.
+
+    The random selection is stored as the order in which states are added to the subset
+    and the subset of a dense key consists of the first states. Thus, subsets with more
+    interpolation points contain the subsets with fewer points. The interpolation
+    points of larger subsets are added to the entry by
+    :func:`_get_interpolation_points_of_step`.
+
+    The state space may be shared by threads solving the model concurrently. The cache
+    is filled under a lock and the seeds are derived from ``options["solution_seed"]``,
+    the period and the dense key instead of the shared seed counter. Thus, the subset
+    does not depend on which thread fills the cache first.
+
+    Returns
+    -------
+    subset : dict
+        Contains ``"seeds"`` which map dense keys to their seeds,
+        ``"interpolation_points"`` which is a list with the number of states per dense
+        key which are simulated for each doubling of the subset, and ``"ranks"`` which
+        maps dense keys to the position of each state in the random order or is None for
+        the maximin design.
+
+    """
+    key = (
+        period,
+        options["interpolation_points"],
+        options["interpolation_pooling"],
+        options["interpolation_point_selection"],
+        options["interpolation_observed_states_weight"],
     )
 
-    return period_expected_value_functions
+    with _INTERPOLATION_SUBSET_LOCK:
+        if key not in solution.not_interpolated_indicators:
+            seeds = _get_seeds_to_create_not_interpolate_indicator(
+                period, list(dense_key_to_n_states), options
+            )
+
+            dense_key_to_group = (
+                dense_key_to_choice_set if options["interpolation_pooling"] else None
+            )
+            interpolation_points = _split_interpolation_points_evenly(
+                dense_key_to_n_states, period, options, dense_key_to_group
+            )
+
+            ranks = (
+                None
+                if options["interpolation_point_selection"] == "maximin"
+                else _get_ranks_of_states_to_simulate(
+                    dense_key_to_n_states,
+                    seeds,
+                    _get_observed_states_in_period(solution, dense_key_to_n_states),
+                    options["interpolation_observed_states_weight"],
+                )
+            )
+
+            solution.not_interpolated_indicators[key] = {
+                "seeds": seeds,
+                "interpolation_points": [interpolation_points],
+                "ranks": ranks,
+            }
+
+        subset = solution.not_interpolated_indicators[key]
+
+    return subset
+
+
+def _get_interpolation_points_of_step(subset, step, dense_key_to_n_states):
+    """Get the number of simulated states per dense key after doubling the subset.
+
+    The number of interpolation points is doubled ``step`` times and capped at the
+    number of states. The additional points are distributed across dense keys in
+    proportion to their states which are not simulated, like in
+    :func:`_split_interpolation_points_evenly`. The seed of each doubling is derived
+    from the seeds of the dense keys such that no new seeds are consumed. The steps are
+    appended to the cached subset under the same lock as in
+    :func:`_get_interpolation_subset`.
 
+    """
+    steps = subset["interpolation_points"]
+    n_states_in_period = sum(dense_key_to_n_states.values())
+
+    with _INTERPOLATION_SUBSET_LOCK:
+        while len(steps) <= step:
+            interpolation_points = steps[-1]
+            n_points = sum(interpolation_points.values())
+            n_additional_points = min(2 * n_points, n_states_in_period) - n_points
+
+            n_remaining_states = np.array(
+                [
+                    n_states - interpolation_points[dense_key]
+                    for dense_key, n_states in dense_key_to_n_states.items()
+                ]
+            )
+            rng = np.random.default_rng([*subset["seeds"].values(), len(steps)])
+            additional_points = rng.multivariate_hypergeometric(
+                n_remaining_states, n_additional_points
+            )
+            steps.append(
+                {
+                    dense_key: interpolation_points[dense_key] + int(n_points_)
+                    for dense_key, n_points_ in zip(
+                        interpolation_points, additional_points
+                    )
+                }
+            )
+
+        interpolation_points = steps[step]
+
+    return interpolation_points
+
+
+def _get_seeds_to_create_not_interpolate_indicator(period, dense_keys, options):
+    """Get seeds for each dense index to mask not interpolated states.
+
+    The seeds are derived from the solution seed, the period and the dense key such that
+    they do not depend on the order in which subsets are created.
 
-def _get_seeds_to_create_not_interpolate_indicator(dense_keys, options):
-    """Get seeds for each dense index to mask not interpolated states."""
+    """
     seeds = {
-        dense_key: next(options["solution_seed_iteration"]) for dense_key in dense_keys
+        dense_key: int(
+            np.random.SeedSequence(
+                [options["solution_seed"], period, dense_key]
+            ).generate_state(1)[0]
+        )
+        for dense_key in dense_keys
     }
 
     return seeds
 
 
-def _split_interpolation_points_evenly(dense_key_to_n_states, period, options):
+def _split_interpolation_points_evenly(
+    dense_key_to_n_states, period, options, dense_key_to_group=None
+):
     """Split the number of interpolated states evenly across dense dimensions.
 
     We want to distribute the interpolation points evenly across dense indices in the
-    state space. Thus, we draw the dense indices until we reach the total number of
-    interpolation points and count the indices. The probability for each dense index
-    being drawn is the its share of the total number of states in the period.
+    state space. Thus, we draw states without replacement until we reach the total
+    number of interpolation points and count the states per dense index. The counts
+    follow a multivariate hypergeometric distribution and are drawn at once.
 
     Parameters
     ----------
@@ -144,49 +455,66 @@ def _split_interpolation_points_evenly(dense_key_to_n_states, period, options):
         Dictionary whose keys are dense indices in the period and values are the number
         of states.
     period : int
-        The current period. Used to print a more informative warning.
+        The current period. Used to seed the draw and to print a more informative
+        warning.
     options : dict
         Model options.
+    dense_key_to_group : dict, default None
+        Maps dense keys to groups which share one interpolation model, see
+        :func:`_predict_with_pooled_interpolation_model`. Each group receives at least
+        two points which are given to its largest dense key. If None, each dense key is
+        its own group.
 
     Warnings
     --------
     UserWarning
-        If the number of interpolation points is below 1% for one `dense_index`.
+        If the number of interpolation points is below 1% for one group.
 
     """
-    # Each `dense_index` receives at least two points. No regression line without two
-    # points!
-    dense_key_to_interpolation_points = {
-        dense_key: 2 if n_states > 2 else n_states
-        for dense_key, n_states in dense_key_to_n_states.items()
-    }
+    if dense_key_to_group is None:
+        dense_key_to_group = {
+            dense_key: dense_key for dense_key in dense_key_to_n_states
+        }
+
+    group_to_dense_keys = {}
+    for dense_key in dense_key_to_n_states:
+        group_to_dense_keys.setdefault(dense_key_to_group[dense_key], []).append(
+            dense_key
+        )
+
+    # Each group receives at least two points. No regression line without two points!
+    dense_key_to_interpolation_points = dict.fromkeys(dense_key_to_n_states, 0)
+    for dense_keys in group_to_dense_keys.values():
+        largest_dense_key = max(dense_keys, key=dense_key_to_n_states.get)
+        dense_key_to_interpolation_points[largest_dense_key] = min(
+            2, dense_key_to_n_states[largest_dense_key]
+        )
 
-    interpolation_points = options["interpolation_points"] - 2 * len(
-        dense_key_to_n_states
+    interpolation_points = options["interpolation_points"] - sum(
+        dense_key_to_interpolation_points.values()
     )
 
     # If there are interpolation points left, distribute them.
-    dense_indices = list(dense_key_to_interpolation_points)
-    n_states = (np.array(list(dense_key_to_n_states.values())) - 2).clip(min=0)
-
     if interpolation_points > 0:
-        np.random.seed(next(options["solution_seed_iteration"]))
-        for _ in range(interpolation_points):
-            probs = n_states / n_states.sum()
-
-            dense_key = np.random.choice(list(dense_key_to_n_states), p=probs)
-
-            dense_key_to_interpolation_points[dense_key] += 1
-
-            pos = dense_indices.index(dense_key)
-            n_states[pos] -= 1
-
-    share_interp_points_per_dense_index = {
-        dense_key: dense_key_to_interpolation_points[dense_index]
-        / dense_key_to_n_states[dense_key]
-        for dense_index in dense_key_to_n_states
-    }
-    if (np.array(list(share_interp_points_per_dense_index.values())) < 0.01).any():
+        n_states = np.array(list(dense_key_to_n_states.values())) - np.array(
+            list(dense_key_to_interpolation_points.values())
+        )
+        # Use a local random state to leave the global random state untouched which
+        # might be used by other threads. The seed is derived from the period such that
+        # the split does not depend on the order in which periods are solved.
+        rng = np.random.default_rng([options["solution_seed"], period])
+        additional_points = rng.multivariate_hypergeometric(
+            n_states, interpolation_points
+        )
+        for dense_key, n_points in zip(dense_key_to_n_states, additional_points):
+            dense_key_to_interpolation_points[dense_key] += int(n_points)
+
+    share_interp_points_per_group = [
+        sum(dense_key_to_interpolation_points[key] for key in dense_keys)
+        / sum(dense_key_to_n_states[key] for key in dense_keys)
+        for dense_keys in group_to_dense_keys.values()
+    ]
+    if (np.array(share_interp_points_per_group) < 0.01).any():
         warnings.warn(
             "The number of interpolation points for one 'dense_index' in period "
             f"{period} is less than 1% of its total number of states. Consider "
@@ -196,8 +524,20 @@ def _split_interpolation_points_evenly(dense_key_to_n_states, period, options):
     return dense_key_to_interpolation_points
 
 
+def _get_observed_states_in_period(solution, dense_keys):
+    """Get the indicators for observed states of the dense keys if there are any."""
+    if solution.observed_states is None:
+        observed_states = None
+    else:
+        observed_states = {k: solution.observed_states[k] for k in dense_keys}
+
+    return observed_states
+
+
 @parallelize_across_dense_dimensions
-def _get_not_interpolated_indicator(interpolation_points, n_states, seed):
+def _get_not_interpolated_indicator(
+    interpolation_points, n_states, seed, observed_states=None, observed_weight=1
+):
     """Get indicator for states which will be not interpolated.
 
     Parameters
@@ -208,6 +548,13 @@ def _get_not_interpolated_indicator(interpolation_points, n_states, seed):
         Total number of states in period.
     seed : int
         Seed to set randomness.
+    observed_states : numpy.ndarray, default None
+        Array of shape (n_states,) indicating states which are visited by individuals
+        in the data or are their child states, see
+        :meth:`~respy.state_space.StateSpace.set_observed_states`.
+    observed_weight : float, default 1
+        The relative probability of observed states to be drawn. A weight of one draws
+        all states with the same probability.
 
     Returns
     -------
@@ -215,11 +562,98 @@ def _get_not_interpolated_indicator(interpolation_points, n_states, seed):
         Array of shape (n_states,) indicating states which will not be interpolated.
 
     """
-    np.random.seed(seed)
+    ranks = _get_ranks_of_states_to_simulate(
+        n_states, seed, observed_states, observed_weight
+    )
+
+    return ranks < interpolation_points
+
 
-    indices = np.random.choice(n_states, size=interpolation_points, replace=False)
-    not_interpolated = np.zeros(n_states, dtype="bool")
-    not_interpolated[indices] = True
+@parallelize_across_dense_dimensions
+def _get_ranks_of_states_to_simulate(
+    n_states, seed, observed_states=None, observed_weight=1
+):
+    """Get the random order in which states are added to the simulated subset.
+
+    All states are drawn without replacement and the first ``k`` states are a sample of
+    ``k`` states without replacement. Without weights, the order is a permutation and
+    the first states are the same as the states drawn by
+    :meth:`numpy.random.RandomState.choice`.
+
+    Returns
+    -------
+    ranks : numpy.ndarray
+        Array of shape (n_states,) containing the position of each state in the order.
+
+    """
+    random_state = np.random.RandomState(seed)
+
+    if (
+        observed_states is None
+        or observed_weight == 1
+        or observed_states.all()
+        or not observed_states.any()
+    ):
+        probabilities = None
+    else:
+        probabilities = np.where(observed_states, observed_weight, 1.0)
+        probabilities /= probabilities.sum()
+
+    order = random_state.choice(n_states, size=n_states, replace=False, p=probabilities)
+    ranks = np.empty(n_states, dtype=np.int64)
+    ranks[order] = np.arange(n_states)
+
+    return ranks
+
+
+@parallelize_across_dense_dimensions
+def _get_not_interpolated_indicator_by_maximin(
+    interpolation_points, exogenous, not_interpolated=None
+):
+    """Get indicator for states which will be not interpolated with a maximin design.
+
+    Randomly selected states cluster in some regions of the state space and leave
+    others uncovered. Instead, the states are selected greedily such that each new
+    state has the largest distance to its nearest, already selected state. The first
+    state is the one farthest from the center. Distances are computed on the
+    non-constant exogenous variables scaled by their standard deviations. The selection
+    is deterministic.
+
+    Parameters
+    ----------
+    interpolation_points : int
+        Number of states which will be interpolated.
+    exogenous : numpy.ndarray
+        Array with shape (n_states, n_exogenous) containing the exogenous variables.
+    not_interpolated : numpy.ndarray, default None
+        Array of shape (n_states,) indicating states which are already selected. The
+        greedy selection continues from these states.
+
+    Returns
+    -------
+    not_interpolated : numpy.ndarray
+        Array of shape (n_states,) indicating states which will not be interpolated.
+
+    """
+    std = exogenous.std(axis=0)
+    x = exogenous[:, std > 0] / std[std > 0]
+
+    min_distances = np.full(len(x), np.inf)
+    if not_interpolated is None or not not_interpolated.any():
+        not_interpolated = np.zeros(len(x), dtype="bool")
+        index = np.argmax(((x - x.mean(axis=0)) ** 2).sum(axis=1))
+    else:
+        not_interpolated = not_interpolated.copy()
+        for index in np.flatnonzero(not_interpolated):
+            min_distances = np.minimum(min_distances, ((x - x[index]) ** 2).sum(axis=1))
+        min_distances[not_interpolated] = -np.inf
+        index = np.argmax(min_distances)
+
+    for _ in range(interpolation_points - not_interpolated.sum()):
+        not_interpolated[index] = True
+        min_distances = np.minimum(min_distances, ((x - x[index]) ** 2).sum(axis=1))
+        min_distances[not_interpolated] = -np.inf
+        index = np.argmax(min_distances)
 
     return not_interpolated
 
@@ -276,11 +710,17 @@ def _compute_rhs_variables(wages, nonpec, continuation_values, draws, delta):
     )
 
     max_value_functions = value_functions.max(axis=1)
-    exogenous = max_value_functions.reshape(-1, 1) - value_functions
 
-    exogenous = np.column_stack(
-        (exogenous, np.sqrt(exogenous), np.ones(exogenous.shape[0]))
+    # Fill the exogenous variables in place to avoid temporary arrays.
+    n_states, n_choices = value_functions.shape
+    exogenous = np.empty((n_states, 2 * n_choices + 1))
+    np.subtract(
+        max_value_functions.reshape(-1, 1),
+        value_functions,
+        out=exogenous[:, :n_choices],
     )
+    np.sqrt(exogenous[:, :n_choices], out=exogenous[:, n_choices:-1])
+    exogenous[:, -1] = 1
 
     return exogenous, max_value_functions
 
@@ -293,7 +733,9 @@ def _compute_lhs_variable(
     max_value_functions,
     not_interpolated,
     draws,
-    delta,
+    weights,
+    choice_set,
+    optim_paras,
 ):
     """Calculate left-hand side variable for all states which are not interpolated.
 
@@ -317,37 +759,63 @@ def _compute_lhs_variable(
         continuation_values.
     draws : numpy.ndarray
         Array with shape (n_draws, n_choices) containing draws.
-    delta : float
-        Discount factor.
+    weights : numpy.ndarray or None
+        Array with shape (n_draws,) containing the weights of the draws if the draws are
+        nodes of a quadrature rule. Otherwise, None.
+    choice_set : tuple of bool
+        The choice set of the states.
+    optim_paras : dict
+        Parsed model parameters.
+
+    Returns
+    -------
+    endogenous : numpy.ndarray
+        Array with shape (n_simulated_states_in_period,) containing the expected value
+        functions minus the maximum of the value functions with the expected shocks.
+    seconds : float
+        The time spent on the simulation.
 
     """
-    expected_value_functions = calculate_expected_value_functions(
-        wages[not_interpolated],
-        nonpec[not_interpolated],
-        continuation_values[not_interpolated],
-        draws,
-        delta,
-    )
+    start = time.perf_counter()
+    if weights is None:
+        expected_value_functions = calculate_expected_value_functions(
+            wages[not_interpolated],
+            nonpec[not_interpolated],
+            continuation_values[not_interpolated],
+            draws,
+            optim_paras["delta"],
+        )
+    else:
+        expected_value_functions = calculate_weighted_expected_value_functions(
+            wages[not_interpolated],
+            nonpec[not_interpolated],
+            continuation_values[not_interpolated],
+            draws,
+            weights,
+            choice_set,
+            optim_paras,
+        )
     endogenous = expected_value_functions - max_value_functions[not_interpolated]
 
-    return endogenous
+    return endogenous, time.perf_counter() - start
 
 
 @parallelize_across_dense_dimensions
-def _predict_with_linear_model(
-    endogenous, exogenous, max_value_functions, not_interpolated
+def _predict_with_interpolation_model(
+    endogenous, exogenous, max_value_functions, not_interpolated, interpolation_model
 ):
-    """Predict the expected value function for interpolated states with a linear model.
+    """Predict the expected value function for interpolated states.
 
-    The linear model is fitted with ordinary least squares. Then, predict the expected
-    value function for all interpolated states and use the compute expected value
-    functions for the remaining states.
+    The interpolation model is fitted on the states which are not interpolated. Then,
+    predict the expected value function for all interpolated states and use the
+    computed expected value functions for the remaining states.
 
     Parameters
     ----------
     endogenous : numpy.ndarray
         Array with shape (num_simulated_states_in_period,) containing the expected value
-        functions minus the maximufor states used to interpolate the rest.
+        functions minus the maximum of the value functions with the expected shocks for
+        states used to interpolate the rest.
     exogenous : numpy.ndarray
         Array with shape (n_states_in_period, n_choices * 2 + 1) containing exogenous
         variables.
@@ -358,25 +826,590 @@ def _predict_with_linear_model(
         Array with shape (n_states_in_period,) containing indicator for states which
         are not interpolated and used to estimate the coefficients for the
         interpolation.
+    interpolation_model : str or callable
+        The name of a built-in interpolation model or a callable which returns an
+        unfitted model, see :func:`_get_interpolation_model`.
+
+    Returns
+    -------
+    predictions : numpy.ndarray
+        Array with shape (n_states_in_period,) containing the expected value functions.
+    fitted : numpy.ndarray
+        Array with shape (n_simulated_states_in_period,) containing the predictions of
+        the endogenous variable for the states which are not interpolated.
+    seconds : float
+        The time spent on fitting the model and the prediction.
 
     """
-    beta = ols(endogenous, exogenous[not_interpolated])
+    start = time.perf_counter()
+    model = _get_interpolation_model(interpolation_model)
+    model.fit(exogenous[not_interpolated], endogenous)
+    endogenous_predicted = model.predict(exogenous)
+
+    predictions = _combine_predictions_and_simulations(
+        endogenous, endogenous_predicted, max_value_functions, not_interpolated
+    )
+
+    return (
+        predictions,
+        endogenous_predicted[not_interpolated],
+        time.perf_counter() - start,
+    )
+
 
-    endogenous_predicted = exogenous.dot(beta)
+def _predict_with_pooled_interpolation_model(
+    endogenous,
+    exogenous,
+    max_value_functions,
+    not_interpolated,
+    dense_key_to_choice_set,
+    interpolation_model,
+):
+    """Predict the expected value function with one model per group of dense keys.
+
+    Fitting a separate model per dense key requires at least two states without
+    interpolation per dense key. For models with many types and observables, the
+    number of interpolation points must be large and the fits degenerate for dense keys
+    with few states. Instead, one model is fitted per period and choice set to the
+    stacked states of all dense keys as the exogenous variables have the same columns.
+
+    Differences between dense keys, e.g., due to types, are captured by a dense key
+    specific shift of the intercept. The shift is the mean residual of the pooled model
+    for the states without interpolation of the dense key. Dense keys without such
+    states receive no shift. The shift is a correction after fitting and not the
+    coefficient of a dense key indicator in the model. The slopes are estimated from the
+    pooled states without indicators and may differ from the slopes of a model with
+    indicators if the dense keys differ in their levels.
+
+    Parameters
+    ----------
+    endogenous : dict
+        Maps dense keys to arrays with the endogenous variable of states which are not
+        interpolated.
+    exogenous : dict
+        Maps dense keys to arrays with the exogenous variables of all states.
+    max_value_functions : dict
+        Maps dense keys to arrays with the maximum over all value functions computed
+        with the expected value of shocks.
+    not_interpolated : dict
+        Maps dense keys to arrays with indicators for states which are not
+        interpolated.
+    dense_key_to_choice_set : dict
+        Maps dense keys to their choice sets.
+    interpolation_model : str or callable
+        See :func:`_get_interpolation_model`.
+
+    Returns
+    -------
+    predictions : dict
+        Maps dense keys to arrays with the expected value functions.
+    fitted : dict
+        Maps dense keys to arrays with the predictions of the endogenous variable for
+        the states which are not interpolated.
+    seconds : dict
+        Maps dense keys to the time spent on the prediction and an equal share of the
+        time spent on fitting the model of its group.
+
+    """
+    choice_set_to_dense_keys = {}
+    for dense_key, choice_set in dense_key_to_choice_set.items():
+        choice_set_to_dense_keys.setdefault(choice_set, []).append(dense_key)
+
+    predictions = {}
+    fitted = {}
+    seconds = {}
+    for dense_keys in choice_set_to_dense_keys.values():
+        start = time.perf_counter()
+        model = _get_interpolation_model(interpolation_model)
+        model.fit(
+            np.concatenate([exogenous[k][not_interpolated[k]] for k in dense_keys]),
+            np.concatenate([endogenous[k] for k in dense_keys]),
+        )
+        seconds_fit = (time.perf_counter() - start) / len(dense_keys)
+
+        for dense_key in dense_keys:
+            start = time.perf_counter()
+            endogenous_predicted = model.predict(exogenous[dense_key])
+            if not_interpolated[dense_key].any():
+                endogenous_predicted += np.mean(
+                    endogenous[dense_key]
+                    - endogenous_predicted[not_interpolated[dense_key]]
+                )
+
+            predictions[dense_key] = _combine_predictions_and_simulations(
+                endogenous[dense_key],
+                endogenous_predicted,
+                max_value_functions[dense_key],
+                not_interpolated[dense_key],
+            )
+            fitted[dense_key] = endogenous_predicted[not_interpolated[dense_key]]
+            seconds[dense_key] = seconds_fit + time.perf_counter() - start
+
+    return predictions, fitted, seconds
+
+
+def _combine_predictions_and_simulations(
+    endogenous, endogenous_predicted, max_value_functions, not_interpolated
+):
+    """Combine the predicted and the simulated expected value functions."""
     endogenous_predicted = np.clip(endogenous_predicted, 0, None)
 
     predictions = endogenous_predicted + max_value_functions
     predictions[not_interpolated] = endogenous + max_value_functions[not_interpolated]
 
-    if not np.all(np.isfinite(beta)):
-        warnings.warn("OLS coefficients in the interpolation are not finite.")
+    if not np.all(np.isfinite(predictions)):
+        warnings.warn("Predictions of the interpolation model are not finite.")
 
     return predictions
 
 
+def _cross_validate_interpolation(
+    endogenous, exogenous, max_value_functions, not_interpolated, predict, n_folds=5
+):
+    """Compute the cross-validated prediction error of the interpolation model.
+
+    The simulated states are split into folds. For each fold, the interpolation model
+    is fitted on the remaining simulated states and predicts the expected value
+    functions of the fold. The error of a dense key is the mean absolute prediction
+    error relative to the mean absolute expected value function of its simulated
+    states. The error of the period is the maximum error over dense keys with
+    interpolated states such that dense keys with few states and a poor fit are not
+    hidden by larger ones.
+
+    Parameters
+    ----------
+    endogenous : dict
+        Maps dense keys to arrays with the endogenous variable of states which are not
+        interpolated.
+    exogenous : dict
+        Maps dense keys to arrays with the exogenous variables of all states.
+    max_value_functions : dict
+        Maps dense keys to arrays with the maximum over all value functions computed
+        with the expected value of shocks.
+    not_interpolated : dict
+        Maps dense keys to arrays with indicators for states which are not
+        interpolated.
+    predict : callable
+        Function which receives the four previous arguments and returns the expected
+        value functions for all dense keys, the fitted values and the timings, see
+        :func:`_predict_with_interpolation_model`.
+    n_folds : int, default 5
+        Number of folds.
+
+    Returns
+    -------
+    error : float
+
+    """
+    simulated = {k: np.flatnonzero(v) for k, v in not_interpolated.items()}
+    folds = {k: np.arange(len(v)) % n_folds for k, v in simulated.items()}
+
+    absolute_errors = {k: [] for k in not_interpolated}
+    expected_value_functions = {k: [] for k in not_interpolated}
+    for fold in range(n_folds):
+        held_out = {k: v == fold for k, v in folds.items()}
+
+        not_interpolated_in_fold = {}
+        for dense_key, indicator in not_interpolated.items():
+            not_interpolated_in_fold[dense_key] = indicator.copy()
+            not_interpolated_in_fold[dense_key][
+                simulated[dense_key][held_out[dense_key]]
+            ] = False
+
+        predictions, _, _ = predict(
+            {k: v[~held_out[k]] for k, v in endogenous.items()},
+            exogenous,
+            max_value_functions,
+            not_interpolated_in_fold,
+        )
+
+        for dense_key, indices in simulated.items():
+            indices = indices[held_out[dense_key]]
+            simulation = (
+                endogenous[dense_key][held_out[dense_key]]
+                + max_value_functions[dense_key][indices]
+            )
+            absolute_errors[dense_key].append(
+                np.abs(predictions[dense_key][indices] - simulation)
+            )
+            expected_value_functions[dense_key].append(np.abs(simulation))
+
+    error = max(
+        (
+            np.concatenate(absolute_errors[k]).mean()
+            / np.concatenate(expected_value_functions[k]).mean()
+            for k, v in not_interpolated.items()
+            if 0 < v.sum() < len(v)
+        ),
+        default=0.0,
+    )
+
+    return error
+
+
+def _get_interpolation_model(interpolation_model):
+    """Create an unfitted interpolation model.
+
+    An interpolation model has a method ``fit(x, y)`` which fits the model to the
+    exogenous variables of the states which are not interpolated and their endogenous
+    variable and returns the model. Its method ``predict(x)`` returns the predicted
+    endogenous variable for all states.
+
+    Parameters
+    ----------
+    interpolation_model : str or callable
+        One of ``"ols"``, ``"ridge"``, ``"polynomial"`` and ``"kernel"`` which select
+        :class:`OLSInterpolator`, :class:`RidgeInterpolator`,
+        :class:`PolynomialInterpolator` and :class:`KernelInterpolator` with their
+        default arguments. A callable like a class or a :func:`functools.partial` of
+        a class with custom arguments must return a new model on every call.
+
+    """
+    if callable(interpolation_model):
+        model = interpolation_model()
+    else:
+        model = INTERPOLATION_MODELS[interpolation_model]()
+
+    return model
+
+
+class OLSInterpolator:
+    """The linear model fitted with ordinary least squares.
+
+    This is the interpolation model proposed by Keane and Wolpin (1994), see
+    :func:`kw_94_interpolation`. After the fit, the estimated condition number of the
+    exogenous variables is stored in ``condition_number``, see
+    :func:`_ols_with_condition_number`.
+
+    """
+
+    def fit(self, x, y):
+        """Estimate the coefficients and warn about an ill-conditioned design.
+
+        Parameters
+        ----------
+        x : numpy.ndarray
+            Array with shape (n_states, n_exogenous) containing the exogenous variables
+            of the states which are not interpolated.
+        y : numpy.ndarray
+            Array with shape (n_states,) containing the endogenous variable.
+
+        Returns
+        -------
+        self : OLSInterpolator
+            The fitted model.
+
+        """
+        self.beta, self.condition_number = _ols_with_condition_number(y, x)
+        if not np.all(np.isfinite(self.beta)):
+            warnings.warn("OLS coefficients in the interpolation are not finite.")
+        if (
+            x.shape[0] >= x.shape[1]
+            and self.condition_number > INTERPOLATION_MAX_CONDITION_NUMBER
+        ):
+            warnings.warn(
+                "The exogenous variables of the interpolation model are "
+                "ill-conditioned. Consider more interpolation points or the penalized "
+                "interpolation model 'ridge'."
+            )
+
+        return self
+
+    def predict(self, x):
+        """Predict the endogenous variable with the linear model.
+
+        Parameters
+        ----------
+        x : numpy.ndarray
+            Array with shape (n_states, n_exogenous) containing the exogenous variables.
+
+        Returns
+        -------
+        numpy.ndarray
+            Array with shape (n_states,) containing the predicted endogenous variable.
+
+        """
+        return x.dot(self.beta)
+
+
+class RidgeInterpolator:
+    """The linear model fitted with ridge regression.
+
+    The penalty shrinks the coefficients of all non-constant variables and stabilizes
+    the fit if there are only a few states without interpolation or the variables are
+    collinear. The penalty of each coefficient is scaled with the sum of squares of its
+    variable such that the penalty does not depend on the scale of the variables.
+
+    Parameters
+    ----------
+    penalty : float, default 1e-2
+        The strength of the penalty.
+
+    """
+
+    def __init__(self, penalty=1e-2):
+        """Initialize the model with the strength of the penalty."""
+        self.penalty = penalty
+
+    def fit(self, x, y):
+        """Estimate the penalized coefficients.
+
+        Parameters
+        ----------
+        x : numpy.ndarray
+            Array with shape (n_states, n_exogenous) containing the exogenous variables
+            of the states which are not interpolated.
+        y : numpy.ndarray
+            Array with shape (n_states,) containing the endogenous variable.
+
+        Returns
+        -------
+        self : RidgeInterpolator
+            The fitted model.
+
+        """
+        xtx = x.T.dot(x)
+        is_constant = np.all(x == x[:1], axis=0)
+        penalties = self.penalty * np.where(is_constant, 0, np.diag(xtx))
+        self.beta = np.linalg.pinv(xtx + np.diag(penalties)).dot(x.T.dot(y))
+
+        return self
+
+    def predict(self, x):
+        """Predict the endogenous variable with the penalized linear model.
+
+        Parameters
+        ----------
+        x : numpy.ndarray
+            Array with shape (n_states, n_exogenous) containing the exogenous variables.
+
+        Returns
+        -------
+        numpy.ndarray
+            Array with shape (n_states,) containing the predicted endogenous variable.
+
+        """
+        return x.dot(self.beta)
+
+
+class PolynomialInterpolator:
+    """The linear model with second-order terms of the differences in value functions.
+
+    The exogenous variables are extended with the squares and the pairwise products of
+    the differences between the maximum of the value functions and the value function
+    of each choice. The model is fitted with ridge regression as the number of variables
+    grows quadratically with the number of choices.
+
+    Quadratic terms extrapolate poorly. Thus, the exogenous variables are clipped to
+    their range in the fitted states before the prediction.
+
+    Parameters
+    ----------
+    penalty : float, default 1e-4
+        The strength of the penalty, see :class:`RidgeInterpolator`.
+
+    """
+
+    def __init__(self, penalty=1e-4):
+        """Initialize the ridge regression of the polynomial features."""
+        self.ridge = RidgeInterpolator(penalty)
+
+    def fit(self, x, y):
+        """Store the range of the variables and fit the polynomial features.
+
+        Parameters
+        ----------
+        x : numpy.ndarray
+            Array with shape (n_states, n_exogenous) containing the exogenous variables
+            of the states which are not interpolated.
+        y : numpy.ndarray
+            Array with shape (n_states,) containing the endogenous variable.
+
+        Returns
+        -------
+        self : PolynomialInterpolator
+            The fitted model.
+
+        """
+        self.lower = x.min(axis=0)
+        self.upper = x.max(axis=0)
+        self.ridge.fit(_create_polynomial_features(x), y)
+
+        return self
+
+    def predict(self, x):
+        """Predict the endogenous variable with variables clipped to their range.
+
+        Parameters
+        ----------
+        x : numpy.ndarray
+            Array with shape (n_states, n_exogenous) containing the exogenous variables.
+
+        Returns
+        -------
+        numpy.ndarray
+            Array with shape (n_states,) containing the predicted endogenous variable.
+
+        """
+        x = np.clip(x, self.lower, self.upper)
+
+        return self.ridge.predict(_create_polynomial_features(x))
+
+
+class KernelInterpolator:
+    """The linear model with a kernel ridge regression of its residuals.
+
+    The linear model of Keane and Wolpin (1994) captures the global shape of the
+    expected value functions. The residuals are fitted with a kernel ridge regression
+    with a Gaussian kernel on the standardized exogenous variables which corrects the
+    prediction in the neighborhood of states without interpolation. Far from these
+    states, the prediction falls back to the linear model.
+
+    Parameters
+    ----------
+    bandwidth : float, default 1
+        The bandwidth of the Gaussian kernel in units of standard deviations.
+    penalty : float, default 1e-2
+        The penalty on the squared norm of the function fitted to the residuals.
+    block_size : int, default 10_000
+        The number of states for which the kernel is evaluated at once which limits the
+        memory usage.
+    max_centers : int, default 2_000
+        The maximum number of states which are used as centers of the kernel. The exact
+        kernel ridge regression requires :math:`O(n^3)` time and :math:`O(n^2)` memory
+        in the number of states. With more states, an evenly spaced subset of the
+        states is used as centers and the coefficients are fitted on all states which
+        is the Nyström approximation of the kernel ridge regression.
+
+    """
+
+    def __init__(self, bandwidth=1, penalty=1e-2, block_size=10_000, max_centers=2_000):
+        """Initialize the model with the parameters of the kernel ridge regression."""
+        self.bandwidth = bandwidth
+        self.penalty = penalty
+        self.block_size = block_size
+        self.max_centers = max_centers
+
+    def fit(self, x, y):
+        """Fit the linear model and the kernel ridge regression of its residuals.
+
+        Parameters
+        ----------
+        x : numpy.ndarray
+            Array with shape (n_states, n_exogenous) containing the exogenous variables
+            of the states which are not interpolated.
+        y : numpy.ndarray
+            Array with shape (n_states,) containing the endogenous variable.
+
+        Returns
+        -------
+        self : KernelInterpolator
+            The fitted model.
+
+        """
+        self.linear = OLSInterpolator().fit(x, y)
+        residuals = y - self.linear.predict(x)
+
+        scale = x.std(axis=0)
+        self.scale = np.where(scale > 0, scale, 1)
+        x_scaled = x / self.scale
+        n_states = len(y)
+
+        if n_states <= self.max_centers:
+            self.x = x_scaled
+            kernel = _gaussian_kernel(self.x, self.x, self.bandwidth)
+            kernel[np.diag_indices(n_states)] += self.penalty
+            self.alpha = linalg.cho_solve(
+                linalg.cho_factor(kernel, lower=True), residuals
+            )
+
+        else:
+            warnings.warn(
+                f"The kernel interpolation is fitted on {n_states} states and uses "
+                f"{self.max_centers} of them as centers. Increase 'max_centers' for an "
+                "exact kernel ridge regression which requires O(n ** 3) time and "
+                "O(n ** 2) memory."
+            )
+            centers = np.linspace(0, n_states - 1, self.max_centers).astype(int)
+            self.x = x_scaled[centers]
+
+            lhs = self.penalty * _gaussian_kernel(self.x, self.x, self.bandwidth)
+            rhs = np.zeros(self.max_centers)
+            for i in range(0, n_states, self.block_size):
+                kernel = _gaussian_kernel(
+                    x_scaled[i : i + self.block_size], self.x, self.bandwidth
+                )
+                lhs += kernel.T.dot(kernel)
+                rhs += kernel.T.dot(residuals[i : i + self.block_size])
+
+            # The jitter keeps the matrix positive definite if centers coincide.
+            lhs[np.diag_indices(self.max_centers)] += 1e-10 * np.trace(lhs)
+            self.alpha = linalg.cho_solve(linalg.cho_factor(lhs, lower=True), rhs)
+
+        return self
+
+    def predict(self, x):
+        """Predict the endogenous variable with the corrected linear model.
+
+        Parameters
+        ----------
+        x : numpy.ndarray
+            Array with shape (n_states, n_exogenous) containing the exogenous variables.
+
+        Returns
+        -------
+        numpy.ndarray
+            Array with shape (n_states,) containing the predicted endogenous variable.
+
+        """
+        x_scaled = x / self.scale
+        corrections = np.concatenate(
+            [
+                _gaussian_kernel(
+                    x_scaled[i : i + self.block_size], self.x, self.bandwidth
+                ).dot(self.alpha)
+                for i in range(0, len(x), self.block_size)
+            ]
+        )
+
+        return self.linear.predict(x) + corrections
+
+
+INTERPOLATION_MODELS = {
+    "ols": OLSInterpolator,
+    "ridge": RidgeInterpolator,
+    "polynomial": PolynomialInterpolator,
+    "kernel": KernelInterpolator,
+}
+"""dict: Maps the names of the built-in interpolation models to their classes."""
+
+
+def _create_polynomial_features(x):
+    """Add the squares and pairwise products of the differences in value functions.
+
+    The first ``n_choices`` columns of ``x`` are the differences, see
+    :func:`_compute_rhs_variables`.
+
+    """
+    n_choices = (x.shape[1] - 1) // 2
+    differences = x[:, :n_choices]
+    rows, columns = np.triu_indices(n_choices)
+
+    return np.column_stack((x, differences[:, rows] * differences[:, columns]))
+
+
+def _gaussian_kernel(x, y, bandwidth):
+    """Compute the Gaussian kernel between the rows of two arrays."""
+    squared_distances = (
+        (x ** 2).sum(axis=1)[:, None] + (y ** 2).sum(axis=1)[None, :] - 2 * x.dot(y.T)
+    )
+
+    return np.exp(-np.clip(squared_distances, 0, None) / (2 * bandwidth ** 2))
+
+
 @nb.njit
 def ols(y, x):
-    """Calculate the coefficients of a linear model with OLS using a pseudo-inverse.
+    """Calculate the coefficients of a linear model with OLS.
 
     Parameters
     ----------
@@ -392,6 +1425,152 @@ def ols(y, x):
         Array with shape (n_independent_variables,) containing the coefficients of the
         linear model.
 
+    See also
+    --------
+    _ols_with_condition_number
+        Computes the coefficients and estimates the condition number.
+
     """
-    beta = np.dot(np.linalg.pinv(x.T.dot(x)), x.T.dot(y))
+    beta, _ = _ols_with_condition_number(y, x)
     return beta
+
+
+@nb.njit
+def _ols_with_condition_number(y, x):
+    r"""Calculate the coefficients of a linear model with OLS and its conditioning.
+
+    The independent variables are scaled such that all columns have unit length. The
+    scaled normal equations :math:`X'X \beta = X'y` are solved with a Cholesky
+    decomposition :math:`X'X = LL'`. :math:`L'` is also the triangular factor of the QR
+    decomposition of :math:`X` and has the same singular values. Thus, the ratio of the
+    largest and smallest singular value of the small triangular factor is the condition
+    number of the scaled independent variables. The ratio of the diagonal elements of
+    the factor is only a lower bound and is not used.
+
+    As the condition number of the normal equations is the squared condition number of
+    the independent variables, the normal equations are only used for well-conditioned
+    problems. Otherwise, the coefficients are computed with a QR decomposition of the
+    independent variables and the condition number is recomputed from the singular
+    values of its triangular factor. If the problem is rank-deficient, e.g., with fewer
+    observations than variables or constant differences in value functions, the
+    minimum-norm solution is computed with a singular value decomposition and the
+    condition number is infinite.
+
+    On the well-conditioned path, only arrays with the size of the normal equations are
+    allocated. The QR decomposition allocates a scaled copy of the independent
+    variables.
+
+    Returns
+    -------
+    beta : numpy.ndarray
+        Array with shape (n_independent_variables,) containing the coefficients of the
+        linear model.
+    condition_number : float
+        The condition number of the scaled independent variables.
+
+    """
+    n_observations, n_variables = x.shape
+    eps = np.finfo(np.float64).eps
+
+    if n_observations == 0:
+        return np.zeros(n_variables), np.inf
+
+    xtx = x.T.dot(x)
+    scale = np.sqrt(np.diag(xtx))
+    scale[scale == 0] = 1
+    xtx_scaled = xtx / np.outer(scale, scale)
+    xty_scaled = x.T.dot(y) / scale
+
+    lower, is_positive_definite = _cholesky(xtx_scaled)
+
+    condition_number = np.inf
+    if n_observations >= n_variables and is_positive_definite:
+        condition_number = _condition_number_of_triangular_factor(lower, n_observations)
+
+    if condition_number <= 1e4:
+        beta = _solve_upper_triangular(
+            lower.T.copy(), _solve_lower_triangular(lower, xty_scaled)
+        )
+    else:
+        x_scaled = x / scale
+        if n_observations >= n_variables:
+            q, r = np.linalg.qr(x_scaled)
+            condition_number = _condition_number_of_triangular_factor(r, n_observations)
+
+        if condition_number < 1 / eps:
+            beta = _solve_upper_triangular(r, q.T.dot(y))
+        else:
+            beta = np.linalg.lstsq(x_scaled, y)[0]
+
+    return beta / scale, condition_number
+
+
+@nb.njit
+def _condition_number_of_triangular_factor(factor, n_observations):
+    """Compute the condition number of the independent variables from a factor.
+
+    The singular values of the triangular factor of the QR or Cholesky decomposition
+    are the singular values of the independent variables. The factor is small and its
+    singular values are cheap to compute. If the smallest singular value is zero up to
+    rounding errors, the condition number is infinite.
+
+    """
+    singular_values = np.linalg.svd(factor, False)[1]
+    largest = singular_values.max()
+    smallest = singular_values.min()
+    eps = np.finfo(np.float64).eps
+
+    if smallest > n_observations * eps * largest:
+        condition_number = largest / smallest
+    else:
+        condition_number = np.inf
+
+    return condition_number
+
+
+@nb.njit
+def _cholesky(a):
+    """Compute the lower triangular Cholesky factor of a symmetric matrix.
+
+    Returns
+    -------
+    lower : numpy.ndarray
+        The lower triangular factor.
+    is_positive_definite : bool
+        Whether the matrix is numerically positive definite. Otherwise, the factor is
+        incomplete.
+
+    """
+    n = a.shape[0]
+    lower = np.zeros_like(a)
+    for j in range(n):
+        pivot = a[j, j] - np.sum(lower[j, :j] ** 2)
+        if pivot <= 0:
+            return lower, False
+        lower[j, j] = np.sqrt(pivot)
+        for i in range(j + 1, n):
+            lower[i, j] = (a[i, j] - np.sum(lower[i, :j] * lower[j, :j])) / lower[j, j]
+
+    return lower, True
+
+
+@nb.njit
+def _solve_lower_triangular(lower, b):
+    """Solve the system :math:`L x = b` by forward substitution."""
+    n = len(b)
+    x = np.empty(n)
+    for i in range(n):
+        x[i] = (b[i] - np.sum(lower[i, :i] * x[:i])) / lower[i, i]
+
+    return x
+
+
+@nb.njit
+def _solve_upper_triangular(upper, b):
+    """Solve the system :math:`U x = b` by back substitution."""
+    n = len(b)
+    x = np.empty(n)
+    for i in range(n - 1, -1, -1):
+        x[i] = (b[i] - np.sum(upper[i, i + 1 :] * x[i + 1 :])) / upper[i, i]
+
+    return x
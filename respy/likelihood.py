@@ -1,17 +1,25 @@
 """Everything related to the estimation with maximum likelihood."""
+import concurrent.futures
+import shutil
+import tempfile
+import threading
 import warnings
+import weakref
 from functools import partial
+from pathlib import Path
 
 import numba as nb
 import numpy as np
 import pandas as pd
+from numba.typed import Dict
 from scipy import special
 
+from respy._numba import guvectorize_serial_and_parallel
 from respy.conditional_draws import create_draws_and_log_prob_wages
 from respy.config import MAX_FLOAT
 from respy.config import MIN_FLOAT
 from respy.parallelization import parallelize_across_dense_dimensions
-from respy.parallelization import split_and_combine_df
+from respy.parallelization import provide_asynchronous_evaluation
 from respy.pre_processing.data_checking import check_estimation_data
 from respy.pre_processing.model_processing import process_params_and_options
 from respy.pre_processing.process_covariates import identify_necessary_covariates
@@ -19,25 +27,32 @@ from respy.shared import aggregate_keane_wolpin_utility
 from respy.shared import compute_covariates
 from respy.shared import convert_labeled_variables_to_codes
 from respy.shared import create_base_draws
-from respy.shared import downcast_to_smallest_dtype
 from respy.shared import generate_column_dtype_dict_for_estimation
 from respy.shared import map_observations_to_states
-from respy.shared import pandas_dot
 from respy.shared import rename_labels_to_internal
 from respy.shared import select_valid_choices
 from respy.shared import subset_cholesky_factor_to_choice_set
 from respy.solve import get_solve_func
+from respy.state_space import Solution
 
 
+@provide_asynchronous_evaluation
 def get_log_like_func(
-    params, options, df, return_scalar=True, return_comparison_plot_data=False
+    params,
+    options,
+    df,
+    return_scalar=True,
+    return_comparison_plot_data=False,
+    n_shards=1,
+    accuracy_schedule=None,
 ):
     """Get the criterion function for maximum likelihood estimation.
 
     Return a version of the likelihood functions in respy where all arguments
     except the parameter vector are fixed with :func:`functools.partial`. Thus the
     function can be directly passed into an optimizer or a function for taking
-    numerical derivatives.
+    numerical derivatives. The function can also be evaluated asynchronously in a pool
+    of workers, see :class:`~respy.parallelization.CriterionFunction`.
 
     Parameters
     ----------
@@ -53,10 +68,21 @@ def get_log_like_func(
     return_comparison_plot_data : bool, default False
         Indicator for whether a :class:`pandas.DataFrame` with various contributions for
         the visualization with estimagic should be returned.
+    n_shards : int, default 1
+        If larger than one, the individuals in the data are partitioned into as many
+        shards. Each shard is held by a long-lived worker process which computes the
+        likelihood contributions of its individuals. The model is solved once per
+        evaluation in the main process and broadcast to the workers via shared memory.
+        Shards require Python 3.8 or newer.
+    accuracy_schedule : :class:`~respy.solve.AccuracySchedule`, default None
+        If given, the number of solution and estimation draws and the number of
+        interpolation points increase in stages during the estimation. The options
+        determine the draws of the final stage. In a pool of workers, each worker
+        follows its own copy of the schedule.
 
     Returns
     -------
-    criterion_function : :func:`log_like`
+    criterion_function : :class:`~respy.parallelization.CriterionFunction`
         Criterion function where all arguments except the parameter vector are set.
 
     Raises
@@ -89,6 +115,14 @@ def get_log_like_func(
     ...     df=data, return_scalar=False
     ... )
     >>> array = log_like_contribs(params)
+
+    Multiple parameter vectors can be evaluated concurrently in a pool of workers.
+
+    >>> with log_like:
+    ...     log_like.start_workers(n_workers=2)
+    ...     future = log_like.submit(params)
+    ...     scalar = future.result()
+
     """
     optim_paras, options = process_params_and_options(params, options)
 
@@ -96,33 +130,51 @@ def get_log_like_func(
 
     check_estimation_data(df, optim_paras)
 
+    if accuracy_schedule is not None:
+        accuracy_schedule.check_options(options)
+
     solve = get_solve_func(params, options)
     state_space = solve.keywords["state_space"]
 
-    df, type_covariates = _process_estimation_data(
-        df, state_space, optim_paras, options
-    )
+    df = _process_estimation_data(df, state_space, optim_paras)
+    observations = _create_observation_arrays(df, state_space, optim_paras, options)
+
+    if options["interpolation_observed_states_weight"] != 1:
+        state_space.set_observed_states(
+            df["dense_key"].to_numpy(), df["core_index"].to_numpy()
+        )
 
     # Replace with decorator.
     base_draws_est = {}
-    for dense_key, indices in df.groupby("dense_key").groups.items():
+    for dense_key, positions in observations["positions"].items():
         n_choices = sum(state_space.dense_key_to_choice_set[dense_key])
         draws = create_base_draws(
-            (len(indices), options["estimation_draws"], n_choices),
+            (len(positions), options["estimation_draws"], n_choices),
             next(options["estimation_seed_startup"]),
             options["monte_carlo_sequence"],
+            options["monte_carlo_antithetic"],
         )
         base_draws_est[dense_key] = draws
 
+    shards = (
+        _LikelihoodShards(
+            params, df, base_draws_est, state_space, optim_paras, options, n_shards
+        )
+        if n_shards >= 2
+        else None
+    )
+
     criterion_function = partial(
         log_like,
         df=df,
+        observations=observations,
         base_draws_est=base_draws_est,
         solve=solve,
-        type_covariates=type_covariates,
         options=options,
         return_scalar=return_scalar,
         return_comparison_plot_data=return_comparison_plot_data,
+        shards=shards,
+        accuracy_schedule=accuracy_schedule,
     )
 
     return criterion_function
@@ -131,12 +183,14 @@ def get_log_like_func(
 def log_like(
     params,
     df,
+    observations,
     base_draws_est,
     solve,
-    type_covariates,
     options,
     return_scalar,
     return_comparison_plot_data,
+    shards=None,
+    accuracy_schedule=None,
 ):
     """Criterion function for the likelihood maximization.
 
@@ -148,22 +202,54 @@ def log_like(
         Parameter Series
     df : pandas.DataFrame
         The DataFrame contains choices, log wages, the indices of the states for the
-        different types.
+        different types. It is only used to create the comparison plot data.
+    observations : dict
+        The arrays of the observations created by :func:`_create_observation_arrays`.
     base_draws_est : numpy.ndarray
         Set of draws to calculate the probability of observed wages.
     solve : :func:`~respy.solve.solve`
         Function which solves the model with new parameters.
     options : dict
         Contains model options.
+    shards : _LikelihoodShards, default None
+        If not None, the contributions are computed by the shards.
+    accuracy_schedule : :class:`~respy.solve.AccuracySchedule`, default None
+        If not None, the model is solved and the likelihood is simulated with the
+        options of the current stage.
 
     """
     optim_paras, options = process_params_and_options(params, options)
 
-    state_space = solve(params)
+    if accuracy_schedule is None:
+        state_space = solve(params)
+    else:
+        options = accuracy_schedule.get_options(options)
+        state_space = solve(params, options=options)
+        base_draws_est = {
+            key: draws[:, : options["estimation_draws"]]
+            for key, draws in base_draws_est.items()
+        }
 
-    contribs, df, log_type_probabilities = _internal_log_like_obs(
-        state_space, df, base_draws_est, type_covariates, optim_paras, options
-    )
+    if shards is None:
+        (
+            contribs,
+            loglike_choice,
+            loglike_wage,
+            log_type_probabilities,
+        ) = _internal_log_like_obs(
+            state_space, observations, base_draws_est, optim_paras, options
+        )
+        if return_comparison_plot_data:
+            df, log_type_probabilities = _add_log_likelihoods_to_data(
+                df, observations, loglike_choice, loglike_wage, log_type_probabilities
+            )
+    else:
+        contribs, df, log_type_probabilities = shards.evaluate(
+            params,
+            state_space,
+            return_comparison_plot_data,
+            options["estimation_draws"],
+        )
 
     # Return mean log likelihood or log likelihood contributions.
     out = contribs.mean() if return_scalar else contribs
@@ -178,7 +264,7 @@ def log_like(
 
 
 def _internal_log_like_obs(
-    state_space, df, base_draws_est, type_covariates, optim_paras, options
+    state_space, observations, base_draws_est, optim_paras, options
 ):
     """Calculate the likelihood contribution of each individual in the sample.
 
@@ -189,19 +275,20 @@ def _internal_log_like_obs(
     After that, the result is multiplied with the type-specific shares which yields the
     contribution to the likelihood for each individual.
 
+    The function operates only on the arrays of the observations which are created once
+    by :func:`_create_observation_arrays`. Continuation values are only gathered for the
+    states of the observations. The accumulation is a segment sum over the combinations
+    of individuals and types.
+
     Parameters
     ----------
     state_space : :class:`~respy.state_space.StateSpace`
         Class of state space.
-    df : pandas.DataFrame
-        The DataFrame contains choices, log wages, the indices of the states for the
-        different types.
+    observations : dict
+        The arrays of the observations created by :func:`_create_observation_arrays`.
     base_draws_est : numpy.ndarray
         Array with shape (n_periods, n_draws, n_choices) containing i.i.d. draws from
         standard normal distributions.
-    type_covariates : pandas.DataFrame or None
-        If the model includes types, this is a :class:`pandas.DataFrame` containing the
-        covariates to compute the type probabilities.
     optim_paras : dict
         Dictionary with quantities that were extracted from the parameter vector.
     options : dict
@@ -212,87 +299,377 @@ def _internal_log_like_obs(
     contribs : numpy.ndarray
         Array with shape (n_individuals,) containing contributions of individuals in the
         empirical data.
-    df : pandas.DataFrame
-        Contains log wages, choices and
+    loglike_choice : numpy.ndarray
+        Array with shape (n_observations,) containing the log likelihood of the choice
+        of each observation.
+    loglike_wage : numpy.ndarray
+        Array with shape (n_observations,) containing the log likelihood of the wage of
+        each observation.
+    log_type_probabilities : numpy.ndarray or None
+        Array with shape (n_individuals, n_types) containing the log type probabilities
+        if the model includes types.
 
     """
-    df = df.copy()
-
     n_types = optim_paras["n_types"]
-
-    wages = state_space.wages
-    nonpecs = state_space.nonpecs
-    continuation_values = {}
-    for period in range(options["n_periods"]):
-        continuation_values = {
-            **continuation_values,
-            **state_space.get_continuation_values(period),
-        }
-
-    df = _compute_wage_and_choice_log_likelihood_contributions(
-        df,
+    n_individuals = observations["n_individuals"]
+
+    (
+        choice_loglikes,
+        wage_loglikes,
+    ) = _compute_wage_and_choice_log_likelihood_contributions(
+        observations["core_indices"],
+        observations["choices"],
+        observations["log_wages"],
+        observations["child_dense_keys"],
+        observations["child_core_indices"],
+        observations["observed_state_indices"],
         base_draws_est,
-        wages,
-        nonpecs,
-        continuation_values,
+        state_space.wages,
+        state_space.nonpecs,
         state_space.dense_key_to_choice_set,
         optim_paras,
         options,
+        bypass={"expected_value_functions": state_space.expected_value_functions},
     )
 
-    # Aggregate choice probabilities and wage densities to log likes per observation.
-    loglikes = (
-        df.groupby(["identifier", "period", "type"])[["loglike_choice", "loglike_wage"]]
-        .first()
-        .unstack("type")
-        if optim_paras["n_types"] >= 2
-        else df[["loglike_choice", "loglike_wage"]]
-    )
-    per_observation_loglikes = loglikes["loglike_choice"] + loglikes["loglike_wage"]
-    per_individual_loglikes = per_observation_loglikes.groupby("identifier").sum()
+    loglike_choice = np.empty(observations["n_observations"])
+    loglike_wage = np.empty(observations["n_observations"])
+    for dense_key, positions in observations["positions"].items():
+        loglike_choice[positions] = choice_loglikes[dense_key]
+        loglike_wage[positions] = wage_loglikes[dense_key]
+
+    # Aggregate choice probabilities and wage densities to log likes per individual and
+    # type. Missing log likelihoods are ignored like in a sum with pandas.
+    per_observation_loglikes = loglike_choice + loglike_wage
+    per_observation_loglikes[np.isnan(per_observation_loglikes)] = 0
+    per_individual_loglikes = np.bincount(
+        observations["segments"],
+        weights=per_observation_loglikes,
+        minlength=n_individuals * n_types,
+    ).reshape(n_individuals, n_types)
 
     if n_types >= 2:
-        # To not alter the attribute in the functools.partial, create a copy.
-        type_covariates = type_covariates.copy()
         # Weight each type-specific individual log likelihood with the type probability.
         log_type_probabilities = _compute_log_type_probabilities(
-            type_covariates, optim_paras, options
+            observations["type_covariates"], optim_paras
         )
         weighted_loglikes = per_individual_loglikes + log_type_probabilities
 
         contribs = special.logsumexp(weighted_loglikes, axis=1)
     else:
-        contribs = per_individual_loglikes.to_numpy().flatten()
+        contribs = per_individual_loglikes[:, 0]
         log_type_probabilities = None
 
     contribs = np.clip(contribs, MIN_FLOAT, MAX_FLOAT)
 
+    return contribs, loglike_choice, loglike_wage, log_type_probabilities
+
+
+class _LikelihoodShards:
+    """Compute likelihood contributions in shards held by long-lived workers.
+
+    The individuals are partitioned into contiguous blocks of identifiers. Each shard
+    is held by a single worker process which receives its part of the processed data,
+    the arrays of its observations and the corresponding draws only once. The worker
+    builds its own state space in a separate cache directory.
+
+    For each evaluation, wages, non-pecuniary rewards and expected value functions of
+    the solution are copied into a block of shared memory with a fixed layout per dense
+    key. The workers read the solution from views on the shared memory and return the
+    likelihood contributions of their individuals which are concatenated in the order
+    of the shards. Since individuals are sorted by identifier, the contributions are
+    equal to the contributions computed by :func:`_internal_log_like_obs`.
+
+    """
+
+    def __init__(
+        self, params, df, base_draws_est, state_space, optim_paras, options, n_shards,
+    ):
+        self.layout = {
+            dense_key: (
+                len(indices),
+                sum(state_space.dense_key_to_choice_set[dense_key]),
+            )
+            for dense_key, indices in sorted(
+                state_space.dense_key_to_core_indices.items()
+            )
+        }
+        n_floats = sum(
+            2 * n_states * n_choices + n_states
+            for n_states, n_choices in self.layout.values()
+        )
+        self.dtype = np.dtype(options["solution_dtype"])
+        shared_memory = _import_shared_memory()
+        self.shared_memory = shared_memory.SharedMemory(
+            create=True, size=self.dtype.itemsize * n_floats
+        )
+        self.cache_directory = Path(tempfile.mkdtemp(prefix="respy-"))
+        self.lock = threading.Lock()
+
+        identifiers = df.index.get_level_values("identifier")
+        position_in_dense_key = df.groupby("dense_key").cumcount().to_numpy()
+
+        self.executors = []
+        for i, shard in enumerate(np.array_split(np.unique(identifiers), n_shards)):
+            is_in_shard = identifiers.isin(shard)
+            df_shard = df.loc[is_in_shard]
+            positions = position_in_dense_key[is_in_shard]
+            base_draws_shard = {
+                int(dense_key): base_draws_est[dense_key][positions[indices]]
+                for dense_key, indices in df_shard.groupby("dense_key").indices.items()
+            }
+            observations_shard = _create_observation_arrays(
+                df_shard, state_space, optim_paras, options
+            )
+            options_shard = {
+                **options,
+                "cache_path": self.cache_directory / f"shard_{i}",
+            }
+
+            executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=1,
+                initializer=_initialize_likelihood_shard,
+                initargs=(
+                    params,
+                    df_shard,
+                    observations_shard,
+                    base_draws_shard,
+                    options_shard,
+                    self.shared_memory.name,
+                    self.layout,
+                ),
+            )
+            self.executors.append(executor)
+
+        weakref.finalize(
+            self,
+            _shutdown_likelihood_shards,
+            self.executors,
+            self.shared_memory,
+            self.cache_directory,
+        )
+
+    def evaluate(self, params, solution, return_data, n_draws):
+        """Evaluate the likelihood contributions of all shards.
+
+        Parameters
+        ----------
+        params : pandas.DataFrame
+            DataFrame containing model parameters.
+        solution : :class:`~respy.state_space.Solution`
+            The solution of the model for the parameters.
+        return_data : bool
+            Indicator for whether the data and log type probabilities are returned
+            which is necessary to create the comparison plot data.
+        n_draws : int
+            Number of estimation draws which are used from the base draws.
+
+        """
+        # The lock prevents that concurrent evaluations overwrite the shared solution.
+        with self.lock:
+            wages, nonpecs, expected_value_functions = _create_views_on_solution(
+                self.shared_memory.buf, self.layout, self.dtype
+            )
+            for dense_key in self.layout:
+                wages[dense_key][:] = solution.wages[dense_key]
+                nonpecs[dense_key][:] = solution.nonpecs[dense_key]
+                expected_value_functions[dense_key][
+                    :
+                ] = solution.expected_value_functions[dense_key]
+            # Release the views such that the shared memory can be closed.
+            del wages, nonpecs, expected_value_functions
+
+            futures = [
+                executor.submit(
+                    _evaluate_likelihood_shard, params, return_data, n_draws
+                )
+                for executor in self.executors
+            ]
+            results = [future.result() for future in futures]
+
+        contribs = np.concatenate([result[0] for result in results])
+        if return_data:
+            df = pd.concat([result[1] for result in results]).sort_index()
+            log_type_probabilities = (
+                None
+                if results[0][2] is None
+                else pd.concat([result[2] for result in results])
+            )
+        else:
+            df = None
+            log_type_probabilities = None
+
+        return contribs, df, log_type_probabilities
+
+
+def _import_shared_memory():
+    """Import :mod:`multiprocessing.shared_memory` which is new in Python 3.8."""
+    try:
+        from multiprocessing import shared_memory
+    except ImportError as e:
+        raise NotImplementedError(
+            "The evaluation of the likelihood in shards requires Python 3.8 or newer. "
+            "Use 'n_shards=1' instead."
+        ) from e
+
+    return shared_memory
+
+
+def _create_views_on_solution(buffer, layout, dtype):
+    """Create views on the solution in shared memory.
+
+    The buffer contains the wages, non-pecuniary rewards and expected value functions
+    with the given data type for each dense key in the order of the layout.
+
+    """
+    array = np.ndarray((len(buffer) // dtype.itemsize,), dtype=dtype, buffer=buffer)
+
+    wages = {}
+    nonpecs = {}
+    expected_value_functions = Dict.empty(
+        key_type=nb.types.int64, value_type=nb.from_dtype(dtype)[:]
+    )
+    position = 0
+    for dense_key, (n_states, n_choices) in layout.items():
+        size = n_states * n_choices
+        wages[dense_key] = array[position : position + size].reshape(n_states, -1)
+        position += size
+        nonpecs[dense_key] = array[position : position + size].reshape(n_states, -1)
+        position += size
+        expected_value_functions[dense_key] = array[position : position + n_states]
+        position += n_states
+
+    return wages, nonpecs, expected_value_functions
+
+
+def _shutdown_likelihood_shards(executors, shared_memory_, cache_directory):
+    """Terminate the workers of the shards and release their resources."""
+    for executor in executors:
+        executor.shutdown()
+    shared_memory_.close()
+    shared_memory_.unlink()
+    shutil.rmtree(cache_directory, ignore_errors=True)
+
+
+_LIKELIHOOD_SHARD = None
+"""The objects of the shard held by a worker process."""
+
+
+def _initialize_likelihood_shard(
+    params, df, observations, base_draws_est, options, shared_memory_name, layout
+):
+    """Build the state space of a shard and attach the solution in shared memory."""
+    global _LIKELIHOOD_SHARD
+
+    solve = get_solve_func(params, options)
+    state_space = solve.keywords["state_space"]
+
+    shared_memory = _import_shared_memory()
+    shared_memory_ = shared_memory.SharedMemory(name=shared_memory_name)
+    wages, nonpecs, expected_value_functions = _create_views_on_solution(
+        shared_memory_.buf, layout, np.dtype(options["solution_dtype"])
+    )
+    solution = Solution(state_space, wages, nonpecs, expected_value_functions)
+
+    _LIKELIHOOD_SHARD = {
+        "solution": solution,
+        "df": df,
+        "observations": observations,
+        "base_draws_est": base_draws_est,
+        "options": options,
+        "shared_memory": shared_memory_,
+    }
+
+
+def _evaluate_likelihood_shard(params, return_data, n_draws):
+    """Compute the likelihood contributions of the shard with the first draws."""
+    optim_paras, options = process_params_and_options(
+        params, _LIKELIHOOD_SHARD["options"]
+    )
+    base_draws_est = {
+        key: draws[:, :n_draws]
+        for key, draws in _LIKELIHOOD_SHARD["base_draws_est"].items()
+    }
+
+    (
+        contribs,
+        loglike_choice,
+        loglike_wage,
+        log_type_probabilities,
+    ) = _internal_log_like_obs(
+        _LIKELIHOOD_SHARD["solution"],
+        _LIKELIHOOD_SHARD["observations"],
+        base_draws_est,
+        optim_paras,
+        options,
+    )
+
+    if return_data:
+        df, log_type_probabilities = _add_log_likelihoods_to_data(
+            _LIKELIHOOD_SHARD["df"],
+            _LIKELIHOOD_SHARD["observations"],
+            loglike_choice,
+            loglike_wage,
+            log_type_probabilities,
+        )
+    else:
+        df = None
+        log_type_probabilities = None
+
     return contribs, df, log_type_probabilities
 
 
-@split_and_combine_df
 @parallelize_across_dense_dimensions
 def _compute_wage_and_choice_log_likelihood_contributions(
-    df,
+    core_indices,
+    choices,
+    log_wages_observed,
+    child_dense_keys,
+    child_core_indices,
+    observed_state_indices,
     base_draws_est,
     wages,
     nonpecs,
-    continuation_values,
     choice_set,
     optim_paras,
     options,
+    expected_value_functions,
 ):
-    """Compute wage and choice log likelihood contributions."""
-    n_wages = len(select_valid_choices(optim_paras["choices_w_wage"], choice_set))
+    """Compute wage and choice log likelihood contributions.
+
+    Parameters
+    ----------
+    core_indices : numpy.ndarray
+        Array with shape (n_observations,) containing the core indices of the states of
+        the observations.
+    choices : numpy.ndarray
+        Array with shape (n_observations,) containing the observed choices as indices of
+        the valid choice set.
+    log_wages_observed : numpy.ndarray
+        Array with shape (n_observations,) containing the observed log wages.
+    child_dense_keys : numpy.ndarray
+        Array with shape (n_observed_states, n_choices) containing the dense keys of the
+        child states of the observed states or -1 in the last period.
+    child_core_indices : numpy.ndarray
+        Array with shape (n_observed_states, n_choices) containing the core indices of
+        the child states of the observed states.
+    observed_state_indices : numpy.ndarray
+        Array with shape (n_observations,) containing the index of the observed state of
+        each observation.
+    expected_value_functions : numba.typed.Dict
+        The expected value functions of all dense keys.
 
-    indices = df["core_index"].to_numpy()
+    Returns
+    -------
+    choice_loglikes : numpy.ndarray
+        Array with shape (n_observations,) containing the log likelihood of the choices.
+    wage_loglikes : numpy.ndarray
+        Array with shape (n_observations,) containing the log likelihood of the wages.
 
-    selected_wages = wages[indices]
-    log_wages_observed = df["log_wage"].to_numpy()
+    """
+    n_wages = len(select_valid_choices(optim_paras["choices_w_wage"], choice_set))
 
-    choices = _map_choice_codes_to_indices_of_valid_choice_set(
-        df["choice"].to_numpy(), choice_set
-    )
+    selected_wages = wages[core_indices]
 
     shocks_cholesky = subset_cholesky_factor_to_choice_set(
         optim_paras["shocks_cholesky"], choice_set
@@ -310,31 +687,54 @@ def _compute_wage_and_choice_log_likelihood_contributions(
     )
 
     n_choices = wages.shape[1]
-    n_observations = df.shape[0]
+    n_observations = core_indices.shape[0]
     draws = draws.reshape(n_observations, -1, n_choices)
 
-    selected_continuation_values = continuation_values[indices]
+    selected_continuation_values = _gather_continuation_values(
+        child_dense_keys, child_core_indices, expected_value_functions
+    )[observed_state_indices]
+
+    if options["monte_carlo_control_variate"]:
+        choice_loglikes = _simulate_log_probability_with_control_variate(
+            selected_wages,
+            nonpecs[core_indices],
+            selected_continuation_values,
+            draws,
+            base_draws_est,
+            optim_paras["beta_delta"],
+            choices,
+            options["estimation_tau"],
+        )
+    else:
+        choice_loglikes = _simulate_log_probability_of_individuals_observed_choice(
+            selected_wages,
+            nonpecs[core_indices],
+            selected_continuation_values,
+            draws,
+            optim_paras["beta_delta"],
+            choices,
+            options["estimation_tau"],
+        )
 
-    choice_loglikes = _simulate_log_probability_of_individuals_observed_choice(
-        selected_wages,
-        nonpecs[indices],
-        selected_continuation_values,
-        draws,
-        optim_paras["beta_delta"],
-        choices,
-        options["estimation_tau"],
-    )
+    choice_loglikes = np.clip(choice_loglikes, MIN_FLOAT, MAX_FLOAT)
+    wage_loglikes = np.clip(wage_loglikes, MIN_FLOAT, MAX_FLOAT)
 
-    df["loglike_choice"] = np.clip(choice_loglikes, MIN_FLOAT, MAX_FLOAT)
-    df["loglike_wage"] = np.clip(wage_loglikes, MIN_FLOAT, MAX_FLOAT)
+    return choice_loglikes, wage_loglikes
 
-    return df
 
+def _compute_log_type_probabilities(type_covariates, optim_paras):
+    """Compute the log type probabilities.
 
-def _compute_log_type_probabilities(df, optim_paras, options):
-    """Compute the log type probabilities."""
-    x_betas = _compute_x_beta_for_type_probabilities(
-        df, optim_paras=optim_paras, options=options
+    For each individual, compute as many vector dot products of type covariates and
+    type coefficients as there are types. The scalars are passed to a log softmax
+    function to compute the log probability for each individual to be some type.
+
+    """
+    x_betas = np.column_stack(
+        [
+            type_covariates[type_] @ optim_paras["type_prob"][type_].to_numpy()
+            for type_ in range(optim_paras["n_types"])
+        ]
     )
 
     log_probabilities = x_betas - special.logsumexp(x_betas, axis=1, keepdims=True)
@@ -343,28 +743,6 @@ def _compute_log_type_probabilities(df, optim_paras, options):
     return log_probabilities
 
 
-@split_and_combine_df
-@parallelize_across_dense_dimensions
-def _compute_x_beta_for_type_probabilities(df, optim_paras, options):
-    """Compute the vector dot product of type covariates and type coefficients.
-
-    For each individual, compute as many vector dot products as there are types. The
-    scalars are later passed to a softmax function to compute the type probabilities.
-    The probability for each individual to be some type.
-
-    """
-    for type_ in range(optim_paras["n_types"]):
-        first_observations = df.copy().assign(type=type_)
-        relevant_covariates = identify_necessary_covariates(
-            optim_paras["type_prob"][type_].index, options["covariates_all"]
-        )
-        first_observations = compute_covariates(first_observations, relevant_covariates)
-
-        df[type_] = pandas_dot(first_observations, optim_paras["type_prob"][type_])
-
-    return df[range(optim_paras["n_types"])]
-
-
 @nb.njit
 def _logsumexp(x):
     """Compute logsumexp of `x`.
@@ -397,11 +775,16 @@ def _logsumexp(x):
     return log_sum_exp
 
 
-@nb.guvectorize(
+def _work_size_of_choice_probabilities(*args):
+    """Compute the work size of the kernel for the simulated choice probabilities."""
+    draws = args[3]
+    return np.size(draws)
+
+
+@guvectorize_serial_and_parallel(
     ["f8[:], f8[:], f8[:], f8[:, :], f8, i8, f8, f8[:]"],
     "(n_choices), (n_choices), (n_choices), (n_draws, n_choices), (), (), () -> ()",
-    nopython=True,
-    target="parallel",
+    work_size=_work_size_of_choice_probabilities,
 )
 def _simulate_log_probability_of_individuals_observed_choice(
     wages,
@@ -478,13 +861,122 @@ def _simulate_log_probability_of_individuals_observed_choice(
     smoothed_log_probability[0] = smoothed_log_prob
 
 
-def _process_estimation_data(df, state_space, optim_paras, options):
-    """Process estimation data.
+@guvectorize_serial_and_parallel(
+    ["f8[:], f8[:], f8[:], f8[:, :], f8[:, :], f8, i8, f8, f8[:]"],
+    "(n_choices), (n_choices), (n_choices), (n_draws, n_choices), "
+    "(n_draws, n_choices), (), (), () -> ()",
+    work_size=_work_size_of_choice_probabilities,
+)
+def _simulate_log_probability_with_control_variate(
+    wages,
+    nonpec,
+    continuation_values,
+    draws,
+    base_draws,
+    delta,
+    choice,
+    tau,
+    smoothed_log_probability,
+):
+    r"""Simulate the probability of observing the agent's choice with a control variate.
+
+    The function is the counterpart of
+    :func:`_simulate_log_probability_of_individuals_observed_choice`. The control
+    variates are the standard normal base draws from which the shocks are created and
+    whose expected values are zero. The simulated probability is
+
+    .. math::
+
+        \hat{P} = \bar{p} - \hat{\beta}^T \bar{x}
+
+    where :math:`\hat{\beta}` are the estimated coefficients of a regression of the
+    smoothed probabilities :math:`p` on the base draws :math:`x`. To avoid
+    underflow, the probabilities are scaled by the largest probability. If the adjusted
+    probability is not positive, the simulated probability without control variate is
+    returned.
+
+    Parameters
+    ----------
+    wages : numpy.ndarray
+        Array with shape (n_choices,).
+    nonpec : numpy.ndarray
+        Array with shape (n_choices,).
+    continuation_values : numpy.ndarray
+        Array with shape (n_choices,)
+    draws : numpy.ndarray
+        Array with shape (n_draws, n_choices)
+    base_draws : numpy.ndarray
+        Array with shape (n_draws, n_choices) containing the standard normal draws from
+        which ``draws`` are created.
+    delta : float
+        Discount rate.
+    choice : int
+        Choice of the agent.
+    tau : float
+        Smoothing parameter for choice probabilities.
+
+    Returns
+    -------
+    smoothed_log_probability : float
+        Simulated Smoothed log probability of choice.
+
+    """
+    n_draws, n_choices = draws.shape
+
+    smoothed_log_probabilities = np.empty(n_draws)
+    smoothed_value_functions = np.empty(n_choices)
+
+    for i in range(n_draws):
 
-    All necessary objects for :func:`_internal_log_like_obs` dependent on the data are
-    produced.
+        for j in range(n_choices):
+            value_function, _ = aggregate_keane_wolpin_utility(
+                wages[j], nonpec[j], continuation_values[j], draws[i, j], delta
+            )
 
-    Some objects have to be repeated for each type which is a desirable format for the
+            smoothed_value_functions[j] = value_function / tau
+
+        smoothed_log_probabilities[i] = smoothed_value_functions[choice] - _logsumexp(
+            smoothed_value_functions
+        )
+
+    smoothed_log_prob = _logsumexp(smoothed_log_probabilities) - np.log(n_draws)
+
+    shift = smoothed_log_probabilities.max()
+    probabilities = np.exp(smoothed_log_probabilities - shift)
+
+    mean_p = probabilities.mean()
+    mean_x = np.zeros(n_choices)
+    for i in range(n_draws):
+        mean_x += base_draws[i]
+    mean_x /= n_draws
+
+    covariances_xx = np.zeros((n_choices, n_choices))
+    covariances_xp = np.zeros((n_choices, 1))
+    for i in range(n_draws):
+        deviation_x = base_draws[i] - mean_x
+        deviation_p = probabilities[i] - mean_p
+        for j in range(n_choices):
+            covariances_xp[j, 0] += deviation_x[j] * deviation_p
+            for k in range(n_choices):
+                covariances_xx[j, k] += deviation_x[j] * deviation_x[k]
+
+    coefficients = np.linalg.lstsq(covariances_xx, covariances_xp)[0]
+
+    adjusted_p = mean_p
+    for j in range(n_choices):
+        adjusted_p -= coefficients[j, 0] * mean_x[j]
+
+    if adjusted_p > 0:
+        smoothed_log_prob = shift + np.log(adjusted_p)
+
+    smoothed_log_probability[0] = smoothed_log_prob
+
+
+def _process_estimation_data(df, state_space, optim_paras):
+    """Process estimation data.
+
+    The data is converted to the internal format and the observations are mapped to
+    states. Observations are repeated for each type which is a desirable format for the
     estimation where every observations is weighted by type probabilities.
 
     Parameters
@@ -493,27 +985,15 @@ def _process_estimation_data(df, state_space, optim_paras, options):
         The DataFrame which contains the data used for estimation. The DataFrame
         contains individual identifiers, periods, experiences, lagged choices, choices
         in current period, the wage and other observed data.
-    indexer : numpy.ndarray
-        Indexer for the core state space.
+    state_space : :class:`~respy.state_space.StateSpace`
+        Class of state space.
     optim_paras : dict
-    options : dict
 
     Returns
     -------
-    choices : numpy.ndarray
-        Array with shape (n_observations, n_types) where information is only repeated
-        over the second axis.
-    idx_indiv_first_obs : numpy.ndarray
-        Array with shape (n_individuals,) containing indices for the first observations
-        of each individual.
-    indices : numpy.ndarray
-        Array with shape (n_observations, n_types) containing indices for states which
-        correspond to observations.
-    log_wages_observed : numpy.ndarray
-        Array with shape (n_observations, n_types) containing clipped log wages.
-    type_covariates : numpy.ndarray
-        Array with shape (n_individuals, n_type_covariates) containing covariates to
-        predict probabilities for each type.
+    df : pandas.DataFrame
+        The processed data with additional columns for the type, the dense key, the core
+        index and the log wage of each observation.
 
     """
     n_types = optim_paras["n_types"]
@@ -534,21 +1014,221 @@ def _process_estimation_data(df, state_space, optim_paras, options):
         df, state_space, optim_paras
     )
 
-    # For the estimation, log wages are needed with shape (n_observations, n_types).
     df["log_wage"] = np.log(np.clip(df.wage.to_numpy(), 1 / MAX_FLOAT, MAX_FLOAT))
     df = df.drop(columns="wage")
 
+    return df
+
+
+def _create_observation_arrays(df, state_space, optim_paras, options):
+    """Create the arrays of the observations which are needed for the likelihood.
+
+    The arrays are created once for the processed data such that the likelihood is
+    computed without copying, grouping or aggregating a :class:`pandas.DataFrame` in
+    each evaluation. Observations are addressed by their position in ``df``.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The processed data created by :func:`_process_estimation_data`.
+    state_space : :class:`~respy.state_space.StateSpace`
+        Class of state space.
+    optim_paras : dict
+    options : dict
+
+    Returns
+    -------
+    observations : dict
+        Dictionary with the following entries.
+
+        - ``"positions"``, ``"core_indices"``, ``"choices"`` and ``"log_wages"`` are
+          dictionaries with the dense keys of the observations as keys. The values are
+          the positions of the observations in ``df``, the core indices of their
+          states, their choices as indices of the valid choice set and their log wages.
+        - ``"child_dense_keys"`` and ``"child_core_indices"`` are dictionaries with
+          the positions of the child states of the unique observed states, see
+          :func:`_collect_child_states_of_observations`. ``"observed_state_indices"``
+          maps each observation to its observed state.
+        - ``"segments"`` is an array with shape (n_observations,) which contains the
+          index of the combination of individual and type of each observation. The
+          index is ``individual * n_types + type`` where individuals are numbered in
+          the order of their identifiers.
+        - ``"type_covariates"`` is a dictionary with an array with shape
+          (n_individuals, n_type_covariates) for each type containing the covariates of
+          the type probabilities or None if the model has no types.
+        - ``"identifiers"`` contains the sorted identifiers of the individuals.
+
+    """
+    n_types = optim_paras["n_types"]
+
+    identifiers, individuals = np.unique(
+        df.index.get_level_values("identifier").to_numpy(), return_inverse=True
+    )
+    types = df["type"].to_numpy() if n_types >= 2 else 0
+
+    core_indices = df["core_index"].to_numpy()
+    choices = df["choice"].to_numpy()
+    log_wages = df["log_wage"].to_numpy()
+
+    # Dense keys must be Python integers to split the dictionaries in
+    # :func:`~respy.parallelization.parallelize_across_dense_dimensions`.
+    positions = {
+        int(dense_key): indices
+        for dense_key, indices in df.groupby("dense_key").indices.items()
+    }
+
     # For the type covariates, we only need the first observation of each individual.
     if n_types >= 2:
-        initial_states = df.query("period == 0").copy()
-        type_covariates = compute_covariates(
+        initial_states = df.query("period == 0 and type == 0").sort_index().copy()
+        initial_states = compute_covariates(
             initial_states, options["covariates_core"], raise_errors=False
         )
-        type_covariates = type_covariates.apply(downcast_to_smallest_dtype)
+        type_covariates = {}
+        for type_ in range(n_types):
+            coefficients = optim_paras["type_prob"][type_]
+            relevant_covariates = identify_necessary_covariates(
+                coefficients.index, options["covariates_all"]
+            )
+            covariates = compute_covariates(
+                initial_states.assign(type=type_), relevant_covariates
+            )
+            type_covariates[type_] = covariates[coefficients.index].to_numpy(
+                dtype="float64"
+            )
     else:
         type_covariates = None
 
-    return df, type_covariates
+    # Observations share states, especially if they are repeated for each type.
+    # Continuation values are gathered once per observed state.
+    observed_states = {}
+    observed_state_indices = {}
+    for key, pos in positions.items():
+        observed_states[key], observed_state_indices[key] = np.unique(
+            core_indices[pos], return_inverse=True
+        )
+    child_dense_keys, child_core_indices = _collect_child_states_of_observations(
+        observed_states, state_space
+    )
+
+    observations = {
+        "positions": positions,
+        "core_indices": {key: core_indices[pos] for key, pos in positions.items()},
+        "child_dense_keys": child_dense_keys,
+        "child_core_indices": child_core_indices,
+        "observed_state_indices": observed_state_indices,
+        "choices": {
+            key: _map_choice_codes_to_indices_of_valid_choice_set(
+                choices[pos], state_space.dense_key_to_choice_set[key]
+            )
+            for key, pos in positions.items()
+        },
+        "log_wages": {key: log_wages[pos] for key, pos in positions.items()},
+        "segments": individuals * n_types + types,
+        "type_covariates": type_covariates,
+        "identifiers": identifiers,
+        "n_individuals": len(identifiers),
+        "n_observations": len(df),
+    }
+
+    return observations
+
+
+def _collect_child_states_of_observations(core_indices, state_space):
+    """Collect the child states of observed states for each choice.
+
+    The continuation values of a state are the expected value functions of its child
+    states. Collecting the positions of the child states once allows to gather the
+    continuation values of the observed states without computing them for the whole
+    state space in each evaluation.
+
+    Parameters
+    ----------
+    core_indices : dict
+        Dictionary with dense keys as keys and arrays with the core indices of the
+        observed states as values.
+    state_space : :class:`~respy.state_space.StateSpace`
+        Class of state space.
+
+    Returns
+    -------
+    child_dense_keys : dict
+        Dictionary with arrays with shape (n_states, n_choices) containing the dense
+        keys of the child states. In the last period, the entries are -1.
+    child_core_indices : dict
+        Dictionary with arrays with shape (n_states, n_choices) containing the core
+        indices of the child states within their dense keys.
+
+    """
+    child_indices = (
+        {} if state_space.child_indices is None else state_space.child_indices
+    )
+
+    child_dense_keys = {}
+    child_core_indices = {}
+    for dense_key, indices in core_indices.items():
+        n_choices = sum(state_space.dense_key_to_choice_set[dense_key])
+
+        if dense_key in child_indices:
+            complex_ = state_space.dense_key_to_complex[dense_key]
+            dense_index = complex_[2] if len(complex_) == 3 else 0
+            children = child_indices[dense_key][indices]
+
+            core_keys, inverse = np.unique(children[..., 0], return_inverse=True)
+            dense_keys = np.array(
+                [
+                    state_space.core_key_and_dense_index_to_dense_key[
+                        (core_key, dense_index)
+                    ]
+                    for core_key in core_keys
+                ],
+                dtype="int64",
+            )
+            child_dense_keys[dense_key] = dense_keys[inverse].reshape(len(indices), -1)
+            child_core_indices[dense_key] = children[..., 1].astype("int64")
+        else:
+            child_dense_keys[dense_key] = np.full((len(indices), n_choices), -1)
+            child_core_indices[dense_key] = np.zeros((len(indices), n_choices), "int64")
+
+    return child_dense_keys, child_core_indices
+
+
+@nb.njit
+def _gather_continuation_values(
+    child_dense_keys, child_core_indices, expected_value_functions
+):
+    """Gather the continuation values of states from their child states."""
+    n_states, n_choices = child_dense_keys.shape
+
+    continuation_values = np.zeros((n_states, n_choices))
+    for i in range(n_states):
+        for j in range(n_choices):
+            dense_key = child_dense_keys[i, j]
+            if dense_key >= 0:
+                continuation_values[i, j] = expected_value_functions[dense_key][
+                    child_core_indices[i, j]
+                ]
+
+    return continuation_values
+
+
+def _add_log_likelihoods_to_data(
+    df, observations, loglike_choice, loglike_wage, log_type_probabilities
+):
+    """Add the log likelihoods to the data to create the comparison plot data."""
+    df = df.assign(loglike_choice=loglike_choice, loglike_wage=loglike_wage)
+
+    if log_type_probabilities is not None:
+        index = pd.MultiIndex.from_arrays(
+            [observations["identifiers"], np.zeros_like(observations["identifiers"])],
+            names=["identifier", "period"],
+        )
+        log_type_probabilities = pd.DataFrame(
+            log_type_probabilities,
+            index=index,
+            columns=range(len(observations["type_covariates"])),
+        )
+
+    return df, log_type_probabilities
 
 
 def _update_optim_paras_with_initial_experience_levels(optim_paras, df):
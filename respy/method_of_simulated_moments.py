@@ -21,9 +21,11 @@ import functools
 import numpy as np
 import pandas as pd
 
+from respy.parallelization import provide_asynchronous_evaluation
 from respy.simulate import get_simulate_func
 
 
+@provide_asynchronous_evaluation
 def get_moment_errors_func(
     params,
     options,
@@ -35,6 +37,7 @@ def get_moment_errors_func(
     return_scalar=True,
     return_simulated_moments=False,
     return_comparison_plot_data=False,
+    accuracy_schedule=None,
 ):
     """Get the moment errors function for MSM estimation.
 
@@ -87,10 +90,18 @@ def get_moment_errors_func(
           numbered according to position.
         - ``kind``: Indicates whether moments are empirical or simulated.
 
+    accuracy_schedule : :class:`~respy.solve.AccuracySchedule`, default None
+        If given, the number of solution draws and the number of interpolation points
+        increase in stages during the estimation. The options determine the draws of
+        the final stage. In a pool of workers, each worker follows its own copy of the
+        schedule.
+
     Returns
     -------
-    moment_errors_func : callable
-         Function where all arguments except the parameter vector are set.
+    moment_errors_func : :class:`~respy.parallelization.CriterionFunction`
+         Function where all arguments except the parameter vector are set. It can also
+         be evaluated asynchronously in a pool of workers, but then all arguments
+         including ``calc_moments`` and ``replace_nans`` must be picklable.
 
     Raises
     ------
@@ -113,6 +124,9 @@ def get_moment_errors_func(
         params=params, options=options, n_simulation_periods=n_simulation_periods
     )
 
+    if accuracy_schedule is not None:
+        accuracy_schedule.check_options(simulate.keywords["options"])
+
     empirical_moments = _harmonize_input(empirical_moments)
     calc_moments = _harmonize_input(calc_moments)
 
@@ -162,6 +176,7 @@ def get_moment_errors_func(
         return_simulated_moments=return_simulated_moments,
         return_comparison_plot_data=return_comparison_plot_data,
         are_empirical_moments_dict=are_empirical_moments_dict,
+        accuracy_schedule=accuracy_schedule,
     )
 
     return moment_errors_func
@@ -178,6 +193,7 @@ def moment_errors(
     return_simulated_moments,
     return_comparison_plot_data,
     are_empirical_moments_dict,
+    accuracy_schedule=None,
 ):
     """Loss function for MSM estimation.
 
@@ -214,6 +230,8 @@ def moment_errors(
     are_empirical_moments_dict : bool
         Indicates whether empirical_moments are originally saved to a dict. Used
         for return of simulated moments in the same form.
+    accuracy_schedule : :class:`~respy.solve.AccuracySchedule`, default None
+        If not None, the model is solved with the options of the current stage.
 
     Returns
     -------
@@ -226,7 +244,12 @@ def moment_errors(
     """
     empirical_moments = copy.deepcopy(empirical_moments)
 
-    df = simulate(params)
+    if accuracy_schedule is None:
+        df = simulate(params)
+    else:
+        solve = simulate.keywords["solve"]
+        options = accuracy_schedule.get_options(solve.keywords["options"])
+        df = simulate(params, solve=functools.partial(solve, options=options))
 
     simulated_moments = {name: func(df.copy()) for name, func in calc_moments.items()}
 
@@ -1,8 +1,16 @@
 """This module contains the code to control parallel execution."""
+import asyncio
+import concurrent.futures
 import functools
+import inspect
+import os
+import shutil
+import tempfile
+from pathlib import Path
 
 import joblib
 import pandas as pd
+import yaml
 
 
 def parallelize_across_dense_dimensions(func=None, *, n_jobs=1):
@@ -83,6 +91,192 @@ def split_and_combine_df(func):
     return wrapper_distribute_and_combine_df
 
 
+def provide_asynchronous_evaluation(factory):
+    """Return criterion functions which can be evaluated in a pool of workers.
+
+    The decorator is applied to functions like
+    :func:`respy.likelihood.get_log_like_func` which return a criterion function
+    created with :func:`functools.partial`. The criterion function is converted to a
+    :class:`CriterionFunction` which remembers the factory and its arguments such that
+    worker processes can build their own copy of the criterion function.
+
+    """
+
+    @functools.wraps(factory)
+    def wrapper_provide_asynchronous_evaluation(*args, **kwargs):
+        partialed = factory(*args, **kwargs)
+
+        criterion_function = CriterionFunction(
+            partialed.func, *partialed.args, **partialed.keywords
+        )
+
+        bound_arguments = inspect.signature(factory).bind(*args, **kwargs)
+        bound_arguments.apply_defaults()
+        criterion_function.factory = wrapper_provide_asynchronous_evaluation
+        criterion_function.factory_arguments = dict(bound_arguments.arguments)
+
+        return criterion_function
+
+    return wrapper_provide_asynchronous_evaluation
+
+
+class CriterionFunction(functools.partial):
+    """A criterion function which can be evaluated asynchronously.
+
+    The class behaves exactly like :func:`functools.partial`. Additionally,
+    :meth:`submit` evaluates the criterion function in a pool of persistent worker
+    processes and returns a :class:`concurrent.futures.Future`. This is useful for
+    optimizers which evaluate multiple parameter vectors at once.
+
+    Each worker builds its own copy of the criterion function with the factory, e.g.,
+    :func:`respy.likelihood.get_log_like_func`, in a separate cache directory and
+    evaluates it once to compile all Numba functions. Thus, evaluations in the pool do
+    not pay for the setup of the state space, the processing of the data or the
+    compilation. All arguments of the factory must be picklable.
+
+    The pool is started with the first submitted evaluation or with
+    :meth:`start_workers`. Call :meth:`shutdown` or use the criterion function as a
+    context manager to terminate the workers.
+
+    Examples
+    --------
+    >>> import respy as rp
+    >>> params, options, data = rp.get_example_model("robinson_crusoe_basic")
+    >>> log_like = rp.get_log_like_func(params=params, options=options, df=data)
+    >>> with log_like:
+    ...     log_like.start_workers(n_workers=2)
+    ...     futures = [log_like.submit(params) for _ in range(2)]
+    ...     results = [future.result() for future in futures]
+
+    """
+
+    factory = None
+    factory_arguments = None
+    _executor = None
+    _cache_directory = None
+
+    def __reduce__(self):
+        """Reduce the criterion function for pickling without the pool of workers."""
+        type_, args, (func, args_, keywords, namespace) = super().__reduce__()
+        namespace = {
+            key: value
+            for key, value in (namespace or {}).items()
+            if key not in ["_executor", "_cache_directory"]
+        }
+
+        return type_, args, (func, args_, keywords, namespace or None)
+
+    def __enter__(self):
+        """Return the criterion function to use it as a context manager."""
+        return self
+
+    def __exit__(self, *exc_info):  # noqa: U100
+        """Terminate the pool of workers when the context is left."""
+        self.shutdown()
+
+    def start_workers(self, n_workers=None):
+        """Start the pool of workers.
+
+        Parameters
+        ----------
+        n_workers : int, default None
+            Number of worker processes. At default, the number of processors is used.
+
+        """
+        if self.factory is None:
+            raise ValueError(
+                "The criterion function does not know its factory. Use "
+                "'provide_asynchronous_evaluation' to create it."
+            )
+
+        if self._executor is None:
+            self._cache_directory = Path(tempfile.mkdtemp(prefix="respy-"))
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=n_workers,
+                initializer=_initialize_worker,
+                initargs=(self.factory, self.factory_arguments, self._cache_directory),
+            )
+
+    def submit(self, params):
+        """Evaluate the criterion function in the pool of workers.
+
+        Parameters
+        ----------
+        params : pandas.DataFrame
+            DataFrame containing model parameters.
+
+        Returns
+        -------
+        future : concurrent.futures.Future
+            The future holds the return value of the criterion function.
+
+        """
+        self.start_workers()
+
+        return self._executor.submit(_evaluate_in_worker, params)
+
+    async def evaluate_async(self, params):
+        """Evaluate the criterion function in the pool of workers with :mod:`asyncio`.
+
+        Parameters
+        ----------
+        params : pandas.DataFrame
+            DataFrame containing model parameters.
+
+        Returns
+        -------
+        out
+            The return value of the criterion function.
+
+        """
+        return await asyncio.wrap_future(self.submit(params))
+
+    def shutdown(self, wait=True):
+        """Terminate the pool of workers and remove their caches.
+
+        Parameters
+        ----------
+        wait : bool, default True
+            Whether to wait until all pending evaluations are finished.
+
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            shutil.rmtree(self._cache_directory, ignore_errors=True)
+            self._executor = None
+            self._cache_directory = None
+
+
+_WORKER_CRITERION_FUNCTION = None
+"""The criterion function of a worker process which is built by the initializer."""
+
+
+def _initialize_worker(factory, factory_arguments, cache_directory):
+    """Build the criterion function in a worker and evaluate it once."""
+    global _WORKER_CRITERION_FUNCTION
+
+    # Each worker needs its own cache as building the state space clears the cache.
+    arguments = factory_arguments.copy()
+    options = arguments["options"]
+    options = (
+        yaml.safe_load(options.read_text())
+        if isinstance(options, Path)
+        else options.copy()
+    )
+    options["cache_path"] = cache_directory / str(os.getpid())
+    arguments["options"] = options
+
+    _WORKER_CRITERION_FUNCTION = factory(**arguments)
+
+    # Compile all Numba functions with one evaluation.
+    _WORKER_CRITERION_FUNCTION(arguments["params"])
+
+
+def _evaluate_in_worker(params):
+    """Evaluate the criterion function of the worker."""
+    return _WORKER_CRITERION_FUNCTION(params)
+
+
 def _infer_dense_keys_from_arguments(args, kwargs):
     """Infer the dense indices from the arguments.
 
@@ -18,10 +18,26 @@ def validate_options(o):
         _is_positive_nonzero_integer(o["interpolation_points"])
         or o["interpolation_points"] == -1
     )
+    assert o["interpolation_model"] in ["ols", "ridge", "polynomial", "kernel"] or (
+        callable(o["interpolation_model"])
+    )
+    assert isinstance(o["interpolation_pooling"], bool)
+    assert o["interpolation_point_selection"] in ["random", "maximin"]
+    assert o["interpolation_tolerance"] is None or (
+        isinstance(o["interpolation_tolerance"], float)
+        and o["interpolation_tolerance"] > 0
+    )
+    assert isinstance(o["interpolation_diagnostics"], bool)
+    assert (
+        isinstance(o["interpolation_observed_states_weight"], (int, float))
+        and o["interpolation_observed_states_weight"] > 0
+    )
     assert _is_positive_nonzero_integer(o["simulation_agents"])
     assert isinstance(o["core_state_space_filters"], list) and all(  # noqa: PT018
         isinstance(filter_, str) for filter_ in o["core_state_space_filters"]
     )
+    assert isinstance(o["core_state_space_pruning"], bool)
+    assert isinstance(o["dense_state_space_pruning"], bool)
     assert isinstance(o["negative_choice_set"], dict) and all(  # noqa: PT018
         isinstance(key, str)
         and isinstance(val, list)
@@ -29,6 +45,15 @@ def validate_options(o):
         for key, val in o["negative_choice_set"].items()
     )
     assert o["monte_carlo_sequence"] in ["random", "halton", "sobol"]
+    assert isinstance(o["monte_carlo_antithetic"], bool)
+    assert isinstance(o["monte_carlo_control_variate"], bool)
+    assert o["solution_integration"] in ["monte_carlo", "gauss_hermite", "sparse_grid"]
+    assert _is_positive_nonzero_integer(o["solution_quadrature_level"])
+    assert isinstance(o["solution_closed_form_emax"], bool)
+    assert o["solution_emax_tolerance"] is None or o["solution_emax_tolerance"] > 0
+    assert _is_positive_nonzero_integer(o["solution_emax_block_size"])
+    assert isinstance(o["solution_deduplicate_states"], bool)
+    assert o["solution_dtype"] in ["float64", "float32"]
 
 
 def validate_params(params, optim_paras):
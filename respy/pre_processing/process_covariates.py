@@ -146,7 +146,7 @@ def identify_necessary_covariates(dependents, definitions):
 
     See also
     --------
-    respy.likelihood._compute_x_beta_for_type_probabilities
+    respy.likelihood._create_observation_arrays
 
     """
     dependents = {dependents} if isinstance(dependents, str) else set(dependents)
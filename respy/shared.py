@@ -4,14 +4,18 @@ This module should only import from other packages or modules of respy which als
 import from respy itself. This is to prevent circular imports.
 
 """
+import itertools
+import math
 import shutil
 
 import chaospy as cp
 import numba as nb
 import numpy as np
 import pandas as pd
+from scipy import special
 
 from respy._numba import array_to_tuple
+from respy._numba import guvectorize_serial_and_parallel
 from respy.config import MAX_LOG_FLOAT
 from respy.config import MIN_LOG_FLOAT
 from respy.parallelization import parallelize_across_dense_dimensions
@@ -55,7 +59,7 @@ def aggregate_keane_wolpin_utility(wage, nonpec, continuation_value, draw, delta
     return alternative_specific_value_function, flow_utility
 
 
-def create_base_draws(shape, seed, monte_carlo_sequence):
+def create_base_draws(shape, seed, monte_carlo_sequence, antithetic=False):
     """Create a set of draws from the standard normal distribution.
 
     The draws are either drawn randomly or from quasi-random low-discrepancy sequences,
@@ -77,6 +81,11 @@ def create_base_draws(shape, seed, monte_carlo_sequence):
     draws are sampled here and transformed to the distribution specified by the
     parameters in :func:`transform_base_draws_with_cholesky_factor`.
 
+    If ``antithetic`` is true, only half of the draws are sampled and every draw is
+    followed by its negative, i.e., its antithetic counterpart, along the second to
+    last axis. The pairs are negatively correlated which reduces the variance of the
+    simulated integrals for the same number of draws (see 9.3.1 in [1]_).
+
     Parameters
     ----------
     shape : tuple(int)
@@ -85,6 +94,8 @@ def create_base_draws(shape, seed, monte_carlo_sequence):
         Seed to control randomness.
     monte_carlo_sequence : {"random", "halton", "sobol"}
         Name of the sequence.
+    antithetic : bool, default False
+        Whether the draws are antithetic pairs.
 
     Returns
     -------
@@ -105,13 +116,21 @@ def create_base_draws(shape, seed, monte_carlo_sequence):
             Verlag New York.*
 
     """
+    if antithetic:
+        n_draws = shape[-2]
+        half_shape = (*shape[:-2], n_draws - n_draws // 2, shape[-1])
+        draws = create_base_draws(half_shape, seed, monte_carlo_sequence)
+        draws = np.stack((draws, -draws), axis=-2).reshape(*shape[:-2], -1, shape[-1])[
+            ..., :n_draws, :
+        ]
+
+        return draws
+
     n_choices = shape[-1]
     n_points = np.prod(shape[:-1])
 
-    np.random.seed(seed)
-
     if monte_carlo_sequence == "random":
-        draws = np.random.standard_normal(shape)
+        draws = np.random.RandomState(seed).standard_normal(shape)
 
     elif monte_carlo_sequence == "halton":
         distribution = cp.MvNormal(loc=np.zeros(n_choices), scale=np.eye(n_choices))
@@ -127,6 +146,117 @@ def create_base_draws(shape, seed, monte_carlo_sequence):
     return draws
 
 
+def create_quadrature_nodes_and_weights(n_dimensions, rule, level):
+    r"""Create nodes and weights to integrate over standard normal variables.
+
+    The nodes replace the base draws in the calculation of the expected value functions.
+    Like draws, they are transformed to the distribution of the shocks with
+    :func:`transform_base_draws_with_cholesky_factor`. The weights sum to one.
+
+    `"gauss_hermite"` is the tensor product of one-dimensional Gauss-Hermite rules with
+    ``level`` nodes per dimension and ``level ** n_dimensions`` nodes in total. It is
+    exact for polynomials up to degree ``2 * level - 1`` in each variable.
+
+    `"sparse_grid"` is the Smolyak sparse grid which combines tensor products of
+    one-dimensional Gauss-Hermite rules with :math:`i` nodes for :math:`i = 1, \dots,
+    level`. It is exact for polynomials up to total degree ``2 * level - 1`` and
+    requires much fewer nodes than the tensor product in higher dimensions (see [1]_).
+    Some weights of the sparse grid are negative.
+
+    The integrand of the expected value functions has kinks where two choices are
+    equally good, so the polynomial exactness does not carry over to it. The solution
+    integrates the shock of the last choice in closed form and uses the rules only for
+    the remaining shocks, see :func:`calculate_weighted_expected_value_functions`. See
+    the guide on numerical integration for a comparison with Monte Carlo integration.
+
+    Parameters
+    ----------
+    n_dimensions : int
+        Number of standard normal variables.
+    rule : {"gauss_hermite", "sparse_grid"}
+        Name of the quadrature rule.
+    level : int
+        Accuracy level of the rule.
+
+    Returns
+    -------
+    nodes : numpy.ndarray
+        Array with shape (n_nodes, n_dimensions).
+    weights : numpy.ndarray
+        Array with shape (n_nodes,).
+
+    References
+    ----------
+    .. [1] Heiss, F. and Winschel, V. (2008). `Likelihood approximation by numerical
+           integration on sparse grids
+           <https://doi.org/10.1016/j.jeconom.2007.12.004>`_. *Journal of
+           Econometrics*, 144(1): 62-80.
+
+    Examples
+    --------
+    >>> nodes, weights = create_quadrature_nodes_and_weights(2, "gauss_hermite", 3)
+    >>> nodes.shape, weights.sum().round(10)
+    ((9, 2), 1.0)
+    >>> nodes, weights = create_quadrature_nodes_and_weights(5, "sparse_grid", 2)
+    >>> nodes.shape, weights.sum().round(10)
+    ((11, 5), 1.0)
+
+    """
+    if n_dimensions == 0:
+        nodes, weights = np.zeros((1, 0)), np.ones(1)
+
+    elif rule == "gauss_hermite":
+        nodes, weights = _create_tensor_product_rule(
+            [_create_gauss_hermite_rule(level)] * n_dimensions
+        )
+
+    elif rule == "sparse_grid":
+        q = level + n_dimensions - 1
+        nodes, weights = [], []
+        for levels in itertools.product(range(1, level + 1), repeat=n_dimensions):
+            sum_levels = sum(levels)
+            if q - n_dimensions + 1 <= sum_levels <= q:
+                coefficient = (-1) ** (q - sum_levels) * special.comb(
+                    n_dimensions - 1, q - sum_levels, exact=True
+                )
+                nodes_, weights_ = _create_tensor_product_rule(
+                    [_create_gauss_hermite_rule(i) for i in levels]
+                )
+                nodes.append(nodes_)
+                weights.append(coefficient * weights_)
+
+        nodes = np.concatenate(nodes)
+        weights = np.concatenate(weights)
+
+    else:
+        raise NotImplementedError
+
+    # Merge duplicate nodes which occur in the sparse grid and remove nodes whose
+    # weights cancel out.
+    nodes, inverse = np.unique(nodes.round(12), axis=0, return_inverse=True)
+    weights = np.bincount(inverse.ravel(), weights=weights)
+    is_relevant = np.abs(weights) > 1e-15
+    nodes, weights = nodes[is_relevant], weights[is_relevant]
+
+    return nodes, weights
+
+
+def _create_gauss_hermite_rule(n_nodes):
+    """Create a Gauss-Hermite rule for the standard normal distribution."""
+    nodes, weights = np.polynomial.hermite_e.hermegauss(n_nodes)
+    return nodes, weights / weights.sum()
+
+
+def _create_tensor_product_rule(rules):
+    """Create the tensor product of one-dimensional quadrature rules."""
+    nodes = np.array(list(itertools.product(*[rule[0] for rule in rules])))
+    weights = np.prod(
+        np.array(list(itertools.product(*[rule[1] for rule in rules]))), axis=1
+    )
+
+    return nodes, weights
+
+
 @parallelize_across_dense_dimensions
 def transform_base_draws_with_cholesky_factor(
     draws, choice_set, shocks_cholesky, optim_paras
@@ -152,7 +282,7 @@ def transform_base_draws_with_cholesky_factor(
 
     """
     shocks_cholesky = subset_cholesky_factor_to_choice_set(shocks_cholesky, choice_set)
-    draws_transformed = draws.dot(shocks_cholesky.T)
+    draws_transformed = draws.dot(shocks_cholesky.T.astype(draws.dtype))
 
     # Check how many wages we have
     n_wages_raw = len(optim_paras["choices_w_wage"])
@@ -165,6 +295,31 @@ def transform_base_draws_with_cholesky_factor(
     return draws_transformed
 
 
+def calculate_expected_draws(choice_set, optim_paras):
+    r"""Calculate the expected value of the transformed draws of a choice set.
+
+    The shocks of choices with wages are log-normally distributed and their expected
+    value is :math:`\exp(\sigma^2 / 2)`. The shocks of all other choices have an
+    expected value of zero.
+
+    Returns
+    -------
+    expected_draws : numpy.ndarray
+        Array with shape (n_choices_in_set,).
+
+    """
+    shocks_cholesky = subset_cholesky_factor_to_choice_set(
+        optim_paras["shocks_cholesky"], choice_set
+    )
+    var = (shocks_cholesky ** 2).sum(axis=1)
+    n_wages = len(select_valid_choices(optim_paras["choices_w_wage"], choice_set))
+
+    expected_draws = np.zeros(len(var))
+    expected_draws[:n_wages] = np.exp(np.clip(var[:n_wages], 0, MAX_LOG_FLOAT) / 2)
+
+    return expected_draws
+
+
 def generate_column_dtype_dict_for_estimation(optim_paras):
     """Generate column labels for data necessary for the estimation."""
     labels = (
@@ -366,11 +521,26 @@ def normalize_probabilities(probabilities):
     return probabilities
 
 
-@nb.guvectorize(
+def _work_size_of_elementwise_kernel(*args):
+    """Compute the work size of a kernel which is applied element-wise."""
+    return max(np.size(arg) for arg in args)
+
+
+def _work_size_of_expected_value_functions(*args):
+    """Compute the work size of the kernel for expected value functions.
+
+    The work size is the number of states times the number of choices times the number
+    of draws.
+
+    """
+    wages, draws = args[0], args[3]
+    return np.size(wages) * np.shape(draws)[-2]
+
+
+@guvectorize_serial_and_parallel(
     ["f8, f8, f8, f8, f8, f8[:], f8[:]"],
     "(), (), (), (), () -> (), ()",
-    nopython=True,
-    target="parallel",
+    work_size=_work_size_of_elementwise_kernel,
 )
 def calculate_value_functions_and_flow_utilities(
     wage, nonpec, continuation_value, draw, delta, value_function, flow_utility
@@ -425,11 +595,13 @@ def create_state_space_columns(optim_paras):
     ) + create_dense_state_space_columns(optim_paras)
 
 
-@nb.guvectorize(
-    ["f8[:], f8[:], f8[:], f8[:, :], f8, f8[:]"],
+@guvectorize_serial_and_parallel(
+    [
+        "f4[:], f4[:], f4[:], f4[:, :], f8, f4[:]",
+        "f8[:], f8[:], f8[:], f8[:, :], f8, f8[:]",
+    ],
     "(n_choices), (n_choices), (n_choices), (n_draws, n_choices), () -> ()",
-    nopython=True,
-    target="parallel",
+    work_size=_work_size_of_expected_value_functions,
 )
 def calculate_expected_value_functions(
     wages, nonpecs, continuation_values, draws, delta, expected_value_functions
@@ -448,6 +620,9 @@ def calculate_expected_value_functions(
     this setting, one wants to approximate the expected maximum utility of the current
     state.
 
+    The function is compiled for single and double precision, see the option
+    ``"solution_dtype"``.
+
     Note that ``wages`` have the same length as ``nonpecs`` despite that wages are only
     available in some choices. Missing choices are filled with ones. In the case of a
     choice with wage and without wage, flow utilities are
@@ -498,6 +673,511 @@ def calculate_expected_value_functions(
     expected_value_functions[0] /= n_draws
 
 
+@guvectorize_serial_and_parallel(
+    [
+        "f4[:], f4[:], f4[:], f4[:, :], f8, f8, i8, f4[:], i8[:]",
+        "f8[:], f8[:], f8[:], f8[:, :], f8, f8, i8, f8[:], i8[:]",
+    ],
+    "(n_choices), (n_choices), (n_choices), (n_draws, n_choices), (), (), () -> (), ()",
+    work_size=_work_size_of_expected_value_functions,
+)
+def calculate_expected_value_functions_adaptively(
+    wages,
+    nonpecs,
+    continuation_values,
+    draws,
+    delta,
+    tolerance,
+    block_size,
+    expected_value_functions,
+    n_draws_used,
+):
+    """Calculate the expected maximum of value functions with adaptive draws.
+
+    The function is the adaptive counterpart of
+    :func:`calculate_expected_value_functions`. The draws are processed in blocks of
+    ``block_size`` draws and the mean and the variance of the block means are updated
+    with Welford's algorithm. The integration stops as soon as the standard error of
+    the mean, computed from the block means, falls below ``tolerance`` or all draws are
+    used. In states where one alternative dominates the others, the maximum utility
+    barely varies and few draws suffice.
+
+    The standard error of single draws assumes independent draws which does not hold
+    for the default Sobol sequence. The block means are closer to independent batches,
+    but the standard error remains a heuristic for quasi-random draws. Consecutive
+    blocks of a low-discrepancy sequence are negatively correlated so that the
+    standard error tends to overstate the error of the mean and the rule stops late
+    rather than early.
+
+    Parameters
+    ----------
+    wages : numpy.ndarray
+        Array with shape (n_choices,) containing wages.
+    nonpecs : numpy.ndarray
+        Array with shape (n_choices,) containing non-pecuniary rewards.
+    continuation_values : numpy.ndarray
+        Array with shape (n_choices,) containing expected maximum utility for each
+        choice in the subsequent period.
+    draws : numpy.ndarray
+        Array with shape (n_draws, n_choices).
+    delta : float
+        The discount factor.
+    tolerance : float
+        The maximum standard error of the expected value function.
+    block_size : int
+        The number of draws in each block. At least two blocks are used before the
+        standard error is checked.
+
+    Returns
+    -------
+    expected_value_functions : float
+        Expected maximum utility of an agent.
+    n_draws_used : int
+        Number of draws used to compute the expected maximum utility.
+
+    """
+    n_draws, n_choices = draws.shape
+
+    mean = 0.0
+    block_sum = 0.0
+    n_blocks = 0
+    block_mean = 0.0
+    sum_of_squared_deviations = 0.0
+    n_draws_used[0] = n_draws
+
+    for i in range(n_draws):
+
+        max_value_functions = 0
+
+        for j in range(n_choices):
+            value_function, _ = aggregate_keane_wolpin_utility(
+                wages[j], nonpecs[j], continuation_values[j], draws[i, j], delta
+            )
+
+            if value_function > max_value_functions:
+                max_value_functions = value_function
+
+        n = i + 1
+        mean += (max_value_functions - mean) / n
+        block_sum += max_value_functions
+
+        if n % block_size == 0:
+            n_blocks += 1
+            deviation = block_sum / block_size - block_mean
+            block_mean += deviation / n_blocks
+            sum_of_squared_deviations += deviation * (
+                block_sum / block_size - block_mean
+            )
+            block_sum = 0.0
+
+            if n_blocks >= 2 and n < n_draws:
+                standard_error = math.sqrt(
+                    sum_of_squared_deviations / (n_blocks - 1) / n_blocks
+                )
+                if standard_error < tolerance:
+                    n_draws_used[0] = n
+                    break
+
+    expected_value_functions[0] = mean
+
+
+@guvectorize_serial_and_parallel(
+    [
+        "f4[:], f4[:], f4[:], f4[:, :], f4[:], f8, f4[:]",
+        "f8[:], f8[:], f8[:], f8[:, :], f8[:], f8, f8[:]",
+    ],
+    "(n_choices), (n_choices), (n_choices), (n_draws, n_choices), (n_choices), () "
+    "-> ()",
+    work_size=_work_size_of_expected_value_functions,
+)
+def calculate_controlled_expected_value_functions(
+    wages,
+    nonpecs,
+    continuation_values,
+    draws,
+    expected_draws,
+    delta,
+    expected_value_functions,
+):
+    r"""Calculate the expected maximum of value functions with a control variate.
+
+    The control variate is the value function of the choice which is optimal at the
+    expected draws. The value function is linear in the draw and, thus, its expected
+    value is known and equal to the value function at the expected draws. It is highly
+    correlated with the maximum of value functions, especially if one choice dominates
+    the others. The estimator is
+
+    .. math::
+
+        \hat{E}[\max_j V_j] = \bar{y} - \hat{\beta} (\bar{x} - E[x])
+
+    where :math:`y` is the maximum of value functions, :math:`x` the control variate
+    and :math:`\hat{\beta}` the estimated coefficient of a regression of :math:`y` on
+    :math:`x` which minimizes the variance of the estimator (see 4.1 in [1]_).
+
+    Parameters
+    ----------
+    wages : numpy.ndarray
+        Array with shape (n_choices,) containing wages.
+    nonpecs : numpy.ndarray
+        Array with shape (n_choices,) containing non-pecuniary rewards.
+    continuation_values : numpy.ndarray
+        Array with shape (n_choices,) containing expected maximum utility for each
+        choice in the subsequent period.
+    draws : numpy.ndarray
+        Array with shape (n_draws, n_choices).
+    expected_draws : numpy.ndarray
+        Array with shape (n_choices,) containing the expected value of the draws, see
+        :func:`calculate_expected_draws`.
+    delta : float
+        The discount factor.
+
+    Returns
+    -------
+    expected_value_functions : float
+        Expected maximum utility of an agent.
+
+    References
+    ----------
+    .. [1] Glasserman, P. (2004). Monte Carlo Methods in Financial Engineering. *New
+           York: Springer Verlag New York.*
+
+    """
+    n_draws, n_choices = draws.shape
+
+    control_choice = 0
+    expected_control = -np.inf
+    for j in range(n_choices):
+        value_function, _ = aggregate_keane_wolpin_utility(
+            wages[j], nonpecs[j], continuation_values[j], expected_draws[j], delta
+        )
+        if value_function > expected_control:
+            expected_control = value_function
+            control_choice = j
+
+    # The sums are centered at the expected value of the control variate to reduce
+    # cancellation in the variance and covariance.
+    sum_y = 0.0
+    sum_x = 0.0
+    sum_xx = 0.0
+    sum_xy = 0.0
+
+    for i in range(n_draws):
+
+        max_value_functions = 0
+        control = 0.0
+
+        for j in range(n_choices):
+            value_function, _ = aggregate_keane_wolpin_utility(
+                wages[j], nonpecs[j], continuation_values[j], draws[i, j], delta
+            )
+
+            if value_function > max_value_functions:
+                max_value_functions = value_function
+
+            if j == control_choice:
+                control = value_function
+
+        y = max_value_functions - expected_control
+        x = control - expected_control
+
+        sum_y += y
+        sum_x += x
+        sum_xx += x * x
+        sum_xy += x * y
+
+    mean_y = sum_y / n_draws
+    mean_x = sum_x / n_draws
+    variance = sum_xx / n_draws - mean_x ** 2
+    covariance = sum_xy / n_draws - mean_x * mean_y
+
+    coefficient = covariance / variance if variance > 0 else 0.0
+
+    expected_value_functions[0] = expected_control + mean_y - coefficient * mean_x
+
+
+@nb.njit
+def _expected_positive_part_of_normal(mean, std):
+    r"""Compute :math:`E[\max(X, 0)]` for :math:`X \sim N(mean, std^2)`."""
+    if std <= 0:
+        out = max(mean, 0)
+    else:
+        d = mean / std
+        cdf = 0.5 * math.erfc(-d / math.sqrt(2))
+        pdf = math.exp(-0.5 * d ** 2) / math.sqrt(2 * math.pi)
+        out = mean * cdf + std * pdf
+
+    return out
+
+
+@nb.njit
+def _expected_positive_part_of_log_normal(mean, std, strike):
+    r"""Compute :math:`E[\max(\exp(X) - K, 0)]` for :math:`X \sim N(mean, std^2)`."""
+    if strike <= 0:
+        out = math.exp(min(mean + std ** 2 / 2, MAX_LOG_FLOAT)) - strike
+    elif std <= 0:
+        out = max(math.exp(min(mean, MAX_LOG_FLOAT)) - strike, 0)
+    else:
+        d_2 = (mean - math.log(strike)) / std
+        cdf_1 = 0.5 * math.erfc(-(d_2 + std) / math.sqrt(2))
+        cdf_2 = 0.5 * math.erfc(-d_2 / math.sqrt(2))
+        out = math.exp(min(mean + std ** 2 / 2, MAX_LOG_FLOAT)) * cdf_1 - strike * cdf_2
+
+    return out
+
+
+def calculate_weighted_expected_value_functions(
+    wages, nonpecs, continuation_values, draws, weights, choice_set, optim_paras
+):
+    r"""Calculate the expected maximum of value functions with weighted nodes.
+
+    The function is the counterpart of :func:`calculate_expected_value_functions` for
+    quadrature rules created with :func:`create_quadrature_nodes_and_weights`. The nodes
+    cover the shocks of all choices but the last one and the last standard normal
+    variable is zero. Conditional on a node, the shock of the last choice is normally or
+    log-normally distributed with the standard deviation :math:`L_{JJ}` and the
+    expected maximum has a closed form like in
+    :func:`calculate_expected_value_functions_of_two_choices`. The conditional
+    expectations are weighted.
+
+    Integrating one dimension in closed form removes one dimension from the quadrature
+    rule and all kinks of the integrand along this dimension.
+
+    Parameters
+    ----------
+    wages : numpy.ndarray
+        Array with shape (n_states, n_choices) containing wages.
+    nonpecs : numpy.ndarray
+        Array with shape (n_states, n_choices) containing non-pecuniary rewards.
+    continuation_values : numpy.ndarray
+        Array with shape (n_states, n_choices) containing expected maximum utility for
+        each choice in the subsequent period.
+    draws : numpy.ndarray
+        Array with shape (n_nodes, n_choices) containing the transformed nodes.
+    weights : numpy.ndarray
+        Array with shape (n_nodes,) containing the weights of the nodes.
+    choice_set : tuple of bool
+        The choice set of the states.
+    optim_paras : dict
+        Parsed model parameters.
+
+    Returns
+    -------
+    expected_value_functions : numpy.ndarray
+        Array with shape (n_states,) containing the expected maximum utilities.
+
+    """
+    shocks_cholesky = subset_cholesky_factor_to_choice_set(
+        optim_paras["shocks_cholesky"], choice_set
+    )
+    n_wages = len(select_valid_choices(optim_paras["choices_w_wage"], choice_set))
+
+    return _calculate_weighted_expected_value_functions(
+        wages,
+        nonpecs,
+        continuation_values,
+        draws,
+        weights,
+        optim_paras["delta"],
+        shocks_cholesky[-1, -1],
+        n_wages,
+    )
+
+
+@guvectorize_serial_and_parallel(
+    [
+        "f4[:], f4[:], f4[:], f4[:, :], f4[:], f8, f8, i8, f4[:]",
+        "f8[:], f8[:], f8[:], f8[:, :], f8[:], f8, f8, i8, f8[:]",
+    ],
+    "(n_choices), (n_choices), (n_choices), (n_draws, n_choices), (n_draws), (), (), "
+    "() -> ()",
+    work_size=_work_size_of_expected_value_functions,
+)
+def _calculate_weighted_expected_value_functions(
+    wages,
+    nonpecs,
+    continuation_values,
+    draws,
+    weights,
+    delta,
+    std_of_last_shock,
+    n_wages,
+    expected_value_functions,
+):
+    """Calculate the expected maximum of value functions with weighted nodes."""
+    n_draws, n_choices = draws.shape
+    last = n_choices - 1
+    wage_last = wages[last]
+    value_last = nonpecs[last] + delta * continuation_values[last]
+
+    expected_value_functions[0] = 0
+
+    for i in range(n_draws):
+
+        max_value_functions = 0
+
+        for j in range(last):
+            value_function, _ = aggregate_keane_wolpin_utility(
+                wages[j], nonpecs[j], continuation_values[j], draws[i, j], delta
+            )
+
+            if value_function > max_value_functions:
+                max_value_functions = value_function
+
+        if last >= n_wages:
+            excess = _expected_positive_part_of_normal(
+                value_last + wage_last * draws[i, last] - max_value_functions,
+                abs(wage_last) * std_of_last_shock,
+            )
+        elif wage_last > 0:
+            location = math.log(draws[i, last]) if draws[i, last] > 0 else MIN_LOG_FLOAT
+            excess = wage_last * _expected_positive_part_of_log_normal(
+                location,
+                std_of_last_shock,
+                (max_value_functions - value_last) / wage_last,
+            )
+        else:
+            excess = max(value_last - max_value_functions, 0)
+
+        expected_value_functions[0] += weights[i] * (max_value_functions + excess)
+
+
+def calculate_expected_value_functions_of_two_choices(
+    wages, nonpecs, continuation_values, shocks_cholesky, n_wages, delta, n_nodes=40
+):
+    r"""Calculate the expected maximum of two value functions without simulation.
+
+    The value function of choice :math:`j` is :math:`a_j + b_j X_j` with :math:`a_j =
+    \text{Non-pecuniary}_j + \delta \text{Continuation Value}_j` and :math:`b_j =
+    \text{Wage}_j`. The shock :math:`X_j` is normally distributed for choices without
+    wages and log-normally distributed for choices with wages. The normal shocks are
+    :math:`\eta = L z` where :math:`L` is the lower-triangular Cholesky factor.
+
+    As in the Monte Carlo integration, the maximum is bounded below by zero, so the
+    function computes :math:`E[\max(0, V_0, V_1)]`. Conditional on :math:`z_1`, the
+    first value function is fixed and the expectation has a closed form which is the
+    expected positive part of a normal variable or the price of a call option on a
+    log-normal variable. The expectation over :math:`z_1` has a kink where :math:`V_0 =
+    0`. It is split at the kink and each part is computed with a Gauss-Legendre
+    quadrature with ``n_nodes`` nodes on the standard normal truncated to
+    :math:`[-8, 8]`.
+
+    Parameters
+    ----------
+    wages : numpy.ndarray
+        Array with shape (n_states, 2) containing wages.
+    nonpecs : numpy.ndarray
+        Array with shape (n_states, 2) containing non-pecuniary rewards.
+    continuation_values : numpy.ndarray
+        Array with shape (n_states, 2) containing continuation values.
+    shocks_cholesky : numpy.ndarray
+        Array with shape (2, 2) containing the Cholesky factor of the shocks of the two
+        choices.
+    n_wages : int
+        Number of choices with wages which are the first choices.
+    delta : float
+        The discount factor.
+    n_nodes : int, default 40
+        Number of nodes of the Gauss-Legendre quadrature on each side of the kink.
+
+    Returns
+    -------
+    expected_value_functions : numpy.ndarray
+        Array with shape (n_states,) containing the expected maximum utilities.
+
+    """
+    nodes, weights = np.polynomial.legendre.leggauss(n_nodes)
+
+    return _calculate_expected_value_functions_of_two_choices(
+        wages,
+        nonpecs,
+        continuation_values,
+        shocks_cholesky,
+        n_wages,
+        nodes,
+        weights,
+        delta,
+    )
+
+
+def _work_size_of_expected_value_functions_of_two_choices(*args):
+    """Compute the work size of the kernel for two choices."""
+    wages, nodes = args[0], args[5]
+    return np.size(wages) * np.size(nodes)
+
+
+@guvectorize_serial_and_parallel(
+    ["f8[:], f8[:], f8[:], f8[:, :], i8, f8[:], f8[:], f8, f8[:]"],
+    "(n_choices), (n_choices), (n_choices), (n_choices, n_choices), (), (n_nodes), "
+    "(n_nodes), () -> ()",
+    work_size=_work_size_of_expected_value_functions_of_two_choices,
+)
+def _calculate_expected_value_functions_of_two_choices(
+    wages,
+    nonpecs,
+    continuation_values,
+    shocks_cholesky,
+    n_wages,
+    nodes,
+    weights,
+    delta,
+    expected_value_functions,
+):
+    """Calculate the expected maximum of two value functions for one state."""
+    a_0 = nonpecs[0] + delta * continuation_values[0]
+    a_1 = nonpecs[1] + delta * continuation_values[1]
+    b_0 = wages[0]
+    b_1 = wages[1]
+    l_00 = shocks_cholesky[0, 0]
+    l_10 = shocks_cholesky[1, 0]
+    l_11 = shocks_cholesky[1, 1]
+
+    # The maximum of zero and the first value function has a kink where the first value
+    # function is zero. The integral is split at the kink.
+    if n_wages == 0 and b_0 * l_00 != 0:
+        kink = -a_0 / (b_0 * l_00)
+    elif n_wages > 0 and b_0 * a_0 < 0 and l_00 > 0:
+        kink = math.log(-a_0 / b_0) / l_00
+    else:
+        kink = 0.0
+    bound = 8.0
+    kink = min(max(kink, -bound), bound)
+
+    expected_value_functions[0] = 0
+    for lower, upper in [(-bound, kink), (kink, bound)]:
+        half_width = (upper - lower) / 2
+        for i in range(nodes.shape[0]):
+            z = lower + half_width * (nodes[i] + 1)
+            weight = (
+                half_width
+                * weights[i]
+                * math.exp(-0.5 * z ** 2)
+                / math.sqrt(2 * math.pi)
+            )
+
+            if n_wages == 0:
+                shock_0 = l_00 * z
+            else:
+                shock_0 = math.exp(min(max(l_00 * z, MIN_LOG_FLOAT), MAX_LOG_FLOAT))
+            location = l_10 * z
+
+            # Like in the Monte Carlo integration, the maximum is bounded below by zero.
+            max_value_functions = max(a_0 + b_0 * shock_0, 0)
+
+            if n_wages < 2:
+                excess = _expected_positive_part_of_normal(
+                    a_1 + b_1 * location - max_value_functions, abs(b_1) * l_11
+                )
+            elif b_1 > 0:
+                excess = b_1 * _expected_positive_part_of_log_normal(
+                    location, l_11, (max_value_functions - a_1) / b_1
+                )
+            else:
+                excess = max(a_1 - max_value_functions, 0)
+
+            expected_value_functions[0] += weight * (max_value_functions + excess)
+
+
 def convert_dictionary_keys_to_dense_indices(dictionary):
     """Convert the keys to tuples containing integers.
 
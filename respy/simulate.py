@@ -31,6 +31,7 @@ def get_simulate_func(
     method="n_step_ahead_with_sampling",
     df=None,
     n_simulation_periods=None,
+    solution=None,
 ):
     """Get the simulation function.
 
@@ -53,6 +54,12 @@ def get_simulate_func(
         Simulate data for a number of periods. This options does not affect
         ``options["n_periods"]`` which controls the number of periods for which decision
         rules are computed.
+    solution : :class:`~respy.state_space.Solution` or None, default None
+        If a solution is passed, e.g., loaded with
+        :meth:`~respy.state_space.Solution.load`, individuals follow its decision rules
+        and the model is neither solved nor is the state space created. Thus, the
+        parameter vector passed to the simulation function must be the one of the
+        solution.
 
     Returns
     -------
@@ -75,7 +82,11 @@ def get_simulate_func(
 
     df = _process_input_df_for_simulation(df, method, options, optim_paras)
 
-    solve = get_solve_func(params, options)
+    solve = (
+        get_solve_func(params, options)
+        if solution is None
+        else functools.partial(_return_solution, solution=solution)
+    )
 
     # We draw shocks for all observations and for all choices although some choices
     # might not be available. Later, only the relevant shocks are selected.
@@ -232,6 +243,11 @@ def simulate(
     return simulated_data
 
 
+def _return_solution(params, solution):  # noqa: U100
+    """Return the solution which is passed to :func:`get_simulate_func`."""
+    return solution
+
+
 def _extend_data_with_sampled_characteristics(df, optim_paras, options):
     """Sample initial observations from initial conditions.
 
@@ -433,10 +449,10 @@ def _sample_characteristic(states_df, options, level_dict, use_keys):
     # Calculate probabilities with the softmax function.
     probabilities = softmax(np.column_stack(z), axis=1)
 
-    np.random.seed(next(options["simulation_seed_iteration"]))
+    random_state = np.random.RandomState(next(options["simulation_seed_iteration"]))
 
     choices = level_dict if use_keys else len(level_dict)
-    characteristic = _random_choice(choices, probabilities)
+    characteristic = _random_choice(choices, probabilities, random_state=random_state)
 
     return characteristic
 
@@ -494,10 +510,11 @@ def _process_simulation_output(data, optim_paras):
     return df
 
 
-def _random_choice(choices, probabilities=None, decimals=5):
+def _random_choice(choices, probabilities=None, decimals=5, random_state=None):
     """Return elements of choices for a two-dimensional array of probabilities.
 
-    It is assumed that probabilities are ordered (n_samples, n_choices).
+    It is assumed that probabilities are ordered (n_samples, n_choices). If no
+    :class:`numpy.random.RandomState` is passed, the global random state is used.
 
     The function is taken from this `StackOverflow post
     <https://stackoverflow.com/questions/40474436>`_ as a workaround for
@@ -546,7 +563,8 @@ def _random_choice(choices, probabilities=None, decimals=5):
     if not (cumulative_distribution[:, -1] == 1).all():
         raise ValueError("Probabilities do not sum to one.")
 
-    u = np.random.rand(cumulative_distribution.shape[0], 1)
+    random_state = np.random if random_state is None else random_state
+    u = random_state.rand(cumulative_distribution.shape[0], 1)
 
     # Note that :func:`np.argmax` returns the first index for multiple maximum values.
     indices = (u < cumulative_distribution).argmax(axis=1)
@@ -1,25 +1,40 @@
 """Everything related to the solution of a structural model."""
 import functools
+import threading
 
 import numpy as np
+import pandas as pd
 
 from respy.interpolate import kw_94_interpolation
 from respy.parallelization import parallelize_across_dense_dimensions
 from respy.pre_processing.model_processing import process_params_and_options
+from respy.shared import calculate_controlled_expected_value_functions
+from respy.shared import calculate_expected_draws
 from respy.shared import calculate_expected_value_functions
+from respy.shared import calculate_expected_value_functions_adaptively
+from respy.shared import calculate_expected_value_functions_of_two_choices
+from respy.shared import calculate_weighted_expected_value_functions
 from respy.shared import load_states
 from respy.shared import pandas_dot
 from respy.shared import select_valid_choices
+from respy.shared import subset_cholesky_factor_to_choice_set
 from respy.shared import transform_base_draws_with_cholesky_factor
 from respy.state_space import create_state_space_class
+from respy.state_space import Solution
 
 
 def get_solve_func(params, options):
     """Get the solve function.
 
-    This function takes a model specification and returns the state space of the model
-    along with components of the solution such as covariates, non-pecuniary rewards,
-    wages, continuation values and expected value functions as attributes of the class.
+    This function takes a model specification and returns a function which solves the
+    model for a parameter vector. The solution contains components such as
+    non-pecuniary rewards, wages, continuation values and expected value functions and
+    gives access to the attributes of the state space.
+
+    The state space is created once and shared by all calls to the function, but it is
+    not modified by solving the model except for the cache of interpolation subsets
+    which do not depend on the parameters and are filled under a lock. Thus, the
+    function can be called concurrently, e.g., from multiple threads.
 
     Parameters
     ----------
@@ -38,7 +53,7 @@ def get_solve_func(params, options):
     >>> import respy as rp
     >>> params, options = rp.get_example_model("robinson_crusoe_basic", with_data=False)
     >>> solve = rp.get_solve_func(params, options)
-    >>> state_space = solve(params)
+    >>> solution = solve(params)
 
     """
     optim_paras, options = process_params_and_options(params, options)
@@ -50,7 +65,23 @@ def get_solve_func(params, options):
 
 
 def solve(params, options, state_space):
-    """Solve the model."""
+    """Solve the model.
+
+    Parameters
+    ----------
+    params : pandas.DataFrame
+        DataFrame containing parameter series.
+    options : dict
+        Dictionary containing model attributes which are not optimized.
+    state_space : :class:`~respy.state_space.StateSpace`
+        State space of the model which is not modified.
+
+    Returns
+    -------
+    solution : :class:`~respy.state_space.Solution`
+        The solution of the model for the given parameters.
+
+    """
     optim_paras, options = process_params_and_options(params, options)
 
     wages, nonpecs = _create_choice_rewards(
@@ -60,12 +91,118 @@ def solve(params, options, state_space):
         options,
     )
 
-    state_space.wages = wages
-    state_space.nonpecs = nonpecs
+    solution = Solution(state_space, wages, nonpecs)
+
+    solution = _solve_with_backward_induction(solution, optim_paras, options)
+
+    return solution
 
-    state_space = _solve_with_backward_induction(state_space, optim_paras, options)
 
-    return state_space
+class AccuracySchedule:
+    """Increase the accuracy of the solution during an estimation in stages.
+
+    Early in an optimization, the accuracy of the expected value functions matters
+    little. The schedule starts with few solution and estimation draws or a small
+    number of interpolation points and switches to the next stage after a number of
+    evaluations or whenever a user callback requests it.
+
+    The draws of all stages are nested. The base draws are created once for the number
+    of draws in the options and each stage uses the first draws. Thus, the state space
+    is shared by all stages and criterion values are comparable within a stage.
+
+    Parameters
+    ----------
+    stages : list of dict
+        Each stage is a dictionary with values for ``"solution_draws"``,
+        ``"estimation_draws"`` and ``"interpolation_points"`` which replace the values
+        in the options. Missing keys fall back to the options. ``"n_evaluations"`` is
+        the number of evaluations after which the next stage starts. The last stage is
+        used for all remaining evaluations.
+    callback : callable, default None
+        A function which receives the index of the current stage and the number of
+        evaluations in this stage and returns ``True`` to start the next stage. If
+        given, it replaces ``"n_evaluations"``.
+
+    Examples
+    --------
+    >>> import respy as rp
+    >>> params, options, data = rp.get_example_model("robinson_crusoe_basic")
+    >>> schedule = rp.AccuracySchedule(
+    ...     [{"solution_draws": 20, "n_evaluations": 10}, {}]
+    ... )
+    >>> log_like = rp.get_log_like_func(
+    ...     params=params, options=options, df=data, accuracy_schedule=schedule
+    ... )
+    >>> scalar = log_like(params)
+    >>> schedule.stage
+    0
+
+    """
+
+    _option_keys = ["solution_draws", "estimation_draws", "interpolation_points"]
+
+    def __init__(self, stages, callback=None):
+        """Validate the stages and start in the first stage."""
+        for stage in stages:
+            unknown_keys = set(stage) - {*self._option_keys, "n_evaluations"}
+            if unknown_keys:
+                raise ValueError(f"Unknown keys in accuracy schedule: {unknown_keys}.")
+        if callback is None and any("n_evaluations" not in s for s in stages[:-1]):
+            raise ValueError(
+                "Each stage except the last needs 'n_evaluations' or a callback."
+            )
+
+        self.stages = stages
+        self.callback = callback
+        self.stage = 0
+        self.n_evaluations = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        """Remove the lock which cannot be pickled."""
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        """Restore the state and create a new lock."""
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def check_options(self, options):
+        """Check that no stage requires more draws than the options provide."""
+        for stage in self.stages:
+            for key in ["solution_draws", "estimation_draws"]:
+                if stage.get(key, options[key]) > options[key]:
+                    raise ValueError(
+                        f"The accuracy schedule requires more {key} than the "
+                        "options. The draws of the stages are nested in the draws of "
+                        "the options."
+                    )
+
+    def next_stage(self):
+        """Start the next stage with the following evaluation."""
+        with self._lock:
+            self._advance()
+
+    def get_options(self, options):
+        """Register an evaluation and return the options of the current stage."""
+        with self._lock:
+            is_last_stage = self.stage == len(self.stages) - 1
+            if not is_last_stage and (
+                self.callback(self.stage, self.n_evaluations)
+                if self.callback is not None
+                else self.n_evaluations >= self.stages[self.stage]["n_evaluations"]
+            ):
+                self._advance()
+            self.n_evaluations += 1
+            stage = self.stages[self.stage]
+
+        return {**options, **{k: stage[k] for k in self._option_keys if k in stage}}
+
+    def _advance(self):
+        self.stage = min(self.stage + 1, len(self.stages) - 1)
+        self.n_evaluations = 0
 
 
 @parallelize_across_dense_dimensions
@@ -78,8 +215,8 @@ def _create_choice_rewards(complex_, choice_set, optim_paras, options):
 
     n_states = states.shape[0]
 
-    wages = np.ones((n_states, n_choices))
-    nonpecs = np.zeros((n_states, n_choices))
+    wages = np.ones((n_states, n_choices), options["solution_dtype"])
+    nonpecs = np.zeros((n_states, n_choices), options["solution_dtype"])
 
     for i, choice in enumerate(choices):
         if f"wage_{choice}" in optim_paras:
@@ -92,19 +229,21 @@ def _create_choice_rewards(complex_, choice_set, optim_paras, options):
     return wages, nonpecs
 
 
-def _solve_with_backward_induction(state_space, optim_paras, options):
+def _solve_with_backward_induction(solution, optim_paras, options):
     """Calculate utilities with backward induction.
 
     The expected value functions in one period are only computed by interpolation if:
 
     1. Interpolation is requested.
     2. If there are more states in the period than interpolation points.
-    3. If there are at least two interpolation points per `dense_index`.
+    3. If there are at least two interpolation points per `dense_index` or, if the
+       interpolation is pooled, per choice set in the period.
 
     Parameters
     ----------
-    state_space : :class:`~respy.state_space.StateSpace`
-        State space of the model which is not solved yet.
+    solution : :class:`~respy.state_space.Solution`
+        Solution of the model which contains wages and non-pecuniary rewards, but no
+        expected value functions yet.
     optim_paras : dict
         Parsed model parameters affected by the optimization.
     options : dict
@@ -112,35 +251,45 @@ def _solve_with_backward_induction(state_space, optim_paras, options):
 
     Returns
     -------
-    state_space : :class:`~respy.state_space.StateSpace`
+    solution : :class:`~respy.state_space.Solution`
 
     """
     n_periods = options["n_periods"]
 
-    draws_emax_risk = transform_base_draws_with_cholesky_factor(
-        state_space.base_draws_sol,
-        state_space.dense_key_to_choice_set,
-        optim_paras["shocks_cholesky"],
-        optim_paras,
+    draws_emax_risk = _transform_base_draws_by_period_and_choice_set(
+        solution, optim_paras, options
     )
 
+    interpolation_diagnostics = []
     for period in reversed(range(n_periods)):
-        dense_indices_in_period = state_space.get_dense_keys_from_period(period)
+        dense_indices_in_period = solution.get_dense_keys_from_period(period)
 
         period_draws_emax_risk = {
             dense_index: draws_emax_risk[dense_index]
             for dense_index in dense_indices_in_period
         }
+        period_weights_emax_risk = (
+            None
+            if solution.base_weights_sol is None
+            else {
+                dense_index: solution.base_weights_sol[dense_index]
+                for dense_index in dense_indices_in_period
+            }
+        )
 
         n_states_in_period = sum(
-            len(state_space.dense_key_to_core_indices[dense_index])
+            len(solution.dense_key_to_core_indices[dense_index])
             for dense_index in dense_indices_in_period
         )
         # See docstring for note on interpolation.
-        any_interpolated = options[
-            "interpolation_points"
-        ] < n_states_in_period and options["interpolation_points"] >= 2 * len(
-            dense_indices_in_period
+        n_interpolation_models = (
+            len({solution.dense_key_to_choice_set[k] for k in dense_indices_in_period})
+            if options["interpolation_pooling"]
+            else len(dense_indices_in_period)
+        )
+        any_interpolated = (
+            options["interpolation_points"] < n_states_in_period
+            and options["interpolation_points"] >= 2 * n_interpolation_models
         )
 
         # Handle myopic individuals.
@@ -148,43 +297,263 @@ def _solve_with_backward_induction(state_space, optim_paras, options):
             period_expected_value_functions = {k: 0 for k in dense_indices_in_period}
 
         elif any_interpolated:
-            period_expected_value_functions = kw_94_interpolation(
-                state_space, period_draws_emax_risk, period, optim_paras, options,
+            (
+                period_expected_value_functions,
+                n_points,
+                error,
+                diagnostics,
+            ) = kw_94_interpolation(
+                solution,
+                period_draws_emax_risk,
+                period_weights_emax_risk,
+                period,
+                optim_paras,
+                options,
             )
+            solution.n_interpolation_points[period] = n_points
+            if error is not None:
+                solution.interpolation_errors[period] = error
+            if diagnostics is not None:
+                interpolation_diagnostics.append(diagnostics)
 
         else:
 
-            wages = state_space.get_attribute_from_period("wages", period)
-            nonpecs = state_space.get_attribute_from_period("nonpecs", period)
-            continuation_values = state_space.get_continuation_values(period)
+            wages = solution.get_attribute_from_period("wages", period)
+            nonpecs = solution.get_attribute_from_period("nonpecs", period)
+            continuation_values = solution.get_continuation_values(period)
 
-            period_expected_value_functions = _full_solution(
-                wages, nonpecs, continuation_values, period_draws_emax_risk, optim_paras
+            choice_sets = solution.get_attribute_from_period(
+                "dense_key_to_choice_set", period
             )
 
-        state_space.set_attribute_from_keys(
+            (
+                period_expected_value_functions,
+                period_n_emax_draws,
+                period_n_unique_states,
+            ) = _full_solution(
+                wages,
+                nonpecs,
+                continuation_values,
+                period_draws_emax_risk,
+                period_weights_emax_risk,
+                choice_sets,
+                optim_paras,
+                options,
+            )
+            solution.n_emax_draws.update(period_n_emax_draws)
+            solution.deduplication_ratios[period] = (
+                sum(period_n_unique_states.values()) / n_states_in_period
+            )
+
+        solution.set_attribute_from_keys(
             "expected_value_functions", period_expected_value_functions
         )
 
-    return state_space
+    if interpolation_diagnostics:
+        solution.interpolation_diagnostics = pd.concat(
+            interpolation_diagnostics
+        ).sort_index()
+
+    return solution
+
+
+def _transform_base_draws_by_period_and_choice_set(state_space, optim_paras, options):
+    """Transform the base draws for the solution once per period and choice set.
+
+    All dense keys with the same period and choice set share the same base draws, see
+    :meth:`~respy.state_space.StateSpace.create_draws`, and the transformation only
+    depends on the choice set. Thus, the draws are transformed only for one dense key
+    per period and choice set and the result is shared by reference with the other
+    dense keys, e.g., of other types and observables.
+
+    For Monte Carlo integration, only the first ``options["solution_draws"]`` draws are
+    used which allows to solve the model with fewer, nested draws, see
+    :class:`AccuracySchedule`.
+
+    Returns
+    -------
+    draws_emax_risk : dict
+        Maps dense keys to arrays with shape ``(n_draws, n_choices)``.
+
+    """
+    period_choice_set_to_dense_key = {}
+    for dense_key, complex_ in state_space.dense_key_to_complex.items():
+        period_choice_set_to_dense_key.setdefault(complex_[:2], dense_key)
+
+    n_draws = (
+        options["solution_draws"]
+        if options["solution_integration"] == "monte_carlo"
+        else None
+    )
+    representative_dense_keys = period_choice_set_to_dense_key.values()
+    transformed_draws = transform_base_draws_with_cholesky_factor(
+        {
+            key: state_space.base_draws_sol[key][:n_draws]
+            for key in representative_dense_keys
+        },
+        state_space.dense_key_to_choice_set,
+        optim_paras["shocks_cholesky"],
+        optim_paras,
+    )
+
+    draws_emax_risk = {
+        dense_key: transformed_draws[period_choice_set_to_dense_key[complex_[:2]]]
+        for dense_key, complex_ in state_space.dense_key_to_complex.items()
+    }
+
+    return draws_emax_risk
 
 
 @parallelize_across_dense_dimensions
 def _full_solution(
-    wages, nonpecs, continuation_values, period_draws_emax_risk, optim_paras
+    wages,
+    nonpecs,
+    continuation_values,
+    period_draws_emax_risk,
+    period_weights_emax_risk,
+    choice_set,
+    optim_paras,
+    options,
 ):
     """Calculate the full solution of the model.
 
     In contrast to approximate solution, the Monte Carlo integration is done for each
-    state and not only a subset of states.
+    state and not only a subset of states. If weights are given, the draws are the nodes
+    of a quadrature rule.
+
+    If requested with ``options["solution_closed_form_emax"]``, the expected value
+    functions of choice sets with two choices are computed without draws, see
+    :func:`~respy.shared.calculate_expected_value_functions_of_two_choices`.
+
+    If ``options["solution_emax_tolerance"]`` is not None, the Monte Carlo integration
+    stops for each state as soon as the standard error falls below the tolerance, see
+    :func:`~respy.shared.calculate_expected_value_functions_adaptively`. Otherwise, if
+    ``options["monte_carlo_control_variate"]`` is true, the Monte Carlo integration uses
+    a control variate, see
+    :func:`~respy.shared.calculate_controlled_expected_value_functions`.
+
+    If ``options["solution_deduplicate_states"]`` is true, the expected value functions
+    are only computed for unique combinations of wages, non-pecuniary rewards and
+    continuation values and copied to all states with the same combination, see
+    :func:`_deduplicate_states`. The option is disabled by default because sorting the
+    rows is pure overhead for models without duplicate states.
+
+    Returns
+    -------
+    expected_value_functions : numpy.ndarray
+        Array with shape (n_states,) containing the expected value functions.
+    n_draws_used : numpy.ndarray
+        Array with shape (n_states,) containing the number of draws or nodes used for
+        each state. It is zero if no draws are used.
+    n_unique_states : int
+        Number of states for which the expected value functions are computed.
 
     """
-    period_expected_value_functions = calculate_expected_value_functions(
-        wages,
-        nonpecs,
-        continuation_values,
-        period_draws_emax_risk,
-        optim_paras["delta"],
-    )
+    if options["solution_deduplicate_states"]:
+        wages, nonpecs, continuation_values, inverse = _deduplicate_states(
+            wages, nonpecs, continuation_values
+        )
+    else:
+        inverse = None
+
+    n_unique_states = wages.shape[0]
+
+    if options["solution_closed_form_emax"] and sum(choice_set) == 2:
+        shocks_cholesky = subset_cholesky_factor_to_choice_set(
+            optim_paras["shocks_cholesky"], choice_set
+        )
+        n_wages = len(select_valid_choices(optim_paras["choices_w_wage"], choice_set))
+        expected_value_functions = calculate_expected_value_functions_of_two_choices(
+            wages,
+            nonpecs,
+            continuation_values,
+            shocks_cholesky,
+            n_wages,
+            optim_paras["delta"],
+        )
+        n_draws_used = np.zeros(n_unique_states, dtype=np.int64)
+
+    elif period_weights_emax_risk is not None:
+        expected_value_functions = calculate_weighted_expected_value_functions(
+            wages,
+            nonpecs,
+            continuation_values,
+            period_draws_emax_risk,
+            period_weights_emax_risk,
+            choice_set,
+            optim_paras,
+        )
+        n_draws_used = np.full(n_unique_states, len(period_weights_emax_risk))
+
+    elif options["solution_emax_tolerance"] is not None:
+        (
+            expected_value_functions,
+            n_draws_used,
+        ) = calculate_expected_value_functions_adaptively(
+            wages,
+            nonpecs,
+            continuation_values,
+            period_draws_emax_risk,
+            optim_paras["delta"],
+            options["solution_emax_tolerance"],
+            options["solution_emax_block_size"],
+        )
+
+    elif options["monte_carlo_control_variate"]:
+        expected_value_functions = calculate_controlled_expected_value_functions(
+            wages,
+            nonpecs,
+            continuation_values,
+            period_draws_emax_risk,
+            calculate_expected_draws(choice_set, optim_paras).astype(wages.dtype),
+            optim_paras["delta"],
+        )
+        n_draws_used = np.full(n_unique_states, len(period_draws_emax_risk))
+
+    else:
+        expected_value_functions = calculate_expected_value_functions(
+            wages,
+            nonpecs,
+            continuation_values,
+            period_draws_emax_risk,
+            optim_paras["delta"],
+        )
+        n_draws_used = np.full(n_unique_states, len(period_draws_emax_risk))
 
-    return period_expected_value_functions
+    if inverse is not None:
+        expected_value_functions = expected_value_functions[inverse]
+        n_draws_used = n_draws_used[inverse]
+
+    return expected_value_functions, n_draws_used, n_unique_states
+
+
+def _deduplicate_states(wages, nonpecs, continuation_values):
+    """Reduce states to unique combinations of rewards and continuation values.
+
+    The expected value function of a state only depends on its wages, non-pecuniary
+    rewards and continuation values. Many states within a dense key differ only in
+    characteristics which do not enter the rewards, e.g., lagged choices or experiences
+    without a corresponding parameter, and share the same expected value function.
+
+    Returns
+    -------
+    wages : numpy.ndarray
+        Array with shape (n_unique_states, n_choices).
+    nonpecs : numpy.ndarray
+        Array with shape (n_unique_states, n_choices).
+    continuation_values : numpy.ndarray
+        Array with shape (n_unique_states, n_choices).
+    inverse : numpy.ndarray
+        Array with shape (n_states,) which maps states to the unique combinations.
+
+    """
+    n_choices = wages.shape[1]
+    inputs = np.hstack((wages, nonpecs, continuation_values))
+    unique_inputs, inverse = np.unique(inputs, axis=0, return_inverse=True)
+
+    return (
+        unique_inputs[:, :n_choices],
+        unique_inputs[:, n_choices : 2 * n_choices],
+        unique_inputs[:, 2 * n_choices :],
+        inverse.reshape(-1),
+    )
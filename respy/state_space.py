@@ -1,23 +1,30 @@
 """Everything related to the state space of a structural model."""
 import itertools
+import pickle
+import shutil
+from pathlib import Path
 
 import numba as nb
 import numpy as np
 import pandas as pd
 from numba.typed import Dict
 
+from respy._numba import array_to_tuple
 from respy._numba import sum_over_numba_boolean_unituple
+from respy.config import MIN_LOG_FLOAT
 from respy.parallelization import parallelize_across_dense_dimensions
 from respy.shared import apply_law_of_motion_for_core
 from respy.shared import compute_covariates
 from respy.shared import convert_dictionary_keys_to_dense_indices
 from respy.shared import create_base_draws
+from respy.shared import create_quadrature_nodes_and_weights
 from respy.shared import create_core_state_space_columns
 from respy.shared import create_dense_state_space_columns
 from respy.shared import downcast_to_smallest_dtype
 from respy.shared import dump_states
 from respy.shared import load_states
 from respy.shared import map_states_to_core_key_and_core_index
+from respy.shared import pandas_dot
 from respy.shared import prepare_cache_directory
 from respy.shared import return_core_dense_key
 
@@ -27,9 +34,13 @@ def create_state_space_class(optim_paras, options):
     prepare_cache_directory(options)
     core = _create_core_state_space(optim_paras, options)
     dense_grid = _create_dense_state_space_grid(optim_paras)
+    if dense_grid and options["dense_state_space_pruning"]:
+        dense_grid = _prune_dense_state_space_grid(dense_grid, optim_paras, options)
 
     # Downcast after calculations or be aware of silent integer overflows.
     core = compute_covariates(core, options["covariates_core"])
+    if options["core_state_space_pruning"]:
+        core = _prune_unreachable_core_states(core, optim_paras, options)
     core = core.apply(downcast_to_smallest_dtype)
     dense = _create_dense_state_space_covariates(dense_grid, optim_paras, options)
 
@@ -72,6 +83,15 @@ class StateSpace:
         experiences, lagged choices and periods.
     dense_key_to_core_indices : Dict[int, Array[int]]
         A mapping from dense keys to ``.loc`` locations in the ``core``.
+    not_interpolated_indicators : dict
+        A cache for the states which are simulated instead of interpolated. It is filled
+        during the first solution with interpolation and reused afterwards as the
+        states do not depend on the parameters. The cache is filled under a lock with
+        seeds derived per period and dense key, so that concurrent solutions sharing the
+        state space use the same states.
+    observed_states : dict or None
+        Maps dense keys to indicators for states which are visited by individuals in the
+        data or are their child states, see :meth:`set_observed_states`.
 
     """
 
@@ -109,8 +129,8 @@ class StateSpace:
             Maps core_keys into core_indices.
 
         """
-        self.core = core
-        self.indexer = indexer
+        self._core = core
+        self._indexer = indexer
         self.dense_period_cores = dense_period_cores
         self.dense = dense
         self.core_key_to_complex = core_key_to_complex
@@ -120,8 +140,9 @@ class StateSpace:
         self.n_periods = options["n_periods"]
         self._create_conversion_dictionaries()
         self.child_indices = self.collect_child_indices()
-        self.base_draws_sol = self.create_draws(options)
-        self.create_arrays_for_expected_value_functions()
+        self.base_draws_sol, self.base_weights_sol = self.create_draws(options)
+        self.not_interpolated_indicators = {}
+        self.observed_states = None
 
     def _create_conversion_dictionaries(self):
         """Create mappings between state space location indices and properties.
@@ -180,63 +201,14 @@ class StateSpace:
 
     def create_arrays_for_expected_value_functions(self):
         """Create a container for expected value functions."""
-        self.expected_value_functions = Dict.empty(
-            key_type=nb.types.int64, value_type=nb.types.float64[:]
+        dtype = np.dtype(self.options["solution_dtype"])
+        expected_value_functions = Dict.empty(
+            key_type=nb.types.int64, value_type=nb.from_dtype(dtype)[:]
         )
         for index, indices in self.dense_key_to_core_indices.items():
-            self.expected_value_functions[index] = np.zeros(len(indices))
+            expected_value_functions[index] = np.zeros(len(indices), dtype)
 
-    def get_continuation_values(self, period):
-        """Get continuation values.
-
-        The function takes the expected value functions from the previous periods and
-        then uses the indices of child states to put these expected value functions in
-        the correct format. If period is equal to self.n_periods - 1 the function
-        returns arrays of zeros since we are in terminal states. Otherwise we retrieve
-        expected value functions for next period and call
-        :func:`_get_continuation_values` to assign continuation values to all choices
-        within a period. (The object `subset_expected_value_functions` is required
-        because we need a Numba typed dict but the function
-        :meth:`StateSpace.get_attribute_from_period` just returns a normal dict)
-
-        Returns
-        -------
-        continuation_values : numba.typed.Dict
-            The continuation values for each dense key in a :class:`numpy.ndarray`.
-
-        See also
-        --------
-        _get_continuation_values
-            A more theoretical explanation can be found here: See :ref:`get continuation
-            values <get_continuation_values>`.
-
-        """
-        if period == self.n_periods - 1:
-            shapes = self.get_attribute_from_period("base_draws_sol", period)
-            states = self.get_attribute_from_period("dense_key_to_core_indices", period)
-            continuation_values = {
-                key: np.zeros((states[key].shape[0], shapes[key].shape[1]))
-                for key in shapes
-            }
-        else:
-            child_indices = self.get_attribute_from_period("child_indices", period)
-            expected_value_functions = self.get_attribute_from_period(
-                "expected_value_functions", period + 1
-            )
-            subset_expected_value_functions = Dict.empty(
-                key_type=nb.types.int64, value_type=nb.types.float64[:]
-            )
-            for key, value in expected_value_functions.items():
-                subset_expected_value_functions[key] = value
-
-            continuation_values = _get_continuation_values(
-                self.get_attribute_from_period("dense_key_to_core_indices", period),
-                self.get_attribute_from_period("dense_key_to_complex", period),
-                child_indices,
-                self.core_key_and_dense_index_to_dense_key,
-                bypass={"expected_value_functions": subset_expected_value_functions},
-            )
-        return continuation_values
+        return expected_value_functions
 
     def collect_child_indices(self):
         """Collect for each state the indices of its child states.
@@ -275,26 +247,97 @@ class StateSpace:
 
         return child_indices
 
+    def set_observed_states(self, dense_keys, core_indices):
+        """Mark the states which are visited by individuals in the data.
+
+        The likelihood of an observed choice depends on the expected value functions of
+        the child states. Thus, the observed states and their child states are marked.
+        With interpolation, these states are simulated with a higher probability, see
+        :func:`respy.interpolate._get_not_interpolated_indicator`.
+
+        Parameters
+        ----------
+        dense_keys : numpy.ndarray
+            Array with shape (n_observations,) containing the dense keys of the states,
+            see :func:`respy.shared.map_observations_to_states`.
+        core_indices : numpy.ndarray
+            Array with shape (n_observations,) containing the positions of the states
+            within their dense keys.
+
+        """
+        observed_states = {
+            dense_key: np.zeros(len(indices), dtype="bool")
+            for dense_key, indices in self.dense_key_to_core_indices.items()
+        }
+        for dense_key in np.unique(dense_keys):
+            observed_states[dense_key][core_indices[dense_keys == dense_key]] = True
+
+        child_indices = {} if self.child_indices is None else self.child_indices
+        for dense_key in np.unique(dense_keys):
+            if dense_key not in child_indices:
+                continue
+
+            complex_ = self.dense_key_to_complex[dense_key]
+            dense_index = complex_[2] if len(complex_) == 3 else 0
+            states = np.unique(core_indices[dense_keys == dense_key])
+            children = child_indices[dense_key][states].reshape(-1, 2)
+            for core_key, core_index in np.unique(children, axis=0):
+                child_dense_key = self.core_key_and_dense_index_to_dense_key[
+                    (core_key, dense_index)
+                ]
+                observed_states[child_dense_key][core_index] = True
+
+        self.observed_states = observed_states
+        self.not_interpolated_indicators = {}
+
     def create_draws(self, options):
-        """Get draws."""
+        """Get draws and weights for the calculation of expected value functions.
+
+        For Monte Carlo integration, the weights are ``None`` as all draws receive the
+        same weight. For quadrature rules, the nodes are returned as draws and are the
+        same in every period. The nodes cover all choices but the last one whose
+        standard normal variable is zero as the last shock is integrated in closed form
+        by :func:`~respy.shared.calculate_weighted_expected_value_functions`.
+
+        """
         n_choices_in_sets = list(set(map(sum, self.dense_key_to_choice_set.values())))
         shocks_sets = []
+        weights_sets = []
 
         for n_choices in n_choices_in_sets:
-            draws = create_base_draws(
-                (options["n_periods"], options["solution_draws"], n_choices),
-                next(options["solution_seed_startup"]),
-                options["monte_carlo_sequence"],
-            )
+            if options["solution_integration"] == "monte_carlo":
+                draws = create_base_draws(
+                    (options["n_periods"], options["solution_draws"], n_choices),
+                    next(options["solution_seed_startup"]),
+                    options["monte_carlo_sequence"],
+                    options["monte_carlo_antithetic"],
+                ).astype(options["solution_dtype"])
+                weights = None
+            else:
+                nodes, weights = create_quadrature_nodes_and_weights(
+                    n_choices - 1,
+                    options["solution_integration"],
+                    options["solution_quadrature_level"],
+                )
+                nodes = np.column_stack((nodes, np.zeros(len(nodes))))
+                nodes = nodes.astype(options["solution_dtype"])
+                weights = weights.astype(options["solution_dtype"])
+                draws = np.broadcast_to(nodes, (options["n_periods"], *nodes.shape))
             shocks_sets.append(draws)
+            weights_sets.append(weights)
         draws = {}
+        weights = {}
         for dense_idx, complex_ix in self.dense_key_to_complex.items():
             period = complex_ix[0]
             n_choices = sum(complex_ix[1])
             idx = n_choices_in_sets.index(n_choices)
             draws[dense_idx] = shocks_sets[idx][period]
+            weights[dense_idx] = weights_sets[idx]
 
-        return draws
+        if options["solution_integration"] == "monte_carlo":
+            weights = None
+
+        return draws, weights
 
     def get_dense_keys_from_period(self, period):
         """Get dense indices from one period."""
@@ -322,6 +365,336 @@ class StateSpace:
             if dense_index in dense_indices_in_period
         }
 
+    # The following attributes are set in :meth:`__init__`. For state spaces created
+    # with :meth:`load`, they are created on first access.
+
+    @property
+    def core(self):
+        """pandas.DataFrame: The core state space with one state per row."""
+        if self._core is None:
+            self._core = pd.read_parquet(self._path / "core.parquet")
+        return self._core
+
+    @property
+    def indexer(self):
+        """numba.typed.Dict: Maps core states to their core keys and core indices."""
+        if self._indexer is None:
+            self._indexer = _create_indexer(
+                self.core, self.core_key_to_core_indices, self.optim_paras
+            )
+        return self._indexer
+
+    def save(self, path):
+        """Save the state space to a directory.
+
+        The arrays of the state space are written to uncompressed ``.npy`` files which
+        are memory-mapped when the state space is loaded. The indexer is not saved as
+        Numba's typed dictionaries cannot be memory-mapped. The states of the cache
+        directory are copied such that a loaded state space can also be used to solve
+        the model.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            Path to the directory. The directory is created if it does not exist.
+
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+
+        # The iterators of seeds cannot be saved and are not needed after the state
+        # space is created.
+        options = {
+            key: value
+            for key, value in self.options.items()
+            if not isinstance(value, itertools.count)
+        }
+        metadata = {
+            "dense": self.dense,
+            "dense_period_cores": self.dense_period_cores,
+            "core_key_to_complex": self.core_key_to_complex,
+            "optim_paras": self.optim_paras,
+            "options": options,
+        }
+        with open(path / "state_space.pickle", "wb") as file:
+            pickle.dump(metadata, file)
+
+        self.core.to_parquet(path / "core.parquet")
+        _save_dictionary_of_arrays(
+            path, "core_key_to_core_indices", self.core_key_to_core_indices
+        )
+        _save_dictionary_of_arrays(path, "child_indices", self.child_indices)
+        _save_dictionary_of_arrays(path, "base_draws_sol", self.base_draws_sol)
+        _save_dictionary_of_arrays(path, "base_weights_sol", self.base_weights_sol)
+
+        # Copy the states into a fresh directory unless the state space was loaded from
+        # the same directory.
+        cache_path = path / "cache"
+        if cache_path.resolve() != Path(self.options["cache_path"]).resolve():
+            shutil.rmtree(cache_path, ignore_errors=True)
+            shutil.copytree(self.options["cache_path"], cache_path)
+
+    @classmethod
+    def load(cls, path):
+        """Load a state space from a directory created with :meth:`save`.
+
+        The core state space and the indexer are only needed to map states to their
+        positions in the state space. Thus, they are created on first access which
+        makes loading fast.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            Path to the directory.
+
+        Returns
+        -------
+        state_space : StateSpace
+
+        """
+        path = Path(path)
+        with open(path / "state_space.pickle", "rb") as file:
+            metadata = pickle.load(file)
+
+        state_space = cls.__new__(cls)
+        state_space._path = path
+        state_space._core = None
+        state_space._indexer = None
+        state_space.dense = metadata["dense"]
+        state_space.dense_period_cores = metadata["dense_period_cores"]
+        state_space.core_key_to_complex = metadata["core_key_to_complex"]
+        state_space.core_key_to_core_indices = _load_dictionary_of_arrays(
+            path, "core_key_to_core_indices"
+        )
+        state_space.optim_paras = metadata["optim_paras"]
+        state_space.options = {**metadata["options"], "cache_path": path / "cache"}
+        state_space.n_periods = state_space.options["n_periods"]
+        state_space._create_conversion_dictionaries()
+        state_space.child_indices = _load_dictionary_of_arrays(path, "child_indices")
+        state_space.base_draws_sol = _load_dictionary_of_arrays(path, "base_draws_sol")
+        state_space.base_weights_sol = _load_dictionary_of_arrays(
+            path, "base_weights_sol"
+        )
+        state_space.not_interpolated_indicators = {}
+        state_space.observed_states = None
+
+        return state_space
+
+
+class Solution:
+    """The solution of a structural model for one parameter vector.
+
+    The :class:`StateSpace` only contains structural information which does not change
+    with the parameters. All parameter-dependent objects like wages, non-pecuniary
+    rewards and expected value functions are stored in the solution. Thus, solving the
+    model has no side-effects on the state space and multiple parameter vectors can be
+    solved concurrently, e.g., in a thread pool, with one shared state space.
+
+    Attributes which are not found in the solution are looked up in the state space.
+
+    Attributes
+    ----------
+    state_space : StateSpace
+        The state space which is shared by all solutions.
+    wages : dict
+        Maps dense keys to arrays with shape ``(n_states, n_choices)``.
+    nonpecs : dict
+        Maps dense keys to arrays with shape ``(n_states, n_choices)``.
+    expected_value_functions : numba.typed.Dict
+        Maps dense keys to arrays with shape ``(n_states,)``. If no expected value
+        functions are passed, they are initialized with zeros.
+    n_emax_draws : dict
+        Maps dense keys to arrays with shape ``(n_states,)`` containing the number of
+        draws used to compute the expected value functions. Only dense keys in periods
+        which are fully solved are included.
+    deduplication_ratios : dict
+        Maps periods which are fully solved to the share of states for which the
+        expected value functions are computed after removing states with the same
+        rewards and continuation values.
+    n_interpolation_points : dict
+        Maps periods which are interpolated to the number of states whose expected
+        value functions are simulated.
+    interpolation_errors : dict
+        Maps periods which are interpolated to the cross-validated prediction error of
+        the interpolation model if ``options["interpolation_tolerance"]`` is given.
+    interpolation_diagnostics : pandas.DataFrame or None
+        Diagnostics of the interpolation for each interpolated period and dense key if
+        ``options["interpolation_diagnostics"]`` is true, see
+        :func:`respy.interpolate._create_interpolation_diagnostics`.
+
+    """
+
+    def __init__(self, state_space, wages, nonpecs, expected_value_functions=None):
+        """Initialize the solution with the rewards of the state space."""
+        self.state_space = state_space
+        self.wages = wages
+        self.nonpecs = nonpecs
+        self.expected_value_functions = (
+            state_space.create_arrays_for_expected_value_functions()
+            if expected_value_functions is None
+            else expected_value_functions
+        )
+        self.n_emax_draws = {}
+        self.deduplication_ratios = {}
+        self.n_interpolation_points = {}
+        self.interpolation_errors = {}
+        self.interpolation_diagnostics = None
+
+    def __getattr__(self, name):
+        """Look up attributes of the state space."""
+        # Prevent an infinite recursion if the solution is not initialized, for example,
+        # during unpickling.
+        if name == "state_space":
+            raise AttributeError(name)
+
+        return getattr(self.state_space, name)
+
+    get_attribute_from_period = StateSpace.get_attribute_from_period
+
+    def get_continuation_values(self, period):
+        """Get continuation values.
+
+        The function takes the expected value functions from the previous periods and
+        then uses the indices of child states to put these expected value functions in
+        the correct format. If period is equal to self.n_periods - 1 the function
+        returns arrays of zeros since we are in terminal states. Otherwise we retrieve
+        expected value functions for next period and call
+        :func:`_get_continuation_values` to assign continuation values to all choices
+        within a period. (The object `subset_expected_value_functions` is required
+        because we need a Numba typed dict but the function
+        :meth:`StateSpace.get_attribute_from_period` just returns a normal dict)
+
+        Returns
+        -------
+        continuation_values : numba.typed.Dict
+            The continuation values for each dense key in a :class:`numpy.ndarray`.
+
+        See also
+        --------
+        _get_continuation_values
+            A more theoretical explanation can be found here: See :ref:`get continuation
+            values <get_continuation_values>`.
+
+        """
+        dtype = np.dtype(self.options["solution_dtype"])
+
+        if period == self.n_periods - 1:
+            shapes = self.get_attribute_from_period("base_draws_sol", period)
+            states = self.get_attribute_from_period("dense_key_to_core_indices", period)
+            continuation_values = {
+                key: np.zeros((states[key].shape[0], shapes[key].shape[1]), dtype)
+                for key in shapes
+            }
+        else:
+            child_indices = self.get_attribute_from_period("child_indices", period)
+            expected_value_functions = self.get_attribute_from_period(
+                "expected_value_functions", period + 1
+            )
+            subset_expected_value_functions = Dict.empty(
+                key_type=nb.types.int64, value_type=nb.from_dtype(dtype)[:]
+            )
+            for key, value in expected_value_functions.items():
+                subset_expected_value_functions[key] = value
+
+            continuation_values = _get_continuation_values(
+                self.get_attribute_from_period("dense_key_to_core_indices", period),
+                self.get_attribute_from_period("dense_key_to_complex", period),
+                child_indices,
+                self.core_key_and_dense_index_to_dense_key,
+                bypass={
+                    "expected_value_functions": subset_expected_value_functions,
+                    "dtype": dtype,
+                },
+            )
+        return continuation_values
+
+    def save(self, path):
+        """Save the solution and its state space to a directory.
+
+        Wages, non-pecuniary rewards and expected value functions are written to
+        uncompressed ``.npy`` files next to the state space, see
+        :meth:`StateSpace.save`. A saved solution can be loaded in a fraction of the
+        time needed to create the state space and to solve the model, e.g., to simulate
+        counterfactuals with :func:`~respy.simulate.get_simulate_func`.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            Path to the directory. The directory is created if it does not exist.
+
+        """
+        path = Path(path)
+        self.state_space.save(path)
+
+        _save_dictionary_of_arrays(path, "wages", self.wages)
+        _save_dictionary_of_arrays(path, "nonpecs", self.nonpecs)
+        _save_dictionary_of_arrays(
+            path, "expected_value_functions", dict(self.expected_value_functions)
+        )
+        _save_dictionary_of_arrays(path, "n_emax_draws", self.n_emax_draws)
+        with open(path / "solution.pickle", "wb") as file:
+            pickle.dump(
+                {
+                    "deduplication_ratios": self.deduplication_ratios,
+                    "n_interpolation_points": self.n_interpolation_points,
+                    "interpolation_errors": self.interpolation_errors,
+                    "interpolation_diagnostics": self.interpolation_diagnostics,
+                },
+                file,
+            )
+
+    @classmethod
+    def load(cls, path):
+        """Load a solution from a directory created with :meth:`save`.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            Path to the directory.
+
+        Returns
+        -------
+        solution : Solution
+
+        Examples
+        --------
+        >>> import respy as rp
+        >>> params, options = rp.get_example_model("robinson_crusoe_basic", False)
+        >>> solution = rp.get_solve_func(params, options)(params)
+        >>> solution.save(".respy-solution")
+        >>> solution = Solution.load(".respy-solution")
+        >>> simulate = rp.get_simulate_func(params, options, solution=solution)
+        >>> df = simulate(params)
+
+        """
+        path = Path(path)
+        state_space = StateSpace.load(path)
+
+        dtype = np.dtype(state_space.options["solution_dtype"])
+        expected_value_functions = Dict.empty(
+            key_type=nb.types.int64, value_type=nb.from_dtype(dtype)[:]
+        )
+        for key, value in _load_dictionary_of_arrays(
+            path, "expected_value_functions"
+        ).items():
+            expected_value_functions[key] = value
+
+        solution = cls(
+            state_space,
+            _load_dictionary_of_arrays(path, "wages"),
+            _load_dictionary_of_arrays(path, "nonpecs"),
+            expected_value_functions,
+        )
+        solution.n_emax_draws = _load_dictionary_of_arrays(path, "n_emax_draws")
+        with open(path / "solution.pickle", "rb") as file:
+            metadata = pickle.load(file)
+        solution.deduplication_ratios = metadata["deduplication_ratios"]
+        solution.n_interpolation_points = metadata["n_interpolation_points"]
+        solution.interpolation_errors = metadata["interpolation_errors"]
+        solution.interpolation_diagnostics = metadata["interpolation_diagnostics"]
+
+        return solution
+
     def set_attribute_from_keys(self, attribute, value):
         """Set attributes by keys.
 
@@ -588,6 +961,82 @@ def _add_initial_experiences_to_core_state_space(df, optim_paras):
     return df
 
 
+def _prune_unreachable_core_states(core, optim_paras, options):
+    """Remove core states which cannot be reached from the initial conditions.
+
+    The core state space contains all combinations of experiences, lagged choices and
+    initial experiences which are not excluded by the core state space filters. Many of
+    these states cannot be reached by any individual. Starting from the states in the
+    first period whose initial experiences and lagged choices have a positive
+    probability, the function applies the law of motion for all admissible choices
+    period by period and keeps only the states which are reached.
+
+    As the reachable states are closed under the law of motion, the solution for the
+    remaining states is unaffected.
+
+    """
+    core_columns = ["period"] + create_core_state_space_columns(optim_paras)
+
+    is_initial = _has_initial_conditions_with_positive_probability(core, optim_paras)
+    is_reachable = core["period"].eq(0) & is_initial
+
+    for period in range(options["n_periods"] - 1):
+        states = core.loc[is_reachable & core["period"].eq(period)]
+        states = create_is_inadmissible(states, optim_paras, options)
+
+        container = []
+        for i, choice in enumerate(optim_paras["choices"]):
+            children = states.loc[~states[f"_{choice}"], core_columns].copy()
+            children["choice"] = i
+            children = apply_law_of_motion_for_core(children, optim_paras)
+            container.append(children[core_columns])
+
+        children = pd.concat(container, sort=False).drop_duplicates()
+        next_period_indices = (
+            core.loc[core["period"].eq(period + 1), core_columns]
+            .reset_index()
+            .merge(children, on=core_columns)["index"]
+        )
+        is_reachable.loc[next_period_indices] = True
+
+    core = core.loc[is_reachable].reset_index(drop=True)
+
+    return core
+
+
+def _has_initial_conditions_with_positive_probability(core, optim_paras):
+    """Check whether initial experiences and lagged choices have a positive probability.
+
+    Levels of initial experiences and lagged choices have zero probability if they are
+    only determined by a constant which is not larger than the log of the smallest
+    positive float, e.g., because they are not specified in the parameters while others
+    are.
+
+    """
+    is_possible = pd.Series(True, index=core.index)
+
+    level_dicts = {
+        f"exp_{choice}": optim_paras["choices"][choice]["start"]
+        for choice in optim_paras["choices_w_exp"]
+    }
+    for lag in range(1, optim_paras["n_lagged_choices"] + 1):
+        level_dicts[f"lagged_choice_{lag}"] = {
+            code: optim_paras[f"lagged_choice_{lag}"][choice]
+            for code, choice in enumerate(optim_paras["choices"])
+        }
+
+    for column, level_dict in level_dicts.items():
+        impossible_levels = [
+            level
+            for level, coefficients in level_dict.items()
+            if coefficients.index.tolist() == ["constant"]
+            and coefficients["constant"] <= MIN_LOG_FLOAT
+        ]
+        is_possible &= ~core[column].isin(impossible_levels)
+
+    return is_possible
+
+
 def _create_dense_state_space_grid(optim_paras):
     """Create a grid of dense variables.
 
@@ -615,6 +1064,45 @@ def _create_dense_state_space_grid(optim_paras):
     return dense_state_space_grid
 
 
+def _prune_dense_state_space_grid(dense_grid, optim_paras, options):
+    """Remove combinations of dense variables with zero probability.
+
+    Levels of observables and types have zero probability if the linear predictor of
+    their multinomial logit does not exceed the log of the smallest positive float,
+    e.g., because the probability is fixed to zero or because the type probabilities
+    depend on observables. Levels whose linear predictor depends on covariates which
+    cannot be computed from dense variables, e.g., initial experiences, are kept.
+
+    Returns
+    -------
+    dense_grid : list
+        Contains all dense states with a positive probability as tuples.
+
+    """
+    columns = create_dense_state_space_columns(optim_paras)
+    df = pd.DataFrame(data=dense_grid, columns=columns)
+    covariates = compute_covariates(df, options["covariates_all"], raise_errors=False)
+    covariates["constant"] = 1
+
+    level_dicts = {
+        observable: dict(enumerate(level_dict.values()))
+        for observable, level_dict in optim_paras["observables"].items()
+    }
+    if optim_paras["n_types"] >= 2:
+        level_dicts["type"] = optim_paras["type_prob"]
+
+    is_possible = pd.Series(True, index=df.index)
+    for column, level_dict in level_dicts.items():
+        for level, coefficients in level_dict.items():
+            if coefficients.index.isin(covariates.columns).all():
+                x_beta = pandas_dot(covariates, coefficients)
+                is_possible &= ~(df[column].eq(level) & (x_beta <= MIN_LOG_FLOAT))
+
+    dense_grid = [state for state, possible in zip(dense_grid, is_possible) if possible]
+
+    return dense_grid
+
+
 def _create_dense_state_space_covariates(dense_grid, optim_paras, options):
     """Obtain covariates for all dense states."""
     if dense_grid:
@@ -668,13 +1156,27 @@ def _create_indexer(core, core_key_to_core_indices, optim_paras):
         value_type=nb.types.UniTuple(nb.types.int64, 2),
     )
 
-    for core_idx, indices in core_key_to_core_indices.items():
-        states = core.loc[indices, core_columns].to_numpy()
-        for i, state in enumerate(states):
-            indexer[tuple(state)] = (core_idx, i)
+    states = core.loc[
+        np.concatenate(list(core_key_to_core_indices.values())), core_columns
+    ].to_numpy(np.int64)
+    core_keys = np.concatenate(
+        [np.full(len(v), k) for k, v in core_key_to_core_indices.items()]
+    )
+    core_indices = np.concatenate(
+        [np.arange(len(v)) for v in core_key_to_core_indices.values()]
+    )
+    _fill_indexer(indexer, states, core_keys, core_indices)
+
     return indexer
 
 
+@nb.njit
+def _fill_indexer(indexer, states, core_keys, core_indices):
+    """Map each state to its core key and core index."""
+    for i in range(states.shape[0]):
+        indexer[array_to_tuple(indexer, states[i])] = (core_keys[i], core_indices[i])
+
+
 def _create_core_period_choice(core, optim_paras, options):
     """Create the core separated into period-choice cores.
 
@@ -758,6 +1260,7 @@ def _get_continuation_values(
     child_indices,
     core_index_and_dense_vector_to_dense_index,
     expected_value_functions,
+    dtype,
 ):
     """Get continuation values from child states.
 
@@ -784,7 +1287,7 @@ def _get_continuation_values(
 
     n_states = core_indices.shape[0]
 
-    continuation_values = np.zeros((len(core_indices), n_choices))
+    continuation_values = np.zeros((len(core_indices), n_choices), dtype)
     for i in range(n_states):
         for j in range(n_choices):
             core_idx, row_idx = child_indices[i, j]
@@ -843,3 +1346,50 @@ def _collect_child_indices(complex_, choice_set, indexer, optim_paras, options):
         )
 
     return indices
+
+
+def _save_dictionary_of_arrays(path, name, dictionary):
+    """Save a dictionary of arrays with the same dimensionality.
+
+    The flattened arrays are concatenated and saved in one ``.npy`` file. Keys, shapes
+    and the positions of the arrays are saved in a second file. ``None`` is saved as an
+    empty file.
+
+    """
+    if dictionary is None:
+        (path / f"{name}.none").touch()
+    else:
+        arrays = [np.asarray(value) for value in dictionary.values()]
+        sizes = np.array([array.size for array in arrays], dtype=np.int64)
+        shapes = np.array([array.shape for array in arrays]).reshape(len(arrays), -1)
+        stops = np.cumsum(sizes)
+        positions = np.column_stack(
+            (list(dictionary), stops - sizes, stops, shapes)
+        ).astype(np.int64)
+        values = (
+            np.concatenate([array.ravel() for array in arrays])
+            if arrays
+            else np.empty(0)
+        )
+        np.save(path / f"{name}.npy", values)
+        np.save(path / f"{name}_positions.npy", positions)
+
+
+def _load_dictionary_of_arrays(path, name):
+    """Load a dictionary of arrays saved with :func:`_save_dictionary_of_arrays`.
+
+    The arrays are views on a copy-on-write memory map of the file such that loading is
+    fast and only the accessed parts are read from disk.
+
+    """
+    if (path / f"{name}.none").exists():
+        dictionary = None
+    else:
+        values = np.load(path / f"{name}.npy", mmap_mode="c")
+        positions = np.load(path / f"{name}_positions.npy")
+        dictionary = {
+            int(key): np.asarray(values[start:stop]).reshape(shape)
+            for key, start, stop, *shape in positions
+        }
+
+    return dictionary
@@ -1,9 +1,18 @@
-from itertools import count
+import functools
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 import pytest
 
+from respy.interpolate import _get_not_interpolated_indicator
+from respy.interpolate import _get_not_interpolated_indicator_by_maximin
+from respy.interpolate import _ols_with_condition_number
 from respy.interpolate import _split_interpolation_points_evenly
+from respy.interpolate import KernelInterpolator
+from respy.interpolate import OLSInterpolator
+from respy.interpolate import RidgeInterpolator
 from respy.solve import get_solve_func
+from respy.tests.utils import apply_to_attributes_of_two_state_spaces
 from respy.tests.utils import process_model_or_seed
 
 
@@ -25,10 +34,7 @@ def test_run_through_of_solve_with_interpolation(seed):
 def test_split_interpolation_points_evenly(
     dense_index_to_n_states, interpolation_points
 ):
-    options = {
-        "interpolation_points": interpolation_points,
-        "solution_seed_iteration": count(0),
-    }
+    options = {"interpolation_points": interpolation_points, "solution_seed": 0}
 
     interpolations_points_splitted = _split_interpolation_points_evenly(
         dense_index_to_n_states, 0, options
@@ -36,3 +42,335 @@ def test_split_interpolation_points_evenly(
 
     for index in dense_index_to_n_states:
         assert dense_index_to_n_states[index] >= interpolations_points_splitted[index]
+
+
+@pytest.mark.unit
+def test_split_interpolation_points_evenly_with_groups():
+    dense_key_to_n_states = {0: 50, 1: 150, 2: 3, 3: 40}
+    dense_key_to_group = {0: "a", 1: "a", 2: "b", 3: "c"}
+    options = {"interpolation_points": 10, "solution_seed": 0}
+
+    interpolation_points = _split_interpolation_points_evenly(
+        dense_key_to_n_states, 0, options, dense_key_to_group
+    )
+
+    assert sum(interpolation_points.values()) == 10
+    assert interpolation_points[1] + interpolation_points[0] >= 2
+    assert interpolation_points[2] >= 2
+    assert interpolation_points[3] >= 2
+
+
+@pytest.mark.end_to_end
+@pytest.mark.parametrize(
+    "interpolation_model",
+    ["ridge", "polynomial", "kernel", functools.partial(RidgeInterpolator, penalty=1)],
+)
+def test_interpolation_models_approximate_full_solution(interpolation_model):
+    params, options = process_model_or_seed("kw_94_one")
+    options["n_periods"] = 10
+
+    solution = get_solve_func(params, options)(params)
+
+    options["interpolation_points"] = 100
+    options["interpolation_model"] = interpolation_model
+    solution_ = get_solve_func(params, options)(params)
+
+    for key, expected_value_functions in solution.expected_value_functions.items():
+        np.testing.assert_allclose(
+            solution_.expected_value_functions[key], expected_value_functions, rtol=0.1
+        )
+
+
+@pytest.mark.unit
+def test_kernel_interpolator_with_fewer_centers_than_states():
+    x = np.column_stack(
+        (np.random.RandomState(0).uniform(-2, 2, (3_000, 2)), np.ones(3_000))
+    )
+    y = x[:, 0] + np.sin(2 * x[:, 0]) * np.cos(x[:, 1])
+
+    exact = KernelInterpolator(bandwidth=0.5).fit(x, y)
+    with pytest.warns(UserWarning, match="uses 500 of them as centers"):
+        approximate = KernelInterpolator(bandwidth=0.5, max_centers=500).fit(x, y)
+
+    assert approximate.x.shape == (500, 3)
+    np.testing.assert_allclose(exact.predict(x), y, atol=0.05)
+    np.testing.assert_allclose(approximate.predict(x), y, atol=0.05)
+
+
+@pytest.mark.end_to_end
+def test_pooled_interpolation_with_fewer_points_than_dense_keys():
+    params, options = process_model_or_seed(
+        "robinson_crusoe_with_observed_characteristics"
+    )
+    options["n_periods"] = 8
+
+    solution = get_solve_func(params, options)(params)
+
+    options["interpolation_points"] = 10
+    options["interpolation_pooling"] = True
+    solution_ = get_solve_func(params, options)(params)
+
+    assert options["interpolation_points"] < 2 * len(solution.dense_key_to_choice_set)
+    assert any(
+        not np.allclose(solution_.expected_value_functions[key], evf)
+        for key, evf in solution.expected_value_functions.items()
+    )
+    for key, expected_value_functions in solution.expected_value_functions.items():
+        np.testing.assert_allclose(
+            solution_.expected_value_functions[key], expected_value_functions, rtol=0.05
+        )
+
+
+@pytest.mark.unit
+def test_maximin_selection_spreads_points_over_the_exogenous_variables():
+    exogenous = np.column_stack((np.linspace(0, 1, 101), np.ones(101)))
+
+    not_interpolated = _get_not_interpolated_indicator_by_maximin(5, exogenous)
+
+    assert np.flatnonzero(not_interpolated).tolist() == [0, 25, 50, 75, 100]
+
+
+@pytest.mark.end_to_end
+def test_maximin_selection_approximates_full_solution():
+    params, options = process_model_or_seed("kw_94_one")
+    options["n_periods"] = 10
+
+    solution = get_solve_func(params, options)(params)
+
+    options["interpolation_points"] = 30
+    options["interpolation_point_selection"] = "maximin"
+    solution_ = get_solve_func(params, options)(params)
+
+    for key, expected_value_functions in solution.expected_value_functions.items():
+        np.testing.assert_allclose(
+            solution_.expected_value_functions[key], expected_value_functions, rtol=0.05
+        )
+
+
+@pytest.mark.end_to_end
+def test_interpolation_subset_is_computed_once_per_state_space():
+    params, options = process_model_or_seed("kw_94_one")
+    options["n_periods"] = 10
+    options["interpolation_points"] = 30
+
+    solve = get_solve_func(params, options)
+    solution = solve(params)
+    indicators = dict(solution.not_interpolated_indicators)
+
+    params_ = params.copy()
+    params_.loc[("delta", "delta"), "value"] -= 0.05
+    solution_ = solve(params_)
+
+    assert indicators
+    assert solution_.not_interpolated_indicators == indicators
+    for key, subset in indicators.items():
+        assert solution_.not_interpolated_indicators[key]["ranks"] is subset["ranks"]
+        assert sum(subset["interpolation_points"][0].values()) == 30
+
+
+@pytest.mark.end_to_end
+def test_interpolation_subsets_do_not_depend_on_concurrent_solves():
+    params, options = process_model_or_seed("kw_94_one")
+    options["n_periods"] = 10
+    options["interpolation_points"] = 30
+    options["interpolation_tolerance"] = 0.001
+
+    params_ = params.copy()
+    params_.loc[("delta", "delta"), "value"] -= 0.05
+    params_list = [params, params_] * 2
+
+    solve = get_solve_func(params, options)
+    expected = [solve(p) for p in params_list]
+
+    solve = get_solve_func(params, options)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        solutions = list(executor.map(solve, params_list))
+
+    indicators = solutions[0].not_interpolated_indicators
+    indicators_ = expected[0].not_interpolated_indicators
+    assert indicators.keys() == indicators_.keys()
+    for key, subset in indicators.items():
+        assert subset["seeds"] == indicators_[key]["seeds"]
+        assert subset["interpolation_points"][0] == (
+            indicators_[key]["interpolation_points"][0]
+        )
+        apply_to_attributes_of_two_state_spaces(
+            subset["ranks"], indicators_[key]["ranks"], np.testing.assert_array_equal
+        )
+
+    for solution, solution_ in zip(solutions, expected):
+        apply_to_attributes_of_two_state_spaces(
+            solution.expected_value_functions,
+            solution_.expected_value_functions,
+            np.testing.assert_array_equal,
+        )
+
+
+@pytest.mark.end_to_end
+def test_interpolation_points_grow_until_error_is_below_tolerance():
+    params, options = process_model_or_seed("kw_94_one")
+    options["n_periods"] = 12
+    options["interpolation_points"] = 20
+
+    options["interpolation_tolerance"] = 0.01
+    solution = get_solve_func(params, options)(params)
+
+    options["interpolation_tolerance"] = 0.001
+    solution_ = get_solve_func(params, options)(params)
+
+    for period, error in solution_.interpolation_errors.items():
+        n_states = sum(
+            len(solution_.dense_key_to_core_indices[key])
+            for key in solution_.get_dense_keys_from_period(period)
+        )
+        assert error <= 0.001 or solution_.n_interpolation_points[period] == n_states
+        assert (
+            solution_.n_interpolation_points[period]
+            >= solution.n_interpolation_points[period]
+            >= 20
+        )
+    assert sum(solution_.n_interpolation_points.values()) > sum(
+        solution.n_interpolation_points.values()
+    )
+
+
+@pytest.mark.end_to_end
+@pytest.mark.parametrize("selection", ["random", "maximin"])
+def test_interpolation_subsets_are_nested_and_cached_once(selection):
+    params, options = process_model_or_seed("kw_94_one")
+    options["n_periods"] = 12
+    options["interpolation_points"] = 20
+    options["interpolation_tolerance"] = 0.001
+    options["interpolation_point_selection"] = selection
+
+    solution = get_solve_func(params, options)(params)
+
+    interpolated_periods = list(solution.n_interpolation_points)
+    assert len(solution.not_interpolated_indicators) == len(interpolated_periods)
+    for (period, *_), subset in solution.not_interpolated_indicators.items():
+        steps = subset["interpolation_points"]
+        assert sum(steps[-1].values()) >= solution.n_interpolation_points[period]
+        for points, points_ in zip(steps, steps[1:]):
+            assert all(points[key] <= points_[key] for key in points)
+
+    # Growing the subsets does not consume seeds, so the initial subsets are the same.
+    options["interpolation_tolerance"] = None
+    solution_ = get_solve_func(params, options)(params)
+
+    for key, subset in solution_.not_interpolated_indicators.items():
+        subset_ = solution.not_interpolated_indicators[key]
+        assert subset["seeds"] == subset_["seeds"]
+        assert subset["interpolation_points"][0] == subset_["interpolation_points"][0]
+
+
+@pytest.mark.unit
+def test_maximin_selection_continues_from_selected_states():
+    exogenous = np.random.RandomState(0).normal(size=(100, 3))
+
+    not_interpolated = _get_not_interpolated_indicator_by_maximin(5, exogenous)
+    not_interpolated_ = _get_not_interpolated_indicator_by_maximin(
+        10, exogenous, not_interpolated
+    )
+
+    assert not_interpolated_[not_interpolated].all()
+    np.testing.assert_array_equal(
+        not_interpolated_, _get_not_interpolated_indicator_by_maximin(10, exogenous)
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("conditioning", ["well", "ill", "rank_deficient"])
+def test_ols_is_equal_to_least_squares(conditioning):
+    np.random.seed(0)
+    x = np.column_stack((np.random.normal(size=(1000, 4)), np.ones(1000)))
+    if conditioning == "ill":
+        x[:, 1] = x[:, 0] + 1e-8 * np.random.normal(size=1000)
+    elif conditioning == "rank_deficient":
+        x[:, 1] = 0
+    y = x.dot(np.arange(5)) + np.random.normal(size=1000)
+
+    beta, condition_number = _ols_with_condition_number(y, x)
+    expected = np.linalg.lstsq(x, y, rcond=None)[0]
+
+    np.testing.assert_allclose(x.dot(beta), x.dot(expected), atol=1e-8)
+    assert (condition_number < 10) == (conditioning == "well")
+    assert np.isinf(condition_number) == (conditioning == "rank_deficient")
+
+
+@pytest.mark.unit
+def test_ols_interpolator_warns_if_ill_conditioned():
+    np.random.seed(0)
+    x = np.column_stack((np.random.normal(size=(100, 2)), np.ones(100)))
+    x[:, 1] = x[:, 0]
+
+    with pytest.warns(UserWarning, match="interpolation model are ill-conditioned"):
+        OLSInterpolator().fit(x, np.random.normal(size=100))
+
+
+def _create_design_with_small_diagonal_ratio(n_variables):
+    """Create a design whose triangular factor has a diagonal close to one.
+
+    The diagonal ratio of the triangular factor is below the square root of the number
+    of variables, but the condition number grows exponentially with it.
+
+    """
+    r = np.eye(n_variables) - np.triu(np.ones((n_variables, n_variables)), 1)
+    q = np.linalg.qr(np.random.RandomState(0).normal(size=(200, n_variables)))[0]
+
+    return q.dot(r)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("n_variables", [10, 20, 30])
+def test_ols_condition_number_is_not_underestimated(n_variables):
+    x = _create_design_with_small_diagonal_ratio(n_variables)
+    y = np.random.RandomState(1).normal(size=200)
+
+    _, condition_number = _ols_with_condition_number(y, x)
+    expected = np.linalg.cond(x / np.linalg.norm(x, axis=0))
+
+    np.testing.assert_allclose(condition_number, expected, rtol=1e-6)
+
+
+@pytest.mark.unit
+def test_ols_interpolator_warns_if_ill_conditioned_with_small_diagonal_ratio():
+    x = _create_design_with_small_diagonal_ratio(35)
+
+    with pytest.warns(UserWarning, match="interpolation model are ill-conditioned"):
+        OLSInterpolator().fit(x, np.random.RandomState(1).normal(size=200))
+
+
+@pytest.mark.end_to_end
+def test_interpolation_diagnostics():
+    params, options = process_model_or_seed("kw_94_one")
+    options["n_periods"] = 10
+    options["interpolation_points"] = 50
+    options["interpolation_diagnostics"] = True
+
+    solution = get_solve_func(params, options)(params)
+    diagnostics = solution.interpolation_diagnostics
+
+    assert diagnostics.index.names == ["period", "dense_key"]
+    assert (diagnostics["r_squared"] > 0.9).all()
+    assert (diagnostics[["seconds_simulation", "seconds_regression"]] > 0).all().all()
+    for (_, dense_key), row in diagnostics.iterrows():
+        assert row["n_simulated"] + row["n_interpolated"] == len(
+            solution.dense_key_to_core_indices[dense_key]
+        )
+    assert (
+        diagnostics.groupby("period")["n_simulated"].sum().to_dict()
+        == solution.n_interpolation_points
+    )
+
+
+@pytest.mark.unit
+def test_observed_states_are_simulated_with_a_large_weight():
+    observed_states = np.zeros(100, dtype="bool")
+    observed_states[::10] = True
+
+    not_interpolated = _get_not_interpolated_indicator(5, 100, 0, observed_states, 1e10)
+    not_interpolated_without_weight = _get_not_interpolated_indicator(5, 100, 0)
+
+    assert not_interpolated.sum() == 5
+    assert observed_states[not_interpolated].all()
+    assert not observed_states[not_interpolated_without_weight].all()
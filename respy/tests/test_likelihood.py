@@ -1,3 +1,6 @@
+import pickle
+import sys
+
 import hypothesis.strategies as st
 import numpy as np
 import pandas as pd
@@ -6,9 +9,19 @@ from hypothesis import given
 from hypothesis.extra.numpy import arrays
 from scipy import special
 
+from respy.config import TEST_RESOURCES_DIR
+from respy.likelihood import _gather_continuation_values
+from respy.likelihood import _internal_log_like_obs
 from respy.likelihood import _logsumexp
+from respy.likelihood import _simulate_log_probability_of_individuals_observed_choice
+from respy.likelihood import _simulate_log_probability_with_control_variate
 from respy.likelihood import get_log_like_func
+from respy.pre_processing.model_processing import process_params_and_options
+from respy.shared import create_base_draws
+from respy.shared import transform_base_draws_with_cholesky_factor
 from respy.simulate import get_simulate_func
+from respy.solve import AccuracySchedule
+from respy.tests.random_model import simulate_truncated_data
 from respy.tests.utils import process_model_or_seed
 
 
@@ -53,6 +66,88 @@ def test_return_scalar_for_likelihood(model):
     assert isinstance(array, np.ndarray)
 
 
+@pytest.mark.integration
+def test_log_like_contributions_are_aggregated_per_individual():
+    params, options = process_model_or_seed("kw_97_basic")
+    options["n_periods"] = 3
+    options["simulation_agents"] = 50
+
+    simulate = get_simulate_func(params, options)
+    df = simulate(params)
+
+    log_like = get_log_like_func(params, options, df, return_scalar=False)
+    contribs = log_like(params)
+
+    assert contribs.shape == (50,)
+
+    # Aggregate the log likelihoods of the observations with pandas.
+    optim_paras, _ = process_params_and_options(params, options)
+    _, loglike_choice, loglike_wage, log_type_probabilities = _internal_log_like_obs(
+        log_like.keywords["solve"](params),
+        log_like.keywords["observations"],
+        log_like.keywords["base_draws_est"],
+        optim_paras,
+        log_like.keywords["options"],
+    )
+    per_individual_and_type = (
+        log_like.keywords["df"]
+        .assign(loglike=loglike_choice + loglike_wage)
+        .groupby(["identifier", "type"])["loglike"]
+        .sum()
+        .unstack("type")
+    )
+    expected = special.logsumexp(
+        per_individual_and_type + log_type_probabilities, axis=1
+    )
+
+    np.testing.assert_allclose(contribs, expected)
+
+
+@pytest.mark.end_to_end
+def test_log_like_with_dense_keys_without_observations():
+    with open(TEST_RESOURCES_DIR / "regression_vault.pickle", "rb") as p:
+        params, options, expected = pickle.load(p)[1]
+
+    df = simulate_truncated_data(params, options)
+    log_like = get_log_like_func(params, options, df)
+
+    observations = log_like.keywords["observations"]
+    solution = log_like.keywords["solve"](params)
+    assert len(observations["positions"]) < len(solution.dense_key_to_core_indices)
+    assert all(type(key) is int for key in observations["positions"])
+
+    np.testing.assert_allclose(log_like(params), expected)
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("model", ["robinson_crusoe_basic", "kw_97_basic"])
+def test_continuation_values_are_gathered_for_observations(model):
+    params, options = process_model_or_seed(model)
+    options["n_periods"] = 4
+    options["simulation_agents"] = 50
+
+    simulate = get_simulate_func(params, options)
+    df = simulate(params)
+
+    log_like = get_log_like_func(params, options, df)
+    solution = log_like.keywords["solve"](params)
+    observations = log_like.keywords["observations"]
+
+    for period in range(options["n_periods"]):
+        continuation_values = solution.get_continuation_values(period)
+        for dense_key in set(continuation_values) & set(observations["core_indices"]):
+            result = _gather_continuation_values(
+                observations["child_dense_keys"][dense_key],
+                observations["child_core_indices"][dense_key],
+                solution.expected_value_functions,
+            )[observations["observed_state_indices"][dense_key]]
+            expected = continuation_values[dense_key][
+                observations["core_indices"][dense_key]
+            ]
+
+            np.testing.assert_array_equal(result, expected)
+
+
 @pytest.mark.unit
 @pytest.mark.precise
 @given(
@@ -67,3 +162,105 @@ def test_logsumexp(array):
     result = _logsumexp(array)
 
     np.testing.assert_allclose(result, expected)
+
+
+@pytest.mark.end_to_end
+@pytest.mark.skipif(sys.version_info < (3, 8), reason="Shards require Python 3.8.")
+@pytest.mark.parametrize("model", ["robinson_crusoe_basic", "kw_94_one", "kw_97_basic"])
+def test_sharded_likelihood_is_equal_to_likelihood(model):
+    params, options = process_model_or_seed(model)
+    options["n_periods"] = 3
+    options["simulation_agents"] = 100
+
+    simulate = get_simulate_func(params, options)
+    df = simulate(params)
+
+    log_like = get_log_like_func(params, options, df, return_scalar=False)
+    log_like_sharded = get_log_like_func(
+        params, options, df, return_scalar=False, n_shards=3
+    )
+
+    np.testing.assert_array_equal(log_like_sharded(params), log_like(params))
+
+
+@pytest.mark.unit
+@pytest.mark.precise
+def test_control_variate_reduces_variance_of_choice_probabilities():
+    choice_set = (True, True)
+    optim_paras = {"choices_w_wage": []}
+    shocks_cholesky = np.array([[0.5, 0], [0.2, 0.6]])
+    wages = np.ones(2)
+    nonpecs = np.array([0.0, 0.3])
+    continuation_values = np.zeros(2)
+
+    plain, controlled = [], []
+    for seed in range(300):
+        base_draws = create_base_draws((50, 2), seed, "random")
+        draws = transform_base_draws_with_cholesky_factor(
+            base_draws, choice_set, shocks_cholesky, optim_paras
+        )
+        plain.append(
+            _simulate_log_probability_of_individuals_observed_choice(
+                wages, nonpecs, continuation_values, draws, 0.95, 0, 0.5
+            )
+        )
+        controlled.append(
+            _simulate_log_probability_with_control_variate(
+                wages, nonpecs, continuation_values, draws, base_draws, 0.95, 0, 0.5
+            )
+        )
+
+    assert np.std(np.exp(controlled)) < 0.5 * np.std(np.exp(plain))
+    np.testing.assert_allclose(
+        np.mean(np.exp(controlled)), np.mean(np.exp(plain)), atol=0.005
+    )
+
+
+@pytest.mark.end_to_end
+def test_accuracy_schedule_ends_with_likelihood_of_options():
+    params, options = process_model_or_seed("kw_94_one")
+    options["n_periods"] = 3
+    df = get_simulate_func(params, options)(params)
+
+    schedule = AccuracySchedule(
+        [{"solution_draws": 20, "estimation_draws": 10, "n_evaluations": 2}, {}]
+    )
+    log_like_scheduled = get_log_like_func(
+        params, options, df, accuracy_schedule=schedule
+    )
+    log_like = get_log_like_func(params, options, df)
+
+    first_stage = [log_like_scheduled(params) for _ in range(2)]
+    assert schedule.stage == 0
+    last_stage = log_like_scheduled(params)
+    assert schedule.stage == 1
+
+    assert first_stage[0] == first_stage[1]
+    assert first_stage[0] != last_stage
+    assert last_stage == log_like(params)
+
+
+@pytest.mark.end_to_end
+def test_interpolation_favors_observed_states_and_their_children():
+    params, options = process_model_or_seed("kw_94_one")
+    options["n_periods"] = 10
+    options["simulation_agents"] = 100
+    df = get_simulate_func(params, options)(params)
+
+    options["interpolation_points"] = 50
+    options["interpolation_observed_states_weight"] = 100
+    log_like = get_log_like_func(params, options, df)
+    state_space = log_like.keywords["solve"].keywords["state_space"]
+
+    assert np.isfinite(log_like(params))
+
+    observed_states = state_space.observed_states
+    data = log_like.keywords["df"]
+    for dense_key, core_index in zip(data["dense_key"], data["core_index"]):
+        assert observed_states[dense_key][core_index]
+        if dense_key in state_space.child_indices:
+            for core_key, child_index in state_space.child_indices[dense_key][
+                core_index
+            ]:
+                assert observed_states[core_key][child_index]
+    assert not all(indicator.all() for indicator in observed_states.values())
@@ -8,6 +8,7 @@ from respy.interface import get_example_model
 from respy.method_of_simulated_moments import get_diag_weighting_matrix
 from respy.method_of_simulated_moments import get_moment_errors_func
 from respy.simulate import get_simulate_func
+from respy.solve import AccuracySchedule
 from respy.tests.utils import process_model_or_seed
 
 
@@ -82,6 +83,20 @@ def test_msm_nonzero(msm_args):
     assert msm_seed(msm_args[0]) > 0
 
 
+@pytest.mark.end_to_end
+def test_msm_with_accuracy_schedule_advanced_by_callback(msm_args):
+    schedule = AccuracySchedule(
+        [{"solution_draws": 5, "interpolation_points": 10}, {}],
+        callback=lambda stage, n_evaluations: False,  # noqa: U100
+    )
+    msm = get_moment_errors_func(*msm_args, accuracy_schedule=schedule)
+
+    assert msm(msm_args[0]) > 0
+
+    schedule.next_stage()
+    assert msm(msm_args[0]) == 0
+
+
 @pytest.mark.edge_case
 @pytest.mark.end_to_end
 @pytest.mark.parametrize("model_or_seed", ["kw_94_one", "kw_97_basic"])
@@ -1,7 +1,11 @@
+import asyncio
+
 import numba as nb
+import numpy as np
 import pytest
 from numba.typed import Dict
 
+import respy as rp
 from respy.parallelization import _infer_dense_keys_from_arguments
 from respy.parallelization import _is_dense_dictionary_argument
 from respy.parallelization import _is_dictionary_with_integer_keys
@@ -54,3 +58,29 @@ def test_infer_dense_keys_from_arguments(args, kwargs, expected):
 def test_is_dense_dictionary_argument(arg, dense_keys, expected):
     result = _is_dense_dictionary_argument(arg, dense_keys)
     assert result is expected
+
+
+@pytest.mark.end_to_end
+def test_asynchronous_evaluation_of_log_likelihood():
+    params, options, df = rp.get_example_model("robinson_crusoe_basic")
+    log_like = rp.get_log_like_func(params, options, df, return_scalar=False)
+    expected = log_like(params)
+
+    async def evaluate_concurrently():
+        return await asyncio.gather(
+            *[log_like.evaluate_async(params) for _ in range(2)]
+        )
+
+    with log_like:
+        log_like.start_workers(n_workers=2)
+        result = log_like.submit(params).result()
+        # asyncio.run is not available in Python 3.6.
+        loop = asyncio.new_event_loop()
+        try:
+            async_results = loop.run_until_complete(evaluate_concurrently())
+        finally:
+            loop.close()
+
+    assert log_like._executor is None
+    for result_ in [result, *async_results]:
+        np.testing.assert_array_equal(result_, expected)
@@ -42,3 +42,20 @@ def test_single_regression(regression_vault, index):
     assert np.isclose(
         crit_val, exp_val, rtol=TOL_REGRESSION_TESTS, atol=TOL_REGRESSION_TESTS
     )
+
+
+@pytest.mark.end_to_end
+@pytest.mark.parametrize("index", range(10))
+def test_single_regression_with_single_precision_solution(regression_vault, index):
+    """Compare the single precision solution with the regression vault.
+
+    The log likelihoods computed with ``options["solution_dtype"] = "float32"`` deviate
+    at most by a relative difference of 5e-9 from the values computed in double
+    precision. The tolerance leaves some room for other platforms.
+
+    """
+    params, options, exp_val = regression_vault[index]
+    options = {**options, "solution_dtype": "float32"}
+    crit_val = compute_log_likelihood(params, options)
+
+    assert np.isclose(crit_val, exp_val, rtol=1e-7, atol=1e-7)
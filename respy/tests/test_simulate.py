@@ -12,7 +12,9 @@ from respy.pre_processing.data_checking import check_simulated_data
 from respy.pre_processing.model_processing import process_params_and_options
 from respy.pre_processing.specification_helpers import generate_obs_labels
 from respy.shared import apply_law_of_motion_for_core
+from respy.state_space import Solution
 from respy.tests.random_model import generate_random_model
+from respy.tests.utils import apply_to_attributes_of_two_state_spaces
 from respy.tests.utils import process_model_or_seed
 
 
@@ -168,3 +170,29 @@ def test_apply_law_of_motion(i):
     )
 
     assert new_df.equals(expected)
+
+
+@pytest.mark.end_to_end
+@pytest.mark.parametrize(
+    "model", ["kw_94_one", "robinson_crusoe_with_observed_characteristics"]
+)
+def test_simulation_with_saved_and_loaded_solution(model, tmp_path):
+    params, options = process_model_or_seed(model)
+    options["n_periods"] = 5
+
+    solution = rp.get_solve_func(params, options)(params)
+    solution.save(tmp_path / "solution")
+    solution_ = Solution.load(tmp_path / "solution")
+
+    for attribute in ["wages", "nonpecs", "expected_value_functions", "child_indices"]:
+        apply_to_attributes_of_two_state_spaces(
+            getattr(solution, attribute),
+            getattr(solution_, attribute),
+            np.testing.assert_array_equal,
+        )
+    assert dict(solution.indexer) == dict(solution_.indexer)
+
+    df = rp.get_simulate_func(params, options)(params)
+    df_ = rp.get_simulate_func(params, options, solution=solution_)(params)
+
+    pd.testing.assert_frame_equal(df, df_)
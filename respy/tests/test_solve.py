@@ -1,13 +1,28 @@
+import functools
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
+import pandas as pd
 import pytest
 
+from respy import config
 from respy.config import EXAMPLE_MODELS
 from respy.config import INDEXER_INVALID_INDEX
 from respy.config import KEANE_WOLPIN_1994_MODELS
 from respy.config import KEANE_WOLPIN_1997_MODELS
 from respy.pre_processing.model_checking import check_model_solution
 from respy.pre_processing.model_processing import process_params_and_options
+from respy.shared import calculate_controlled_expected_value_functions
+from respy.shared import calculate_expected_draws
+from respy.shared import calculate_expected_value_functions
+from respy.shared import calculate_expected_value_functions_of_two_choices
+from respy.shared import create_base_draws
 from respy.shared import create_core_state_space_columns
+from respy.shared import create_quadrature_nodes_and_weights
+from respy.shared import transform_base_draws_with_cholesky_factor
+from respy.simulate import get_simulate_func
+from respy.solve import _transform_base_draws_by_period_and_choice_set
 from respy.solve import get_solve_func
 from respy.state_space import _create_core_period_choice
 from respy.state_space import _create_core_state_space
@@ -427,3 +442,333 @@ def test_wage_nonpecs():
             getattr(state_space_, attribute),
             np.testing.assert_array_almost_equal,
         )
+
+
+@pytest.mark.unit
+@pytest.mark.precise
+@pytest.mark.parametrize("threshold", [0, np.inf])
+def test_dispatch_between_serial_and_parallel_kernels(threshold, monkeypatch):
+    """Serial and parallel kernels return the same expected value functions."""
+    wages = np.random.lognormal(size=(10, 3))
+    nonpecs = np.random.normal(size=(10, 3))
+    continuation_values = np.random.normal(size=(10, 3))
+    draws = np.random.normal(size=(50, 3))
+
+    expected = calculate_expected_value_functions.serial(
+        wages, nonpecs, continuation_values, draws, 0.95
+    )
+
+    monkeypatch.setattr(config, "PARALLEL_KERNEL_THRESHOLD", threshold)
+    result = calculate_expected_value_functions(
+        wages, nonpecs, continuation_values, draws, 0.95
+    )
+
+    np.testing.assert_array_almost_equal(result, expected)
+
+
+@pytest.mark.end_to_end
+@pytest.mark.precise
+def test_concurrent_solutions_are_equal_to_sequential_solutions():
+    """Solving the model in threads has no side-effects on the shared state space."""
+    params, options = process_model_or_seed("robinson_crusoe_extended")
+    options["interpolation_points"] = 10
+
+    solve = get_solve_func(params, options)
+    state_space = solve.keywords["state_space"]
+
+    params_ = params.copy()
+    params_.loc[("delta", "delta"), "value"] -= 0.1
+    params_list = [params, params_] * 2
+
+    expected = [solve(p) for p in params_list]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        solutions = list(executor.map(solve, params_list))
+
+    assert not hasattr(state_space, "expected_value_functions")
+    for solution, solution_ in zip(solutions, expected):
+        assert solution.state_space is state_space
+        for attribute in ["wages", "nonpecs", "expected_value_functions"]:
+            apply_to_attributes_of_two_state_spaces(
+                getattr(solution, attribute),
+                getattr(solution_, attribute),
+                np.testing.assert_array_equal,
+            )
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize(
+    "model", ["kw_97_basic", "robinson_crusoe_with_observed_characteristics"]
+)
+def test_transformed_draws_are_shared_by_dense_keys_with_same_period_and_choice_set(
+    model,
+):
+    params, options = process_model_or_seed(model)
+    options["n_periods"] = 3
+    optim_paras, options = process_params_and_options(params, options)
+    state_space = create_state_space_class(optim_paras, options)
+
+    draws = _transform_base_draws_by_period_and_choice_set(
+        state_space, optim_paras, options
+    )
+    expected = transform_base_draws_with_cholesky_factor(
+        state_space.base_draws_sol,
+        state_space.dense_key_to_choice_set,
+        optim_paras["shocks_cholesky"],
+        optim_paras,
+    )
+
+    for key in state_space.dense_key_to_complex:
+        np.testing.assert_array_equal(draws[key], expected[key])
+
+    complexes = state_space.dense_key_to_complex
+    for key, key_ in itertools.combinations(complexes, 2):
+        if complexes[key][:2] == complexes[key_][:2]:
+            assert draws[key] is draws[key_]
+
+
+@pytest.mark.unit
+@pytest.mark.precise
+@pytest.mark.parametrize("rule", ["gauss_hermite", "sparse_grid"])
+@pytest.mark.parametrize("n_dimensions", [1, 2, 4])
+def test_quadrature_rules_integrate_moments_of_standard_normal_variables(
+    rule, n_dimensions
+):
+    nodes, weights = create_quadrature_nodes_and_weights(n_dimensions, rule, 3)
+
+    np.testing.assert_allclose(weights.sum(), 1)
+    np.testing.assert_allclose(weights @ nodes, 0, atol=1e-14)
+    np.testing.assert_allclose(weights @ nodes ** 2, 1)
+    np.testing.assert_allclose(weights @ nodes ** 4, 3)
+
+
+@pytest.mark.end_to_end
+@pytest.mark.parametrize("integration", ["gauss_hermite", "sparse_grid"])
+def test_quadrature_is_close_to_monte_carlo_integration(integration):
+    params, options = process_model_or_seed("robinson_crusoe_extended")
+    n_draws = options["solution_draws"]
+    options["solution_draws"] = 2 ** 15
+
+    solve = get_solve_func(params, options)
+    solution = solve(params)
+
+    options["solution_integration"] = integration
+    solve = get_solve_func(params, options)
+    solution_ = solve(params)
+
+    # At the default level, the rules are more accurate with fewer nodes than the
+    # solution draws of the model, see the guide on numerical integration.
+    assert all(len(w) < n_draws for w in solution_.base_weights_sol.values())
+    apply_to_attributes_of_two_state_spaces(
+        solution.expected_value_functions,
+        solution_.expected_value_functions,
+        functools.partial(np.testing.assert_allclose, rtol=1e-2),
+    )
+
+
+@pytest.mark.end_to_end
+def test_closed_form_emax_of_two_choices_is_close_to_monte_carlo_integration():
+    params, options = process_model_or_seed("robinson_crusoe_basic")
+    options["solution_draws"] = 100_000
+    options["monte_carlo_sequence"] = "random"
+
+    solve = get_solve_func(params, options)
+    solution = solve(params)
+
+    options["solution_closed_form_emax"] = True
+    solve = get_solve_func(params, options)
+    solution_ = solve(params)
+
+    apply_to_attributes_of_two_state_spaces(
+        solution.expected_value_functions,
+        solution_.expected_value_functions,
+        functools.partial(np.testing.assert_allclose, rtol=5e-3),
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.precise
+@pytest.mark.parametrize("n_wages", [0, 1, 2])
+def test_closed_form_emax_of_two_choices_with_negative_value_functions(n_wages):
+    nonpecs = np.array([[-5, -6], [1, 2], [-0.2, -0.1], [-1.5, -2], [0.3, -3]], float)
+    wages = np.ones_like(nonpecs)
+    continuation_values = np.zeros_like(nonpecs)
+    shocks_cholesky = np.linalg.cholesky(np.array([[1, 0.3], [0.3, 0.5]]))
+
+    draws = np.random.RandomState(0).normal(size=(1_000_000, 2)) @ shocks_cholesky.T
+    draws[:, :n_wages] = np.exp(draws[:, :n_wages])
+    expected = calculate_expected_value_functions(
+        wages, nonpecs, continuation_values, draws, 0.95
+    )
+
+    expected_value_functions = calculate_expected_value_functions_of_two_choices(
+        wages, nonpecs, continuation_values, shocks_cholesky, n_wages, 0.95
+    )
+
+    assert expected_value_functions[0] < 0.2
+    np.testing.assert_allclose(expected_value_functions, expected, atol=3e-3)
+
+
+@pytest.mark.end_to_end
+def test_adaptive_number_of_draws_reduces_draws_within_tolerance():
+    params, options = process_model_or_seed("robinson_crusoe_extended")
+    options["solution_draws"] = 2_000
+
+    solve = get_solve_func(params, options)
+    solution = solve(params)
+
+    options["solution_emax_tolerance"] = 0.01
+    solve = get_solve_func(params, options)
+    solution_ = solve(params)
+
+    n_draws = np.concatenate(list(solution.n_emax_draws.values()))
+    n_draws_ = np.concatenate(list(solution_.n_emax_draws.values()))
+    assert (n_draws == options["solution_draws"]).all()
+    assert (n_draws_ <= n_draws).all()
+    assert n_draws_.sum() < n_draws.sum()
+
+    apply_to_attributes_of_two_state_spaces(
+        solution.expected_value_functions,
+        solution_.expected_value_functions,
+        functools.partial(np.testing.assert_allclose, atol=0.1),
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.precise
+def test_variance_reduction_of_expected_value_functions():
+    choice_set = (True, True)
+    optim_paras = {
+        "shocks_cholesky": np.array([[0.3, 0], [0.1, 0.5]]),
+        "choices_w_wage": ["fishing"],
+    }
+    wages = np.array([1.0, 1.0])
+    nonpecs = np.array([0.0, 1.2])
+    continuation_values = np.ones(2)
+    expected_draws = calculate_expected_draws(choice_set, optim_paras)
+
+    def _create_draws(n_draws, seed, antithetic=False):
+        draws = create_base_draws((n_draws, 2), seed, "random", antithetic)
+        return transform_base_draws_with_cholesky_factor(
+            draws, choice_set, optim_paras["shocks_cholesky"], optim_paras
+        )
+
+    expected = calculate_expected_value_functions(
+        wages, nonpecs, continuation_values, _create_draws(1_000_000, 0), 0.95
+    )
+
+    plain, controlled, antithetic = [], [], []
+    for seed in range(1, 201):
+        draws = _create_draws(100, seed)
+        plain.append(
+            calculate_expected_value_functions(
+                wages, nonpecs, continuation_values, draws, 0.95
+            )
+        )
+        controlled.append(
+            calculate_controlled_expected_value_functions(
+                wages, nonpecs, continuation_values, draws, expected_draws, 0.95
+            )
+        )
+        antithetic.append(
+            calculate_expected_value_functions(
+                wages,
+                nonpecs,
+                continuation_values,
+                _create_draws(100, seed, True),
+                0.95,
+            )
+        )
+
+    for estimates in [controlled, antithetic]:
+        assert np.std(estimates) < 0.75 * np.std(plain)
+        np.testing.assert_allclose(np.mean(estimates), expected, atol=0.01)
+
+
+@pytest.mark.end_to_end
+@pytest.mark.parametrize("model", ["robinson_crusoe_extended", "kw_94_one"])
+def test_deduplication_of_states_does_not_change_solution(model):
+    params, options = process_model_or_seed(model)
+    options["solution_deduplicate_states"] = False
+
+    solve = get_solve_func(params, options)
+    solution = solve(params)
+
+    options["solution_deduplicate_states"] = True
+    solve = get_solve_func(params, options)
+    solution_ = solve(params)
+
+    apply_to_attributes_of_two_state_spaces(
+        solution.expected_value_functions,
+        solution_.expected_value_functions,
+        np.testing.assert_array_equal,
+    )
+    assert all(0 < ratio <= 1 for ratio in solution_.deduplication_ratios.values())
+    assert all(ratio == 1 for ratio in solution.deduplication_ratios.values())
+
+
+@pytest.mark.end_to_end
+def test_pruning_of_unreachable_states_does_not_change_simulated_data():
+    params, options = process_model_or_seed("kw_94_one")
+    options["n_periods"] = 10
+
+    simulate = get_simulate_func(params, options)
+    df = simulate(params)
+    n_core_states = len(simulate.keywords["solve"].keywords["state_space"].core)
+
+    options["core_state_space_pruning"] = True
+    simulate = get_simulate_func(params, options)
+    df_ = simulate(params)
+    n_core_states_ = len(simulate.keywords["solve"].keywords["state_space"].core)
+
+    assert n_core_states_ < n_core_states
+    pd.testing.assert_frame_equal(df, df_)
+
+
+@pytest.mark.end_to_end
+def test_pruning_of_dense_combinations_with_zero_probability():
+    params, options = process_model_or_seed(
+        "robinson_crusoe_with_observed_characteristics"
+    )
+    params.loc[("observable_fishing_grounds_rich", "probability"), "value"] = 1
+    params.loc[("observable_fishing_grounds_poor", "probability"), "value"] = 0
+
+    simulate = get_simulate_func(params, options)
+    df = simulate(params)
+    state_space = simulate.keywords["solve"].keywords["state_space"]
+
+    options["dense_state_space_pruning"] = True
+    simulate = get_simulate_func(params, options)
+    df_ = simulate(params)
+    state_space_ = simulate.keywords["solve"].keywords["state_space"]
+
+    assert 2 * len(state_space_.dense_key_to_complex) == len(
+        state_space.dense_key_to_complex
+    )
+    pd.testing.assert_frame_equal(
+        df.drop(columns="Dense_Key"), df_.drop(columns="Dense_Key")
+    )
+
+
+@pytest.mark.end_to_end
+@pytest.mark.parametrize("model", ["robinson_crusoe_extended", "kw_94_one"])
+def test_single_precision_solution_is_close_to_double_precision_solution(model):
+    params, options = process_model_or_seed(model)
+    options["n_periods"] = min(options["n_periods"], 10)
+
+    solve = get_solve_func(params, options)
+    solution = solve(params)
+
+    options["solution_dtype"] = "float32"
+    solve = get_solve_func(params, options)
+    solution_ = solve(params)
+
+    for dense_key, wages in solution_.wages.items():
+        assert wages.dtype == np.float32
+        assert solution_.expected_value_functions[dense_key].dtype == np.float32
+        assert solution_.base_draws_sol[dense_key].dtype == np.float32
+
+    apply_to_attributes_of_two_state_spaces(
+        solution.expected_value_functions,
+        solution_.expected_value_functions,
+        functools.partial(np.testing.assert_allclose, rtol=1e-5),
+    )